@@ -1,146 +1,319 @@
 # app.py (full version with fixed image OCR)
 import streamlit as st
 import pandas as pd
+import numpy as np
 import altair as alt
-import io
 import tempfile
 import os
-from nlp_engine import calculate_risk, process_dataframe
-from data_loader import load_uploaded_dataset
-from PIL import Image as PILImage
+import hashlib
+from contextlib import ExitStack
+from instrumentation import profile_run, recorder
+from nlp_engine import calculate_risk, process_dataframe, risk_cache_stats, warm_up
+from data_loader import load_uploaded_dataset, read_csv_fast, resolve_text_column
+from csv_ingest import read_header
+from text_cleaning import add_clean_text
+from search_index import InvertedIndex
+from session_store import AnalysisSession
+from results_store import (MAX_STREAM_OUTPUTS, STREAMS_DIR, export_csv, list_results, open_results, prune_files,
+                           result_path, safe_name, store_results, stream_output_path)
+from stream_engine import DEFAULT_STREAM_CHUNKSIZE, process_csv_stream, summarize_output
+from job_queue import JobQueue
+from video_engine import (DEFAULT_FRAME_INTERVAL, DEFAULT_HASH_THRESHOLD, DEFAULT_MAX_FRAMES,
+                          DEFAULT_OCR_WORKERS, extract_video_text)
 
 st.set_page_config(page_title="Sentinel-X OSINT Dashboard", layout="wide", page_icon="🛡️")
 
 # ----------------------------
 # Optional heavy imports (graceful fallback)
 # ----------------------------
-EASYOCR_AVAILABLE = False
-CV2_AVAILABLE = False
-PYTESSERACT_AVAILABLE = False
+# Availability flags come from the shared OCR engine (EasyOCR is probed, not imported).
+from ocr_engine import (CV2_AVAILABLE, EASYOCR_AVAILABLE, PYTESSERACT_AVAILABLE,
+                        extract_text, ocr_easyocr, ocr_tesseract)
 
-try:
-    import easyocr
-    EASYOCR_AVAILABLE = True
-except Exception:
-    pass
-
-try:
-    import cv2
-    CV2_AVAILABLE = True
-except Exception:
-    pass
+# ----------------------------
+# Background model warm-up (once per server process)
+# ----------------------------
+@st.cache_resource(show_spinner=False)
+def start_model_warm_up():
+    """Load the risk model in the background so the first render isn't blocked on it."""
+    return warm_up(background=True)
 
-try:
-    import pytesseract
-    PYTESSERACT_AVAILABLE = True
-except Exception:
-    pass
+start_model_warm_up()
 
 # ----------------------------
 # Helper functions
 # ----------------------------
-def try_read_csv(uploaded_file):
-    """Try multiple encodings to read CSV safely."""
-    encodings = ["utf-8", "iso-8859-1", "cp1252"]
-    uploaded_file.seek(0)
-    for enc in encodings:
-        try:
-            uploaded_file.seek(0)
-            return pd.read_csv(uploaded_file, encoding=enc)
-        except Exception:
-            continue
-    uploaded_file.seek(0)
-    return pd.read_csv(uploaded_file, engine="python", error_bad_lines=False)
+def try_read_csv(uploaded_file, text_column="text"):
+    """Read an uploaded CSV once: detected encoding, text/metadata columns only, bad lines skipped."""
+    return read_csv_fast(uploaded_file, text_column=text_column)
 
 def ocr_image_bytes_with_easyocr(image_bytes):
-    """Run EasyOCR on bytes and return extracted text."""
-    reader = easyocr.Reader(['en'], gpu=False)
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tf:
-        tf.write(image_bytes)
-        tmp_path = tf.name
-    try:
-        res = reader.readtext(tmp_path, detail=0)
-        text = " ".join(res)
-    except Exception:
-        text = ""
-    finally:
-        try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
-    return text
+    """Run EasyOCR (pooled reader, no temp file) on bytes or an array and return extracted text."""
+    return ocr_easyocr(image_bytes)
 
 def ocr_image_pytesseract(image_bytes):
     """OCR fallback using pytesseract if available."""
-    try:
-        im = PILImage.open(io.BytesIO(image_bytes)).convert("RGB")
-        text = pytesseract.image_to_string(im)
-        return text
-    except Exception:
-        return ""
+    return ocr_tesseract(image_bytes)
 
 def extract_text_from_image(uploaded_image):
     """Extract text from image (EasyOCR first, then pytesseract)."""
     uploaded_image.seek(0)
-    bytes_data = uploaded_image.read()
-    extracted_text = ""
-
-    # Try EasyOCR
-    if EASYOCR_AVAILABLE:
-        extracted_text = ocr_image_bytes_with_easyocr(bytes_data)
+    return extract_text(uploaded_image.read())
 
-    # Fallback to pytesseract
-    if not extracted_text and PYTESSERACT_AVAILABLE:
-        extracted_text = ocr_image_pytesseract(bytes_data)
-
-    return extracted_text
-
-def extract_text_from_video(uploaded_video, frame_interval=30, max_frames=60):
-    """Extract text from video frames."""
+def extract_text_from_video(uploaded_video, frame_interval=DEFAULT_FRAME_INTERVAL, max_frames=DEFAULT_MAX_FRAMES,
+                            workers=DEFAULT_OCR_WORKERS, hash_threshold=DEFAULT_HASH_THRESHOLD):
+    """Extract text from video frames (parallel OCR, near-duplicate frames skipped)."""
     if not CV2_AVAILABLE:
-        return "", "cv2_not_installed"
+        return "", "cv2_not_installed", []
 
     uploaded_video.seek(0)
     with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tf:
         tf.write(uploaded_video.read())
         temp_path = tf.name
 
-    cap = cv2.VideoCapture(temp_path)
-    texts = []
-    frame_count = 0
-    extracted_frames = 0
     try:
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            if frame_count % frame_interval == 0:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                success, encoded_image = cv2.imencode('.png', gray)
-                if not success:
-                    continue
-                image_bytes = encoded_image.tobytes()
-                if EASYOCR_AVAILABLE:
-                    chunk_text = ocr_image_bytes_with_easyocr(image_bytes)
-                elif PYTESSERACT_AVAILABLE:
-                    chunk_text = ocr_image_pytesseract(image_bytes)
-                else:
-                    chunk_text = ""
-                if chunk_text:
-                    texts.append(chunk_text)
-                    extracted_frames += 1
-                if extracted_frames >= max_frames:
-                    break
-            frame_count += 1
-    except Exception:
-        pass
+        result = extract_video_text(temp_path, frame_interval=frame_interval, max_frames=max_frames,
+                                    workers=workers, hash_threshold=hash_threshold)
+    except Exception as e:
+        return "", f"error: {e}", []
     finally:
-        cap.release()
         try:
             os.remove(temp_path)
         except Exception:
             pass
-    return " ".join(texts), "ok"
+    return result["text"], "ok", result["segments"]
+
+@st.cache_resource(show_spinner=False)
+def get_session(name):
+    """One AnalysisSession (SQLite connection) per session name per server process."""
+    return AnalysisSession(name)
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_search_index(dataset_key, _texts):
+    """Token inverted index for a processed dataset, built once per dataset and reused across reruns."""
+    return InvertedIndex.from_series(_texts)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def saved_result_list():
+    """list_results() without re-reading every result's metadata on each rerun (cleared after a save)."""
+    return list_results()
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _open_result_frame(result_file, mtime):
+    return open_results(result_file)
+
+def get_result_frame(result_file):
+    """Stored processed result, loaded once per file version and shared read-only across reruns."""
+    return _open_result_frame(result_file, os.path.getmtime(result_file))
+
+def upload_hash(uploaded_file):
+    """MD5 of an upload, computed once per uploaded file instead of on every rerun."""
+    key = f"upload_md5::{getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)}"
+    if key not in st.session_state:
+        st.session_state[key] = hashlib.md5(uploaded_file.getvalue()).hexdigest()
+    return st.session_state[key]
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def risk_summary(dataset_key, _df):
+    """Total and per-category counts from a single value_counts pass."""
+    counts = _df["risk_category"].value_counts()
+    return {"total": len(_df), "counts": {str(k): int(v) for k, v in counts.items()}}
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def top_high_posts(dataset_key, _df, n=50):
+    """Top-n High rows by score (nlargest, no sorted copy of the whole category)."""
+    top = _df.loc[_df["risk_category"] == "High", "risk_score"].nlargest(n).index
+    return _df.loc[top]
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def filter_positions(dataset_key, _df, keyword, categories):
+    """Row positions matching the category filter and keyword (index lookup), as an int array."""
+    mask = _df["risk_category"].isin(list(categories)).to_numpy()
+    if keyword:
+        mask &= get_search_index(dataset_key, _df["clean_text"]).mask(keyword)
+    return np.flatnonzero(mask)
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue():
+    """Process-wide background worker pools for batch uploads; each browser session tracks its own job ids."""
+    return JobQueue()
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_combined_results(job_ids):
+    """Finished batch jobs merged into one frame, built once per set of finished jobs."""
+    return get_job_queue().combined(list(job_ids))
+
+def render_batch_progress(job_ids):
+    """Per-job progress bars; triggers a full rerun once the last pending job finishes."""
+    queue = get_job_queue()
+    for job in queue.jobs(job_ids):
+        if job["status"] == "failed":
+            st.error(f"**{job['name']}** ({job['kind']}) failed: {job['error']}")
+        else:
+            st.progress(job["progress"], text=f"**{job['name']}** ({job['kind']}) — {job['status']}: {job['message']}")
+    if not queue.pending(job_ids) and st.session_state.get("batch_was_pending"):
+        st.session_state["batch_was_pending"] = False
+        st.rerun()
+
+def render_risk_pie(rc):
+    """Donut chart of a risk_category/count frame."""
+    pie = alt.Chart(rc).mark_arc(innerRadius=50).encode(
+        theta=alt.Theta(field="count", type="quantitative"),
+        color=alt.Color(field="risk_category", type="nominal"),
+        tooltip=["risk_category", "count"]
+    ).properties(width=400, height=400)
+    st.altair_chart(pie, use_container_width=True)
+
+MAX_INLINE_DOWNLOAD_MB = 200
+
+def file_download(label, path, file_name, mime, key, container=st, prepare=None):
+    """
+    Download button for a file on disk, read only in the rerun where the user asks for it.
+
+    Streamlit reads and hashes download_button data on every rerun that renders it, so the
+    bytes are loaded behind a "Prepare" click and dropped on the next interaction. Files over
+    MAX_INLINE_DOWNLOAD_MB are never pushed through the page; their server path is shown instead.
+    `prepare`, if given, is called on the click first (e.g. to write the file).
+    """
+    if not container.button(f"Prepare: {label}", key=f"{key}_prepare"):
+        return
+    if prepare is not None:
+        with st.spinner("Preparing download..."):
+            prepare()
+    size_mb = os.path.getsize(path) / 2 ** 20
+    if size_mb > MAX_INLINE_DOWNLOAD_MB:
+        container.caption(f"{label}: {size_mb:,.0f} MB, too large to send through the page. Saved on the server at:")
+        container.code(path, language=None)
+        return
+    with open(path, "rb") as f:
+        container.download_button(label, data=f.read(), file_name=file_name, mime=mime, key=key, on_click="ignore")
+
+def run_streaming_csv(uploaded_file, text_column, chunksize):
+    """Score a CSV chunk by chunk into a file keyed by the upload hash and render the running aggregates."""
+    columns = read_header(uploaded_file)  # same encoding detection as the chunk reader
+    if text_column not in columns:
+        found = resolve_text_column(columns, text_column)
+        if not found:
+            st.error(f"Column '{text_column}' not found. Adjust sidebar input.")
+            st.stop()
+        st.warning(f"Column '{text_column}' not found. Using '{found}' instead.")
+        text_column = found
+
+    # Reruns (widget clicks, the download button) reuse the scored output instead of re-streaming
+    out_path = stream_output_path(upload_hash(uploaded_file), text_column)
+    summary_key = f"stream_summary::{out_path}"
+    summary = st.session_state.get(summary_key)
+    status = st.empty()
+    if summary is None or not os.path.exists(out_path):
+        if os.path.exists(out_path):
+            summary = summarize_output(out_path)
+            status.success(f"Reopened previous streaming result: {summary.rows:,} rows (not re-scored).")
+        else:
+            os.makedirs(STREAMS_DIR, exist_ok=True)
+            partial_path = out_path + ".partial"
+            summary = process_csv_stream(
+                uploaded_file, partial_path, text_column=text_column, chunksize=chunksize, output_format="csv",
+                progress_callback=lambda s: status.info(f"Scored {s.rows:,} rows ({s.chunks} chunks)...")
+            )
+            os.replace(partial_path, out_path)
+            summary.output_path = out_path
+            prune_files(os.path.join(STREAMS_DIR, "*.csv"), MAX_STREAM_OUTPUTS)
+            status.success(f"Streaming analysis complete: {summary.rows:,} rows in {summary.chunks} chunks.")
+        st.session_state[summary_key] = summary
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Posts", summary.rows)
+    col2.metric("High Risk", summary.category_counts.get("High", 0))
+    col3.metric("Moderate Risk", summary.category_counts.get("Moderate", 0))
+
+    st.subheader(f"Highest Risk Posts (top {summary.top_k})")
+    st.dataframe(summary.top_rows())
+    render_risk_pie(summary.category_frame())
+    file_download("Download processed CSV", summary.output_path, "sentinel_x_processed.csv", "text/csv",
+                  key="stream_csv")
+
+def render_session_entities(session, key_prefix="results"):
+    """Top terms and tracked-entity co-occurrence, both maintained incrementally by the session."""
+    with st.expander(f"Session entities ({session.name})"):
+        terms = session.top_terms(30)
+        tracked = session.tracked_entities()
+        entities = st.multiselect(
+            "Track co-occurrence between", options=list(dict.fromkeys(terms + tracked)),
+            default=tracked or terms[:15], key=f"{key_prefix}_session_entities",
+            help="Changing the set recounts once over the stored rows; later uploads only add their delta."
+        )
+        session.track_entities(entities)
+        min_cooccur = st.number_input("Min shared posts", min_value=1, value=2, key=f"{key_prefix}_session_min")
+        edges = [(s, d, w) for s, d, w in session.relationships(min_cooccur=int(min_cooccur)) if s < d]
+        st.dataframe(pd.DataFrame(edges, columns=["source", "target", "posts"]).sort_values("posts", ascending=False),
+                     use_container_width=True)
+
+def render_csv_results(processed_df, dataset_key, result_file=None, key_prefix="results", session=None):
+    """
+    Metrics, top-risk table, pie, keyword filter and downloads for a processed dataset.
+
+    With an analysis `session`, the metrics, top-High table and entity panel come from the
+    session's incrementally maintained aggregates (all rows stored so far), not from a rescan.
+    """
+    if session is not None:
+        counts = session.category_counts()
+        summary = {"total": sum(counts.values()), "counts": counts}
+        top_high = session.top_high(50)
+    else:
+        summary = risk_summary(dataset_key, processed_df)
+        top_high = top_high_posts(dataset_key, processed_df)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Posts", summary["total"])
+    col2.metric("High Risk", summary["counts"].get("High", 0))
+    col3.metric("Moderate Risk", summary["counts"].get("Moderate", 0))
+
+    st.subheader("High Risk Posts (top 50)")
+    st.dataframe(top_high)
+
+    rc = pd.DataFrame(list(summary["counts"].items()), columns=["risk_category", "count"])
+    render_risk_pie(rc[rc["count"] > 0])
+
+    keyword = st.text_input("Filter posts by keyword:", key=f"{key_prefix}_keyword")
+    risk_filter = st.multiselect("Select risk categories:", ["High", "Moderate", "Low"], default=["High","Moderate","Low"],
+                                 key=f"{key_prefix}_categories")
+    positions = filter_positions(dataset_key, processed_df, keyword.strip(), tuple(risk_filter))
+    # Only the visible page is materialized and sent to the browser
+    col_size, col_page = st.columns(2)
+    page_size = col_size.selectbox("Rows per page", [50, 100, 500, 1000], index=1, key=f"{key_prefix}_page_size")
+    n_pages = max(1, -(-len(positions) // page_size))
+    page_key = f"{key_prefix}_page"
+    if st.session_state.get(page_key, 1) > n_pages:
+        # A narrower filter or bigger page size can leave the current page past the end
+        st.session_state[page_key] = n_pages
+    page = col_page.number_input(f"Page (1–{n_pages:,})", min_value=1, max_value=n_pages, key=page_key)
+    st.caption(f"{len(positions):,} matching posts")
+    start = (int(page) - 1) * page_size
+    st.dataframe(processed_df.iloc[positions[start:start + page_size]], use_container_width=True)
+    if session is not None:
+        render_session_entities(session, key_prefix)
+
+    # Downloads are served from files written in chunks, not a to_csv() string held in memory
+    col_csv, col_parquet = st.columns(2)
+    csv_path = os.path.join(tempfile.gettempdir(),
+                            f"sentinel_x_{safe_name(dataset_key[0])}_{safe_name(dataset_key[1])}.csv")
+    export_marker = f"csv_export::{csv_path}"
+
+    def write_csv_export():
+        # Reuse the export if made after the stored result was (re)written, or, for results
+        # that were never stored, earlier in this session
+        if result_file is None:
+            current = os.path.exists(csv_path) and st.session_state.get(export_marker, False)
+        else:
+            current = os.path.exists(csv_path) and os.path.getmtime(csv_path) >= os.path.getmtime(result_file)
+        if not current:
+            export_csv(processed_df, csv_path)
+            st.session_state[export_marker] = True
+
+    file_download("Download processed CSV", csv_path, "sentinel_x_processed.csv", "text/csv",
+                  key=f"{key_prefix}_csv", container=col_csv, prepare=write_csv_export)
+    if result_file and result_file.endswith(".arrow"):
+        file_download("Download Arrow (columnar)", result_file, "sentinel_x_processed.arrow",
+                      "application/vnd.apache.arrow.file", key=f"{key_prefix}_arrow", container=col_parquet)
 
 # ----------------------------
 # UI - Header & Sidebar
@@ -158,6 +331,49 @@ uploaded_file = st.sidebar.file_uploader(
     type=["csv", "png", "jpg", "jpeg", "mp4", "mov"]
 )
 text_column = st.sidebar.text_input("Text Column Name (for CSV)", value="text")
+streaming_mode = st.sidebar.checkbox(
+    "Streaming mode (large CSVs)", value=False,
+    help="Read, score and write the CSV in chunks. Keeps memory bounded; the dashboard shows aggregates only."
+)
+stream_chunksize = st.sidebar.number_input(
+    "Rows per chunk", min_value=1000, value=DEFAULT_STREAM_CHUNKSIZE, step=1000, disabled=not streaming_mode
+)
+session_name = st.sidebar.text_input(
+    "Analysis session (optional)", value="",
+    help="Re-uploads of a growing feed under the same session only score new or changed rows."
+)
+
+saved_results = saved_result_list()
+reopen_choice = st.sidebar.selectbox(
+    "Reopen a processed result", options=[None] + saved_results,
+    format_func=lambda r: "—" if r is None else f"{r['name']} ({r['rows']:,} rows)",
+    help="Loads a previously processed result instead of re-reading and re-scoring the CSV."
+)
+
+with st.sidebar.expander("Video OCR settings"):
+    video_frame_interval = st.number_input("Sample every N-th frame", min_value=1, value=DEFAULT_FRAME_INTERVAL)
+    video_max_frames = st.number_input("Max frames to OCR", min_value=1, value=DEFAULT_MAX_FRAMES)
+    video_workers = st.number_input("OCR workers", min_value=1, max_value=16, value=DEFAULT_OCR_WORKERS)
+    video_hash_threshold = st.slider(
+        "Scene-change threshold (bits)", min_value=-1, max_value=32, value=DEFAULT_HASH_THRESHOLD,
+        help="Frames whose perceptual hash differs from the last OCR'd frame by at most this many bits are skipped. -1 OCRs every sampled frame."
+    )
+
+with st.sidebar.expander("Batch upload (background)"):
+    batch_files = st.file_uploader(
+        "Queue several CSVs, images or videos", type=["csv", "png", "jpg", "jpeg", "mp4", "mov"],
+        accept_multiple_files=True, key="batch_files"
+    )
+    if st.button("Process in background", disabled=not batch_files):
+        job_queue = get_job_queue()
+        batch_jobs = st.session_state.setdefault("batch_jobs", [])
+        for batch_file in batch_files:
+            batch_jobs.append(job_queue.submit(
+                batch_file.name, batch_file.getvalue(), text_column=text_column,
+                frame_interval=int(video_frame_interval), max_frames=int(video_max_frames),
+                workers=int(video_workers), hash_threshold=int(video_hash_threshold),
+            ))
+        st.success(f"Queued {len(batch_files)} file(s).")
 
 with st.sidebar.expander("Optional tools status (OCR / Video)"):
     st.write(f"EasyOCR installed: {'Yes' if EASYOCR_AVAILABLE else 'No'}")
@@ -165,113 +381,218 @@ with st.sidebar.expander("Optional tools status (OCR / Video)"):
     st.write(f"Pytesseract installed: {'Yes' if PYTESSERACT_AVAILABLE else 'No'}")
     st.markdown("Install EasyOCR, OpenCV, and pytesseract in `requirements.txt` for full functionality.")
 
+with st.sidebar.expander("Performance"):
+    profile_next_run = st.checkbox("Profile this run (cProfile)", value=False,
+                                   help="Writes a .prof file you can open with snakeviz or pstats.")
+    if st.button("Reset timings"):
+        recorder.reset()
+
 # ----------------------------
-# Main logic
+# Optional profiling of this script run
 # ----------------------------
-if uploaded_file is None:
-    st.info("Upload a CSV, image, or video to start analysis.")
-else:
-    file_type = uploaded_file.type or uploaded_file.name.split('.')[-1].lower()
-    st.write(f"Uploaded file: **{uploaded_file.name}** — detected type: **{file_type}**")
-
-    # ---------- CSV ----------
-    if "csv" in file_type or uploaded_file.name.lower().endswith(".csv"):
+run_profiler = ExitStack()
+profile_file = None
+try:
+    if profile_next_run:
+        # One directory per browser session, so concurrent sessions never overwrite or serve each other's profile
+        if "profile_dir" not in st.session_state:
+            st.session_state["profile_dir"] = tempfile.mkdtemp(prefix="sentinel_x_profile_")
+        profile_file = run_profiler.enter_context(
+            profile_run(os.path.join(st.session_state["profile_dir"], "last_run.prof"))
+        )
+
+    # ----------------------------
+    # Main logic
+    # ----------------------------
+    if uploaded_file is None and reopen_choice is not None:
         try:
-            uploaded_file.seek(0)
-            df = try_read_csv(uploaded_file)
-            st.success(f"CSV loaded: {df.shape[0]} rows, {df.shape[1]} columns")
-            if text_column not in df.columns:
-                alt_cols = ["clean_text", "text", "tweet", "summary", "body"]
-                found = next((c for c in alt_cols if c in df.columns), None)
-                if found:
-                    st.warning(f"Column '{text_column}' not found. Using '{found}' instead.")
-                    text_column = found
-                else:
-                    st.error(f"Column '{text_column}' not found. Adjust sidebar input.")
-                    st.stop()
-
-            if "clean_text" not in df.columns:
-                df["clean_text"] = df[text_column].astype(str).str.replace(r"http\S+|www\S+|https\S+", "", regex=True)
-                df["clean_text"] = df["clean_text"].str.replace(r'\W', ' ', regex=True).str.lower().str.strip()
-
-            with st.spinner("Running NLP risk analysis..."):
-                processed_df = process_dataframe(df, text_column="clean_text")
-            st.success("NLP analysis complete.")
-
-            total = len(processed_df)
-            high_count = len(processed_df[processed_df["risk_category"] == "High"])
-            moderate_count = len(processed_df[processed_df["risk_category"] == "Moderate"])
-            col1, col2, col3 = st.columns(3)
-            col1.metric("Total Posts", total)
-            col2.metric("High Risk", high_count)
-            col3.metric("Moderate Risk", moderate_count)
-
-            st.subheader("High Risk Posts (top 50)")
-            high_df = processed_df[processed_df["risk_category"] == "High"].sort_values("risk_score", ascending=False)
-            st.dataframe(high_df.head(50))
-
-            rc = processed_df["risk_category"].value_counts().reset_index()
-            rc.columns = ["risk_category", "count"]
-            pie = alt.Chart(rc).mark_arc(innerRadius=50).encode(
-                theta=alt.Theta(field="count", type="quantitative"),
-                color=alt.Color(field="risk_category", type="nominal"),
-                tooltip=["risk_category", "count"]
-            ).properties(width=400, height=400)
-            st.altair_chart(pie, use_container_width=True)
-
-            keyword = st.text_input("Filter posts by keyword:")
-            risk_filter = st.multiselect("Select risk categories:", ["High", "Moderate", "Low"], default=["High","Moderate","Low"])
-            filtered = processed_df[processed_df["risk_category"].isin(risk_filter)]
-            if keyword:
-                filtered = filtered[filtered["clean_text"].str.contains(keyword, case=False, na=False)]
-            st.dataframe(filtered)
-            st.download_button("Download processed CSV", data=processed_df.to_csv(index=False).encode("utf-8"), file_name="sentinel_x_processed.csv", mime="text/csv")
+            reopened_df = get_result_frame(reopen_choice["path"])
+            st.success(f"Reopened **{reopen_choice['name']}**: {len(reopened_df):,} rows (not re-scored).")
+            dataset_key = tuple(os.path.splitext(os.path.basename(reopen_choice["path"]))[0].split("__", 1))
+            render_csv_results(reopened_df, dataset_key, reopen_choice["path"])
         except Exception as e:
-            st.error(f"CSV processing failed: {e}")
+            st.error(f"Could not reopen result: {e}")
+    elif uploaded_file is None:
+        st.info("Upload a CSV, image, or video to start analysis.")
+    else:
+        file_type = uploaded_file.type or uploaded_file.name.split('.')[-1].lower()
+        st.write(f"Uploaded file: **{uploaded_file.name}** — detected type: **{file_type}**")
 
-    # ---------- IMAGE ----------
-    elif any(t in file_type for t in ["image", "png", "jpg", "jpeg"]):
-        st.image(uploaded_file, caption="Uploaded Image", use_column_width=True)
-        st.info("Extracting text from image...")
+        # ---------- CSV ----------
+        if ("csv" in file_type or uploaded_file.name.lower().endswith(".csv")) and streaming_mode:
+            try:
+                run_streaming_csv(uploaded_file, text_column, int(stream_chunksize))
+            except Exception as e:
+                st.error(f"Streaming CSV processing failed: {e}")
 
-        try:
-            extracted_text = extract_text_from_image(uploaded_file)
-            if not extracted_text:
-                st.warning("⚠️ No text extracted. Install EasyOCR or pytesseract for better OCR.")
+        elif "csv" in file_type or uploaded_file.name.lower().endswith(".csv"):
+            try:
+                file_hash = upload_hash(uploaded_file)
+                session = get_session(session_name.strip()) if session_name.strip() else None
+                # Session runs get their own result key: their rows carry session-stored scores, not a plain run's
+                result_key = f"{file_hash}-session-{safe_name(session.name)}" if session else file_hash
+                result_file = result_path(result_key, text_column)
+                # Widget reruns reuse this upload's stored result (also covers a resolved column or a session run)
+                processed_key = f"processed::{result_key}::{text_column}"
+                previous = st.session_state.get(processed_key)
+                if previous and os.path.exists(previous[1]):
+                    dataset_key, result_file = previous
+                    processed_df = get_result_frame(result_file)
+                elif os.path.exists(result_file) and session is None:
+                    # Same file + column analysed before: reopen the columnar result, no CSV parse or scoring
+                    processed_df = get_result_frame(result_file)
+                    dataset_key = (result_key, text_column)
+                    st.success(f"Reopened previously processed result: {len(processed_df):,} rows (not re-scored).")
+                else:
+                    uploaded_file.seek(0)
+                    df = try_read_csv(uploaded_file, text_column)
+                    st.success(f"CSV loaded: {df.shape[0]} rows, {df.shape[1]} columns")
+                    skipped = [str(c) for c in read_header(uploaded_file) if c not in df.columns]
+                    if skipped:
+                        # read_csv_fast only loads the text column, its alternates and metadata columns
+                        st.caption(f"{len(skipped)} other column(s) not loaded: {', '.join(skipped[:20])}"
+                                   + (", …" if len(skipped) > 20 else ""))
+                    if text_column not in df.columns:
+                        found = resolve_text_column(df.columns, text_column)
+                        if found:
+                            st.warning(f"Column '{text_column}' not found. Using '{found}' instead.")
+                            text_column = found
+                        else:
+                            st.error(f"Column '{text_column}' not found. Adjust sidebar input.")
+                            st.stop()
+
+                    if "clean_text" not in df.columns:
+                        add_clean_text(df, text_column)
+
+                    dataset_key = (result_key, text_column)
+                    with st.spinner("Running NLP risk analysis..."):
+                        if session is not None:
+                            processed_df, delta = session.update(df, text_column=text_column)
+                            st.info(
+                                f"Session '{session.name}': {delta['new']} new, {delta['changed']} changed, "
+                                f"{delta['unchanged']} reused rows ({len(session)} rows stored)."
+                            )
+                        else:
+                            processed_df = process_dataframe(df, text_column="clean_text")
+                    st.success("NLP analysis complete.")
+                    try:
+                        result_file = store_results(processed_df, *dataset_key, name=uploaded_file.name)
+                        saved_result_list.clear()
+                        st.session_state[processed_key] = (dataset_key, result_file)
+                        processed_df = get_result_frame(result_file)
+                    except Exception as e:
+                        result_file = None
+                        st.caption(f"Result not saved for reopening: {e}")
+                cache_stats = risk_cache_stats()
+                st.caption(
+                    f"Score cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+                    f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)"
+                )
+
+                render_csv_results(processed_df, dataset_key, result_file, session=session)
+            except Exception as e:
+                st.error(f"CSV processing failed: {e}")
+
+        # ---------- IMAGE ----------
+        elif any(t in file_type for t in ["image", "png", "jpg", "jpeg"]):
+            st.image(uploaded_file, caption="Uploaded Image", use_column_width=True)
+            st.info("Extracting text from image...")
+
+            try:
+                extracted_text = extract_text_from_image(uploaded_file)
+                if not extracted_text:
+                    st.warning("⚠️ No text extracted. Install EasyOCR or pytesseract for better OCR.")
+                else:
+                    st.success("✅ Text extracted successfully.")
+                    st.write(extracted_text[:1000])
+                    df_img = pd.DataFrame({"clean_text":[extracted_text]})
+                    with st.spinner("Running NLP analysis on image text..."):
+                        processed_img_df = process_dataframe(df_img, text_column="clean_text")
+                    st.success("Image NLP analysis complete.")
+                    st.dataframe(processed_img_df)
+            except Exception as e:
+                st.error(f"Image processing failed: {e}")
+
+        # ---------- VIDEO ----------
+        elif any(t in file_type for t in ["video", "mp4", "mov"]):
+            st.video(uploaded_file)
+            st.info("Extracting text from video frames (may be slow)...")
+            if not CV2_AVAILABLE or not (EASYOCR_AVAILABLE or PYTESSERACT_AVAILABLE):
+                st.error("Video OCR unavailable. Install OpenCV + EasyOCR or pytesseract.")
             else:
-                st.success("✅ Text extracted successfully.")
-                st.write(extracted_text[:1000])
-                df_img = pd.DataFrame({"clean_text":[extracted_text]})
-                with st.spinner("Running NLP analysis on image text..."):
-                    processed_img_df = process_dataframe(df_img, text_column="clean_text")
-                st.success("Image NLP analysis complete.")
-                st.dataframe(processed_img_df)
-        except Exception as e:
-            st.error(f"Image processing failed: {e}")
-
-    # ---------- VIDEO ----------
-    elif any(t in file_type for t in ["video", "mp4", "mov"]):
-        st.video(uploaded_file)
-        st.info("Extracting text from video frames (may be slow)...")
-        if not CV2_AVAILABLE or not (EASYOCR_AVAILABLE or PYTESSERACT_AVAILABLE):
-            st.error("Video OCR unavailable. Install OpenCV + EasyOCR or pytesseract.")
+                with st.spinner("Processing video frames..."):
+                    uploaded_file.seek(0)
+                    text_from_video, status, video_segments = extract_text_from_video(
+                        uploaded_file, frame_interval=int(video_frame_interval), max_frames=int(video_max_frames),
+                        workers=int(video_workers), hash_threshold=int(video_hash_threshold)
+                    )
+                if status == "cv2_not_installed":
+                    st.error("OpenCV not installed; cannot process video.")
+                elif status.startswith("error"):
+                    st.error(f"Video processing failed ({status[len('error: '):]}).")
+                elif not text_from_video:
+                    st.warning("No text found or OCR unavailable.")
+                else:
+                    st.write(text_from_video[:2000])
+                    st.dataframe(pd.DataFrame(video_segments), use_container_width=True)
+                    df_vid = pd.DataFrame({"clean_text":[text_from_video]})
+                    with st.spinner("Running NLP on video-extracted text..."):
+                        processed_vid_df = process_dataframe(df_vid, text_column="clean_text")
+                    st.success("Video NLP analysis complete.")
+                    st.dataframe(processed_vid_df)
         else:
-            with st.spinner("Processing video frames..."):
-                uploaded_file.seek(0)
-                text_from_video, status = extract_text_from_video(uploaded_file, frame_interval=30, max_frames=60)
-            if status == "cv2_not_installed":
-                st.error("OpenCV not installed; cannot process video.")
-            elif not text_from_video:
-                st.warning("No text found or OCR unavailable.")
-            else:
-                st.write(text_from_video[:2000])
-                df_vid = pd.DataFrame({"clean_text":[text_from_video]})
-                with st.spinner("Running NLP on video-extracted text..."):
-                    processed_vid_df = process_dataframe(df_vid, text_column="clean_text")
-                st.success("Video NLP analysis complete.")
-                st.dataframe(processed_vid_df)
+            st.warning("Unsupported file type. Upload CSV, image, or video.")
+
+    # ----------------------------
+    # Batch jobs (background queue)
+    # ----------------------------
+    batch_job_ids = st.session_state.get("batch_jobs", [])
+    if batch_job_ids:
+        st.markdown("---")
+        st.subheader("Batch jobs")
+        job_queue = get_job_queue()
+        batch_pending = job_queue.pending(batch_job_ids)
+        if batch_pending:
+            st.session_state["batch_was_pending"] = True
+        if hasattr(st, "fragment"):
+            # Only the progress block re-runs while jobs are in flight
+            st.fragment(run_every=2 if batch_pending else None)(render_batch_progress)(batch_job_ids)
+        else:
+            render_batch_progress(batch_job_ids)
+            if batch_pending:
+                st.button("Refresh progress")
+        finished = tuple(j["id"] for j in job_queue.jobs(batch_job_ids) if j["status"] == "done")
+        if finished:
+            st.subheader(f"Combined results ({len(finished)} file(s))")
+            combined_df = get_combined_results(finished)
+            combined_key = ("batch", hashlib.md5(",".join(finished).encode("utf-8")).hexdigest()[:12])
+            render_csv_results(combined_df, combined_key, key_prefix="batch")
+finally:
+    # st.stop() raises out of the script, so close here or the profiler stays enabled
+    run_profiler.close()
+
+# ----------------------------
+# Performance panel
+# ----------------------------
+with st.expander("Performance (per-stage timings)"):
+    st.caption("Timings are shared by all sessions in this server process.")
+    perf = recorder.snapshot()
+    if perf["stages"]:
+        perf_df = pd.DataFrame.from_dict(perf["stages"], orient="index")
+        perf_df = perf_df[["count", "total_s", "mean_ms", "max_s", "rows", "rows_per_s"]]
+        st.dataframe(perf_df.sort_values("total_s", ascending=False), use_container_width=True)
     else:
-        st.warning("Unsupported file type. Upload CSV, image, or video.")
+        st.caption("No stages recorded yet.")
+    if perf["peak_rss_mb"] is not None:
+        st.caption(f"Peak RSS: {perf['peak_rss_mb']:.0f} MB")
+    if perf["values"]:
+        st.json(perf["values"])
+    st.download_button("Download timings (JSON)", data=recorder.to_json(),
+                       file_name="sentinel_x_timings.json", mime="application/json")
+    if profile_file and os.path.exists(profile_file):
+        with open(profile_file, "rb") as f:
+            st.download_button("Download profile (.prof)", data=f.read(),
+                               file_name="sentinel_x_run.prof", mime="application/octet-stream")
 
 # ----------------------------
 st.markdown("---")
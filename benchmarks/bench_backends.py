@@ -0,0 +1,84 @@
+# benchmarks/bench_backends.py
+"""
+Throughput/latency of each risk backend, plus an agreement check against fp32.
+
+Scores from every non-reference backend must stay within --tolerance of the fp32
+transformers pipeline on every row; the script exits non-zero otherwise, so it
+doubles as the agreement gate for quantized/ONNX backends.
+
+    python -m benchmarks.bench_backends --rows 2000 --threads 4
+    python -m benchmarks.bench_backends --backends transformers onnx-int8 --tolerance 0.05
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+from nlp_engine import categorize_risk
+from risk_backends import BACKENDS, make_backend
+
+
+def _run(backend, texts, batch_size):
+    """Score `texts` batch by batch; returns (scores, per-batch latencies in seconds)."""
+    scores, latencies = [], []
+    for start in range(0, len(texts), batch_size):
+        t0 = time.perf_counter()
+        scores.extend(backend.predict(texts[start:start + batch_size], batch_size=batch_size))
+        latencies.append(time.perf_counter() - t0)
+    return scores, latencies
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default="data/hate_speech.csv")
+    parser.add_argument("--column", default="tweet")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads for every backend")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--tolerance", type=float, default=0.05, help="Max |score - fp32 score| allowed")
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.csv)[args.column].astype(str).head(args.rows).tolist()
+    print(f"{len(texts)} rows from {args.csv}:{args.column}, batch={args.batch_size}, threads={args.threads}")
+
+    names = ["transformers"] + [b for b in args.backends if b != "transformers"]
+    reference = None
+    failed = False
+    print(f"{'backend':>14} {'rows/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'max|diff|':>10} {'category agree':>15}")
+    for name in names:
+        try:
+            backend = make_backend(name, intra_op_threads=args.threads).load()
+            backend.predict(texts[:args.batch_size], batch_size=args.batch_size)  # warm-up
+        except Exception as e:
+            print(f"{name:>14} unavailable: {e}")
+            continue
+
+        t0 = time.perf_counter()
+        scores, latencies = _run(backend, texts, args.batch_size)
+        rate = len(texts) / (time.perf_counter() - t0)
+
+        if reference is None:
+            reference = scores
+            diff, agree = 0.0, 1.0
+        else:
+            diff = max(abs(a - b) for a, b in zip(reference, scores))
+            agree = statistics.mean(categorize_risk(a) == categorize_risk(b) for a, b in zip(reference, scores))
+            failed |= diff > args.tolerance
+        print(f"{name:>14} {rate:9.1f} {1000 * _percentile(latencies, 50):8.1f} "
+              f"{1000 * _percentile(latencies, 95):8.1f} {diff:10.4f} {agree:15.2%}")
+
+    if failed:
+        print(f"FAIL: at least one backend deviates from fp32 by more than {args.tolerance}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
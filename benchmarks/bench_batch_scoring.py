@@ -0,0 +1,62 @@
+# benchmarks/bench_batch_scoring.py
+"""
+Rows/sec of batched risk scoring vs. the original per-row loop.
+
+Run from the repo root:
+    python -m benchmarks.bench_batch_scoring --rows 2000 --batch-sizes 8 32 64
+"""
+import argparse
+import time
+
+import pandas as pd
+
+import nlp_engine
+
+
+def per_row_scores(texts):
+    """The original calculate_risk loop: one forward pass per row, char-sliced."""
+    risk_pipeline = nlp_engine.get_risk_pipeline()
+    scores = []
+    for text in texts:
+        try:
+            scores.append(nlp_engine._to_risk(risk_pipeline(text[:512])[0]))
+        except Exception:
+            scores.append(0.0)
+    return scores
+
+
+def _timed(fn, texts):
+    start = time.perf_counter()
+    scores = fn(texts)
+    elapsed = time.perf_counter() - start
+    return scores, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default="data/hate_speech.csv")
+    parser.add_argument("--column", default="tweet")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--num-workers", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.csv)[args.column].astype(str).head(args.rows).tolist()
+    print(f"{len(texts)} rows from {args.csv}:{args.column}")
+    nlp_engine.warm_up(background=False)  # keep model load out of the timings
+
+    baseline, elapsed = _timed(per_row_scores, texts)
+    base_rate = len(texts) / elapsed
+    print(f"{'per-row loop':>16}: {base_rate:8.1f} rows/s")
+
+    for bs in args.batch_sizes:
+        scores, elapsed = _timed(
+            lambda t: nlp_engine.score_texts(t, batch_size=bs, num_workers=args.num_workers, use_cache=False), texts
+        )
+        rate = len(texts) / elapsed
+        max_diff = max((abs(a - b) for a, b in zip(baseline, scores)), default=0.0)
+        print(f"{f'batch={bs}':>16}: {rate:8.1f} rows/s  ({rate / base_rate:4.1f}x, max |diff|={max_diff:.4f})")
+
+
+if __name__ == "__main__":
+    main()
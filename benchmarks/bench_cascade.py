@@ -0,0 +1,82 @@
+# benchmarks/bench_cascade.py
+"""
+Cascade savings vs. agreement with the full risk model on data/hate_speech.csv.
+
+For each first-stage prefilter and lower band threshold, reports the share of rows
+decided without the model, category agreement with the full model, and how many of
+the full model's High rows the cascade still labels High. The hashed linear
+prefilter is fitted to the model's scores on the first half and evaluated on the
+second; --save-model stores it where nlp_engine's "hashed" prefilter loads it.
+
+    python -m benchmarks.bench_cascade --rows 5000 --lows 0.1 0.25 0.5 --save-model
+    python -m benchmarks.bench_cascade --backend standin   # offline
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import nlp_engine
+from prefilter import PREFILTER_MODEL_PATH, HashedLinearPrefilter, LexiconPrefilter
+from text_cleaning import clean_series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default="data/hate_speech.csv")
+    parser.add_argument("--column", default="tweet")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--backend", default=None, help="Risk backend ('standin' runs offline)")
+    parser.add_argument("--lows", type=float, nargs="+", default=[0.1, 0.25, 0.4, 0.5])
+    parser.add_argument("--high", type=float, default=None)
+    parser.add_argument("--save-model", nargs="?", const=PREFILTER_MODEL_PATH, default=None,
+                        help="Save the fitted hashed prefilter (default path if no value given; "
+                             "--backend standin needs an explicit, non-default path)")
+    args = parser.parse_args()
+    if (args.backend == "standin" and args.save_model
+            and os.path.abspath(args.save_model) == os.path.abspath(PREFILTER_MODEL_PATH)):
+        # A prefilter distilled from the stand-in model must never replace the production one
+        parser.error("--backend standin: pass an explicit --save-model PATH other than the production "
+                     f"prefilter path ({PREFILTER_MODEL_PATH})")
+
+    if args.backend == "standin":
+        from benchmarks.standin_model import register
+        register()
+
+    texts = clean_series(pd.read_csv(args.csv, usecols=[args.column])[args.column].head(args.rows)).tolist()
+    half = len(texts) // 2
+    t0 = time.perf_counter()
+    full = np.asarray(nlp_engine.score_texts(texts, use_cache=False, backend=args.backend))
+    model_s = time.perf_counter() - t0
+    print(f"{len(texts)} rows; full model {len(texts) / model_s:.1f} rows/s")
+    full_cat = np.array([nlp_engine.categorize_risk(s) for s in full])
+
+    hashed = HashedLinearPrefilter().fit(texts[:half], full[:half])
+    if args.save_model:
+        print(f"saved hashed prefilter to {hashed.save(args.save_model)}")
+    eval_texts, eval_full, eval_cat = texts[half:], full[half:], full_cat[half:]
+    high_rows = eval_cat == "High"
+
+    print(f"evaluated on {len(eval_texts)} held-out rows ({high_rows.sum()} High by the full model)")
+    print(f"{'prefilter':>10} {'low':>5} {'decided early':>14} {'agreement':>10} {'High kept':>10} {'prefilter rows/s':>17}")
+    for prefilter in (LexiconPrefilter(), hashed):
+        t0 = time.perf_counter()
+        cheap = prefilter.score(eval_texts)
+        rate = len(eval_texts) / (time.perf_counter() - t0)
+        for low in args.lows:
+            escalate = cheap >= low
+            if args.high is not None:
+                escalate &= cheap < args.high
+            # Escalated rows get exactly the full model's score, so reuse it instead of re-scoring
+            scores = np.where(escalate, eval_full, cheap)
+            cat = np.array([nlp_engine.categorize_risk(s) for s in scores])
+            agreement = (cat == eval_cat).mean()
+            kept = (cat[high_rows] == "High").mean() if high_rows.any() else float("nan")
+            print(f"{prefilter.name:>10} {low:5.2f} {1 - escalate.mean():14.1%} {agreement:10.1%} {kept:10.1%} "
+                  f"{rate:17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_cleaning.py
+"""
+Text cleaning: original `.apply(clean_text)` with uncompiled re.sub vs. the vectorized
+text_cleaning.clean_series (object dtype and PyArrow string dtype).
+
+    python -m benchmarks.bench_cleaning --scale 10
+"""
+import argparse
+import re
+import time
+
+import pandas as pd
+
+from text_cleaning import PYARROW_AVAILABLE, clean_series
+
+
+def legacy_clean_text(text):
+    """data_loader.clean_text as it was: per-row, patterns looked up per call."""
+    text = re.sub(r"http\S+|www\S+|https\S+", '', text)
+    text = re.sub(r'\W', ' ', text)
+    return text.lower().strip()
+
+
+def _best(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default="data/hate_speech.csv")
+    parser.add_argument("--column", default="tweet")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat the column N times")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    series = pd.concat([pd.read_csv(args.csv)[args.column]] * args.scale, ignore_index=True)
+    print(f"{len(series):,} rows from {args.csv}:{args.column} (x{args.scale})")
+
+    base_t, base = _best(lambda: series.astype(str).apply(legacy_clean_text), args.repeat)
+    print(f"{'apply(clean_text)':>22}: {len(series) / base_t:12,.0f} rows/s")
+
+    variants = [("clean_series", False)]
+    if PYARROW_AVAILABLE:
+        variants.append(("clean_series[pyarrow]", True))
+    for label, use_arrow in variants:
+        t, out = _best(lambda: clean_series(series, use_arrow=use_arrow), args.repeat)
+        mismatches = int((out.astype(object) != base).sum())
+        print(f"{label:>22}: {len(series) / t:12,.0f} rows/s  ({base_t / t:4.1f}x, {mismatches} mismatched rows)")
+
+
+if __name__ == "__main__":
+    main()
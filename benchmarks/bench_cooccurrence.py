@@ -0,0 +1,67 @@
+# benchmarks/bench_cooccurrence.py
+"""
+Scaling of entity co-occurrence: the original nested-loop substring counting vs. the
+sparse incidence-matrix engine, over synthetic posts (Zipf-distributed vocabulary).
+
+    python -m benchmarks.bench_cooccurrence --posts 10000 100000 --entities 15 100 500
+"""
+import argparse
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from cooccurrence import cooccurrence_edges
+from search_index import InvertedIndex
+
+
+def synthetic_posts(n_posts, vocab_size=5000, words_per_post=15, seed=0):
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"w{i}" for i in range(vocab_size)])
+    ids = np.minimum(rng.zipf(1.3, size=(n_posts, words_per_post)), vocab_size) - 1
+    return pd.Series([" ".join(row) for row in vocab[ids]])
+
+
+def legacy_cooccurrence(texts, entities, min_cooccur):
+    """build_relationships as it was (minus the substring semantics, which can't be sped up)."""
+    cooccur = defaultdict(lambda: defaultdict(int))
+    for text in texts:
+        present = [ent for ent in entities if ent in text.lower()]
+        for i in range(len(present)):
+            for j in range(i + 1, len(present)):
+                cooccur[present[i]][present[j]] += 1
+    return [(s, d, w) for s in cooccur for d, w in cooccur[s].items() if w >= min_cooccur]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--entities", type=int, nargs="+", default=[15, 100, 500])
+    parser.add_argument("--min-cooccur", type=int, default=2)
+    parser.add_argument("--legacy-max-work", type=float, default=2e7,
+                        help="Skip the legacy loop when posts x entities exceeds this")
+    args = parser.parse_args()
+
+    print(f"{'posts':>9} {'entities':>9} {'index s':>8} {'sparse s':>9} {'legacy s':>9} {'edges':>8}")
+    for n_posts in args.posts:
+        texts = synthetic_posts(n_posts)
+        t0 = time.perf_counter()
+        index = InvertedIndex.from_series(texts)
+        index_s = time.perf_counter() - t0
+        for n_ent in args.entities:
+            entities = [f"w{i}" for i in range(n_ent)]
+            t0 = time.perf_counter()
+            edges = cooccurrence_edges(index, entities, min_cooccur=args.min_cooccur)
+            sparse_s = time.perf_counter() - t0
+            if n_posts * n_ent <= args.legacy_max_work:
+                t0 = time.perf_counter()
+                legacy_cooccurrence(texts, entities, args.min_cooccur)
+                legacy = f"{time.perf_counter() - t0:9.3f}"
+            else:
+                legacy = f"{'skipped':>9}"
+            print(f"{n_posts:>9} {n_ent:>9} {index_s:8.3f} {sparse_s:9.3f} {legacy} {len(edges):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_entities.py
+"""
+Entity extraction: the original per-post word_tokenize + pos_tag loop vs. the
+extract_entities modes ('pos', 'vocab', 'frequency'), serial and multi-process.
+
+    python -m benchmarks.bench_entities --rows 5000 --jobs 1 4
+"""
+import argparse
+import re
+import time
+from collections import Counter
+
+import pandas as pd
+
+import graph_engine
+from data_loader import clean_series
+
+
+def legacy_extract_entities(texts, top_n):
+    """extract_entities as it was."""
+    from nltk import pos_tag, word_tokenize
+    all_nouns = []
+    for text in texts:
+        all_nouns.extend(word.lower() for word, pos in pos_tag(word_tokenize(text)) if pos.startswith('NN'))
+    filtered = [n for n in all_nouns
+                if n not in graph_engine.STOP_WORDS and len(n) > 2 and re.match(r'^[a-zA-Z]+$', n)]
+    return [w for w, _ in Counter(filtered).most_common(top_n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default="data/hate_speech.csv")
+    parser.add_argument("--column", default="tweet")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--top-n", type=int, default=15)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv).head(args.rows)
+    df["clean_text"] = clean_series(df[args.column])
+    texts = df["clean_text"].tolist()
+    graph_engine.ensure_nltk_data()
+    print(f"{len(df)} rows from {args.csv}:{args.column}, top_n={args.top_n}")
+
+    reference = None
+    if not args.skip_legacy:
+        t0 = time.perf_counter()
+        reference = legacy_extract_entities(texts, args.top_n)
+        elapsed = time.perf_counter() - t0
+        print(f"{'legacy pos_tag':>22}: {len(df) / elapsed:10.0f} rows/s")
+
+    for mode in graph_engine.ENTITY_MODES:
+        for n_jobs in args.jobs:
+            t0 = time.perf_counter()
+            top = graph_engine.extract_entities(df, top_n=args.top_n, mode=mode, n_jobs=n_jobs)
+            elapsed = time.perf_counter() - t0
+            reference = reference or top
+            overlap = len(set(top) & set(reference)) / max(1, len(reference))
+            print(f"{f'{mode} (jobs={n_jobs})':>22}: {len(df) / elapsed:10.0f} rows/s  "
+                  f"top-{args.top_n} overlap with legacy {overlap:.0%}")
+
+
+if __name__ == "__main__":
+    main()
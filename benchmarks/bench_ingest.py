@@ -0,0 +1,78 @@
+# benchmarks/bench_ingest.py
+"""
+Load time and memory of CSV ingestion: the old try_read_csv encoding loop vs. csv_ingest.read_csv_fast.
+
+The dataset is scaled up and also written as cp1252, where the old path pays for a
+failed UTF-8 parse before the one that succeeds.
+
+    python -m benchmarks.bench_ingest --scale 10
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from csv_ingest import read_csv_fast
+from instrumentation import peak_rss_mb
+
+
+def legacy_read_csv(data):
+    """app.try_read_csv as it was (minus the final error_bad_lines fallback, which pandas 2 rejects)."""
+    for enc in ["utf-8", "iso-8859-1", "cp1252"]:
+        try:
+            return pd.read_csv(io.BytesIO(data), encoding=enc)
+        except Exception:
+            continue
+    return pd.read_csv(io.BytesIO(data), engine="python", on_bad_lines="skip")
+
+
+def _load(path, name, column):
+    """Runs in a fresh process so peak RSS (which also counts Arrow's allocator) belongs to one path."""
+    with open(path, "rb") as f:
+        data = f.read()
+    base_rss = peak_rss_mb()
+    t0 = time.perf_counter()
+    if name == "legacy":
+        df = legacy_read_csv(data)
+    else:
+        df = read_csv_fast(data, text_column=column)
+    elapsed = time.perf_counter() - t0
+    return elapsed, peak_rss_mb() - base_rss, df.memory_usage(deep=True).sum() / 2 ** 20, df.shape
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default="data/hate_speech.csv")
+    parser.add_argument("--column", default="tweet")
+    parser.add_argument("--scale", type=int, default=10)
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.csv)
+    df = pd.concat([base] * args.scale, ignore_index=True)
+    # Force one non-UTF-8 byte into the cp1252 copy so the old loop's first parse fails
+    df.loc[len(df) // 2, args.column] = str(df.loc[len(df) // 2, args.column]) + " café"
+    variants = {
+        "utf-8": df.to_csv(index=False).encode("utf-8"),
+        "cp1252": df.to_csv(index=False).encode("cp1252", errors="replace"),
+    }
+    print(f"{len(df):,} rows x {df.shape[1]} columns")
+    print(f"{'encoding':>8} {'path':>10} {'load s':>8} {'+RSS MB':>9} {'frame MB':>9}  shape")
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        for enc, data in variants.items():
+            path = os.path.join(tmp, f"{enc}.csv")
+            with open(path, "wb") as f:
+                f.write(data)
+            for name in ("legacy", "single"):
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    elapsed, rss, frame, shape = pool.submit(_load, path, name, args.column).result()
+                print(f"{enc:>8} {name:>10} {elapsed:8.2f} {rss:9.1f} {frame:9.1f}  {shape}")
+
+
+if __name__ == "__main__":
+    main()
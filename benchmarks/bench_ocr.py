@@ -0,0 +1,83 @@
+# benchmarks/bench_ocr.py
+"""
+Images/sec of OCR: the original per-call easyocr.Reader + temp PNG path vs. the pooled
+ocr_engine (in-memory arrays), on generated text images.
+
+    python -m benchmarks.bench_ocr --images 20
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+import ocr_engine
+
+SAMPLE_LINES = [
+    "breaking news from the border region",
+    "meeting at the usual place tonight",
+    "share this before it gets deleted",
+    "rt follow for more updates",
+]
+
+
+def make_images(n, size=(640, 160)):
+    """Black-on-white text images as PNG bytes."""
+    images = []
+    for i in range(n):
+        im = Image.new("RGB", size, "white")
+        ImageDraw.Draw(im).text((10, 60), SAMPLE_LINES[i % len(SAMPLE_LINES)], fill="black")
+        buf = io.BytesIO()
+        im.save(buf, format="PNG")
+        images.append(buf.getvalue())
+    return images
+
+
+def legacy_easyocr(image_bytes):
+    """app.ocr_image_bytes_with_easyocr as it was: new Reader and a temp file per call."""
+    import easyocr
+    reader = easyocr.Reader(['en'], gpu=False)
+    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tf:
+        tf.write(image_bytes)
+        tmp_path = tf.name
+    try:
+        return " ".join(reader.readtext(tmp_path, detail=0))
+    finally:
+        os.remove(tmp_path)
+
+
+def _rate(fn, images):
+    t0 = time.perf_counter()
+    for im in images:
+        fn(im)
+    return len(images) / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=10)
+    parser.add_argument("--legacy-images", type=int, default=3, help="The legacy path is slow; use fewer")
+    args = parser.parse_args()
+
+    images = make_images(args.images)
+    arrays = [np.asarray(Image.open(io.BytesIO(b))) for b in images]
+
+    if ocr_engine.EASYOCR_AVAILABLE:
+        print(f"{'legacy easyocr':>22}: {_rate(legacy_easyocr, images[:args.legacy_images]):7.2f} images/s")
+        ocr_engine.get_reader_pool().warm()
+        print(f"{'pooled easyocr bytes':>22}: {_rate(ocr_engine.ocr_easyocr, images):7.2f} images/s")
+        print(f"{'pooled easyocr arrays':>22}: {_rate(ocr_engine.ocr_easyocr, arrays):7.2f} images/s")
+        t0 = time.perf_counter()
+        ocr_engine.ocr_easyocr_batch(arrays)
+        print(f"{'pooled easyocr batched':>22}: {len(arrays) / (time.perf_counter() - t0):7.2f} images/s")
+    else:
+        print("EasyOCR not installed; skipping EasyOCR rows")
+    if ocr_engine.PYTESSERACT_AVAILABLE:
+        print(f"{'pytesseract arrays':>22}: {_rate(ocr_engine.ocr_tesseract, arrays):7.2f} images/s")
+
+
+if __name__ == "__main__":
+    main()
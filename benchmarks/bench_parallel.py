@@ -0,0 +1,48 @@
+# benchmarks/bench_parallel.py
+"""
+Scaling of sharded multi-process scoring (num_processes=1..N).
+
+    python -m benchmarks.bench_parallel --rows 8000 --workers 1 2 4 8 16 32
+"""
+import argparse
+import time
+
+import pandas as pd
+
+import nlp_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default="data/hate_speech.csv")
+    parser.add_argument("--column", default="tweet")
+    parser.add_argument("--rows", type=int, default=4000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=nlp_engine.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=nlp_engine.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv).head(args.rows)
+    print(f"{len(df)} rows from {args.csv}:{args.column}, chunk={args.chunk_size}, batch={args.batch_size}")
+
+    baseline_rate = None
+    reference = None
+    for n in args.workers:
+        kwargs = dict(text_column=args.column, batch_size=args.batch_size, use_cache=False,
+                      num_processes=n, chunk_size=args.chunk_size)
+        # Warm the pool (model load per worker) outside the timed run
+        nlp_engine.calculate_risk(df.head(args.chunk_size * n + 1), **kwargs)
+        t0 = time.perf_counter()
+        out = nlp_engine.calculate_risk(df, **kwargs)
+        rate = len(df) / (time.perf_counter() - t0)
+        baseline_rate = baseline_rate or rate
+        if reference is None:
+            reference = out["risk_score"]
+        same = (out["risk_score"].sub(reference).abs().max() < 1e-5)
+        print(f"workers={n:>3}: {rate:8.1f} rows/s  speedup {rate / baseline_rate:5.2f}x  "
+              f"{'matches' if same else 'DIFFERS from'} 1-worker scores")
+    nlp_engine.shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
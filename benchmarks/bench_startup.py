@@ -0,0 +1,80 @@
+# benchmarks/bench_startup.py
+"""
+Startup cost: import time of each module and time-to-first-render of app.py.
+
+Every measurement runs in a fresh interpreter so nothing is already in sys.modules.
+To compare before/after, point --repo at a second checkout (e.g. a `git worktree`
+of an older commit) and run the script once per tree:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repo ../sentinel_x_baseline
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MODULES = ["data_loader", "nlp_engine", "graph_engine"]
+
+_IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import {module}
+print(time.perf_counter() - t0)
+"""
+
+# AppTest renders the script headlessly, the same code path as a first browser visit.
+_RENDER_SNIPPET = """
+import time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=600)
+at.run()
+print(time.perf_counter() - t0)
+"""
+
+
+def _run(snippet, repo):
+    out = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=repo, capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _best_of(snippet, repo, repeat):
+    return min(_run(snippet, repo) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repo", default=os.getcwd(), help="Checkout to measure (default: cwd)")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh-process runs per measurement (best kept)")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    results = {"repo": os.path.abspath(args.repo), "import_s": {}}
+    for module in MODULES:
+        try:
+            results["import_s"][module] = _best_of(_IMPORT_SNIPPET.format(module=module), args.repo, args.repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"import {module} failed:\n{e.stderr}")
+            results["import_s"][module] = None
+    try:
+        results["first_render_s"] = _best_of(_RENDER_SNIPPET, args.repo, args.repeat)
+    except subprocess.CalledProcessError as e:
+        print(f"app.py render failed:\n{e.stderr}")
+        results["first_render_s"] = None
+
+    print(f"Startup timings for {results['repo']}")
+    for module, seconds in results["import_s"].items():
+        print(f"  import {module:<14} {seconds:8.3f}s" if seconds is not None else f"  import {module:<14}   failed")
+    if results["first_render_s"] is not None:
+        print(f"  app.py first render   {results['first_render_s']:8.3f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/run_load.py
+"""
+Local load test for scoring_service: concurrent clients posting texts from
+data/hate_speech.csv, reporting throughput and p50/p95/p99 latency.
+
+Start the service first, then:
+    python scoring_service.py --max-batch-size 64 --max-wait-ms 10 &
+    python -m benchmarks.run_load --concurrency 1 8 32 --duration 20
+"""
+import argparse
+import csv
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))] if values else float("nan")
+
+
+def _client(url, texts, texts_per_request, deadline, offset, latencies, statuses, lock):
+    i = offset
+    while time.monotonic() < deadline:
+        batch = [texts[(i + k) % len(texts)] for k in range(texts_per_request)]
+        i += texts_per_request
+        body = json.dumps({"texts": batch}).encode("utf-8")
+        req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=60) as resp:
+                resp.read()
+                status = resp.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except Exception:
+            status = "error"
+        elapsed = time.perf_counter() - t0
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+
+
+def run_level(url, texts, concurrency, duration, texts_per_request):
+    latencies, statuses, lock = [], {}, threading.Lock()
+    deadline = time.monotonic() + duration
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for c in range(concurrency):
+            pool.submit(_client, url, texts, texts_per_request, deadline, c * 997, latencies, statuses, lock)
+    wall = time.perf_counter() - t0
+    return {
+        "concurrency": concurrency,
+        "requests_per_s": len(latencies) / wall,
+        "texts_per_s": len(latencies) * texts_per_request / wall,
+        "p50_ms": 1000 * _percentile(latencies, 50),
+        "p95_ms": 1000 * _percentile(latencies, 95),
+        "p99_ms": 1000 * _percentile(latencies, 99),
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8600")
+    parser.add_argument("--csv", default="data/hate_speech.csv")
+    parser.add_argument("--column", default="tweet")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per concurrency level")
+    parser.add_argument("--texts-per-request", type=int, default=1)
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    with open(args.csv, encoding="utf-8", errors="replace", newline="") as f:
+        texts = [row[args.column] or "" for row in csv.DictReader(f)]
+    url = args.url.rstrip("/") + "/score"
+    results = []
+    print(f"{'clients':>8} {'req/s':>9} {'texts/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+    for c in args.concurrency:
+        r = run_level(url, texts, c, args.duration, args.texts_per_request)
+        results.append(r)
+        print(f"{c:>8} {r['requests_per_s']:9.1f} {r['texts_per_s']:9.1f} {r['p50_ms']:8.1f} "
+              f"{r['p95_ms']:8.1f} {r['p99_ms']:8.1f}  {r['statuses']}")
+    try:
+        with urllib.request.urlopen(args.url.rstrip("/") + "/stats", timeout=5) as resp:
+            print("service stats:", json.loads(resp.read()))
+    except Exception:
+        pass
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
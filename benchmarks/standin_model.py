@@ -0,0 +1,72 @@
+# benchmarks/standin_model.py
+"""
+Tiny offline stand-in for the DistilBERT risk model, used by the benchmark suite.
+
+It follows the risk_backends interface (tokenizer, predict, model_id) so
+nlp_engine.score_texts and calculate_risk run unchanged, but needs no download:
+whitespace tokens are hashed into a fixed random embedding table, mean-pooled,
+and pushed through a small two-layer MLP. Scores are deterministic, so cached
+and uncached runs agree; the absolute speed is of course not the real model's.
+"""
+import re
+import zlib
+
+import numpy as np
+
+from risk_backends import BACKENDS, MAX_TOKENS
+
+STANDIN_NAME = "standin"
+VOCAB_BUCKETS = 2 ** 14
+EMBED_DIM = 64
+HIDDEN_DIM = 128
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+class _HashTokenizer:
+    """Callable like a HF tokenizer for the parts nlp_engine uses (`input_ids`)."""
+
+    def __call__(self, texts, truncation=True, max_length=MAX_TOKENS):
+        if isinstance(texts, str):
+            texts = [texts]
+        ids = []
+        for text in texts:
+            row = [zlib.crc32(tok.encode("utf-8")) % VOCAB_BUCKETS for tok in _TOKEN.findall(text.lower())]
+            ids.append(row[:max_length] if truncation else row)
+        return {"input_ids": ids}
+
+
+class StandInBackend:
+    """Hashed bag-of-words MLP with fixed weights."""
+
+    name = STANDIN_NAME
+
+    def __init__(self, model_name=None, intra_op_threads=None, seed=0):
+        self.model_name = "standin-mlp"
+        self.tokenizer = _HashTokenizer()
+        rng = np.random.default_rng(seed)
+        self.embeddings = rng.standard_normal((VOCAB_BUCKETS, EMBED_DIM)).astype(np.float32)
+        self.w1 = rng.standard_normal((EMBED_DIM, HIDDEN_DIM)).astype(np.float32) / np.sqrt(EMBED_DIM)
+        self.w2 = rng.standard_normal(HIDDEN_DIM).astype(np.float32) / np.sqrt(HIDDEN_DIM)
+
+    @property
+    def model_id(self):
+        return f"{self.model_name}@{self.name}"
+
+    def load(self):
+        return self
+
+    def predict(self, texts, batch_size=32, num_workers=0):
+        ids = self.tokenizer(list(texts))["input_ids"]
+        pooled = np.zeros((len(ids), EMBED_DIM), dtype=np.float32)
+        for i, row in enumerate(ids):
+            if row:
+                pooled[i] = self.embeddings[row].mean(axis=0)
+        hidden = np.maximum(pooled @ self.w1, 0.0)
+        logits = hidden @ self.w2
+        return (1.0 / (1.0 + np.exp(-logits))).tolist()
+
+
+def register():
+    """Make the stand-in selectable as `backend="standin"` in nlp_engine."""
+    BACKENDS.setdefault(STANDIN_NAME, StandInBackend)
+    return STANDIN_NAME
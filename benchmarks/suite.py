@@ -0,0 +1,195 @@
+# benchmarks/suite.py
+"""
+Reproducible end-to-end benchmark suite over data/hate_speech.csv and 10x/100x scale-ups.
+
+Cases: cleaning, risk scoring (offline stand-in model), entity extraction,
+relationship building, graph HTML, and OCR on generated text images. Each case
+reports throughput (rows/s), latency (median/p95 over repeats) and peak traced
+memory. Results can be saved as a baseline and later runs compared against it:
+
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json --tolerance 0.15
+
+The process exits 1 when any case regresses beyond the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import nlp_engine
+from benchmarks.bench_ocr import make_images
+from benchmarks.standin_model import register as register_standin
+from text_cleaning import add_clean_text, clean_series
+
+ALL_CASES = ["clean", "score", "entities", "relationships", "graph", "ocr"]
+
+
+def scaled_frame(base, factor):
+    """Repeat the dataset `factor` times; copies after the first get a suffix so rows stay distinct."""
+    if factor == 1:
+        return base.copy()
+    copies = [base]
+    for i in range(1, factor):
+        copy = base.copy()
+        copy["tweet"] = copy["tweet"].astype(str) + f" v{i}"
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def _measure(fn, repeats):
+    """Median/p95 latency over `repeats` runs, then one extra traced run for peak memory."""
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    times.sort()
+    return {
+        "median_s": statistics.median(times),
+        "p95_s": times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))],
+        "peak_mem_mb": peak / (1024 * 1024),
+    }
+
+
+def build_cases(df, args):
+    """Yield (case, rows, fn) for the requested cases; a case is skipped if its dependency is missing."""
+    backend = register_standin()
+    cleaned = add_clean_text(df.copy(), "tweet")
+
+    if "clean" in args.cases:
+        yield "clean", len(df), lambda: clean_series(df["tweet"])
+    if "score" in args.cases:
+        yield "score", len(df), lambda: nlp_engine.calculate_risk(cleaned, backend=backend, use_cache=False,
+                                                                  batch_size=args.batch_size)
+
+    graph_cases = {"entities", "relationships", "graph"} & set(args.cases)
+    if graph_cases:
+        try:
+            import graph_engine
+            graph_engine.ensure_nltk_data()
+            entities = graph_engine.extract_entities(cleaned, "clean_text", top_n=args.top_n, mode=args.entity_mode)
+        except Exception as e:
+            print(f"skipping graph cases: {e}", file=sys.stderr)
+            graph_cases = set()
+        if "entities" in graph_cases:
+            yield "entities", len(df), lambda: graph_engine.extract_entities(cleaned, "clean_text", top_n=args.top_n,
+                                                                             mode=args.entity_mode)
+        if "relationships" in graph_cases:
+            yield "relationships", len(df), lambda: graph_engine.build_relationships(cleaned, entities, "clean_text")
+        if "graph" in graph_cases:
+            try:
+                import pyvis  # noqa: F401
+                yield "graph", len(df), lambda: graph_engine.build_graph(entities=entities, df=cleaned)
+            except ImportError:
+                print("skipping graph: pyvis not installed", file=sys.stderr)
+
+
+def ocr_case(args):
+    """OCR does not scale with the CSV; it runs once on generated images."""
+    import ocr_engine
+    if not (ocr_engine.EASYOCR_AVAILABLE or ocr_engine.PYTESSERACT_AVAILABLE):
+        print("skipping ocr: no OCR engine installed", file=sys.stderr)
+        return None
+    images = make_images(args.images)
+    ocr_engine.extract_text(images[0])  # load the reader outside the timings
+    return lambda: [ocr_engine.extract_text(im) for im in images]
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=False).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "numpy": np.__version__, "pandas": pd.__version__, "commit": commit}
+
+
+def compare(results, baseline, tolerance):
+    """Regressions: throughput down, p95 latency up, or peak memory up by more than `tolerance`."""
+    regressions = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        checks = [
+            ("rows_per_s", cur["rows_per_s"] < base["rows_per_s"] * (1 - tolerance)),
+            ("p95_s", cur["p95_s"] > base["p95_s"] * (1 + tolerance)),
+            ("peak_mem_mb", cur["peak_mem_mb"] > base["peak_mem_mb"] * (1 + tolerance)),
+        ]
+        for metric, worse in checks:
+            if worse:
+                regressions.append(f"{key}: {metric} {base[metric]:.4g} -> {cur[metric]:.4g}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default="data/hate_speech.csv")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--cases", nargs="+", default=ALL_CASES, choices=ALL_CASES)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=nlp_engine.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--top-n", type=int, default=15)
+    parser.add_argument("--entity-mode", default="pos")
+    parser.add_argument("--images", type=int, default=10)
+    parser.add_argument("--output", default=None, help="Write this run's results as JSON")
+    parser.add_argument("--save-baseline", default=None, help="Write this run's results as the new baseline")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.csv, usecols=["tweet"])
+    results = {}
+    for factor in args.scales:
+        df = scaled_frame(base, factor)
+        for case, rows, fn in build_cases(df, args):
+            stats = _measure(fn, args.repeats)
+            stats.update(rows=rows, rows_per_s=rows / stats["median_s"] if stats["median_s"] else None)
+            results[f"{case}@{factor}x"] = stats
+            print(f"{case + '@' + str(factor) + 'x':>20}: {stats['rows_per_s']:12.1f} rows/s  "
+                  f"median {stats['median_s'] * 1000:9.1f} ms  p95 {stats['p95_s'] * 1000:9.1f} ms  "
+                  f"peak {stats['peak_mem_mb']:8.1f} MB")
+    if "ocr" in args.cases:
+        fn = ocr_case(args)
+        if fn is not None:
+            stats = _measure(fn, args.repeats)
+            stats.update(rows=args.images, rows_per_s=args.images / stats["median_s"])
+            results["ocr"] = stats
+            print(f"{'ocr':>20}: {stats['rows_per_s']:12.1f} images/s  median {stats['median_s'] * 1000:9.1f} ms")
+
+    report = {"environment": environment(), "args": vars(args), "results": results}
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"no regressions beyond {args.tolerance:.0%} vs {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# cli.py
+"""
+Headless batch runner for Sentinel-X (no Streamlit).
+
+Runs the same data_loader/text_cleaning -> nlp_engine -> graph_engine code as the
+dashboard over one or more CSVs, chunk by chunk. Every finished chunk is written
+as a part file and recorded in a checkpoint, so an interrupted run picks up where
+it stopped with --resume. Each input produces a combined CSV/Parquet output, and
+the run writes a JSON report with per-stage timings.
+
+    python cli.py data/hate_speech.csv --text-column tweet --format parquet --graph
+    python cli.py big_dump.csv --workers 8 --batch-size 64 --backend onnx-int8 --resume
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import nlp_engine
+from instrumentation import recorder
+from data_loader import resolve_text_column
+from prefilter import PREFILTERS
+from results_store import RISK_CATEGORIES
+from risk_backends import BACKENDS
+from search_index import InvertedIndex
+from stream_engine import DEFAULT_STREAM_CHUNKSIZE, iter_csv_chunks
+from text_cleaning import add_clean_text
+
+class StageTimer:
+    """Accumulates wall time per named stage."""
+
+    def __init__(self):
+        self.seconds = Counter()
+
+    @contextmanager
+    def time(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - t0
+
+def _checkpoint_path(out_dir, stem):
+    return os.path.join(out_dir, f"{stem}.checkpoint.json")
+
+def _load_checkpoint(path, signature):
+    """Checkpoint state if it belongs to the same input + settings, else None."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    return state if state.get("signature") == signature else None
+
+def _save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)  # atomic, so a crash never leaves a half-written checkpoint
+
+def _write_part(chunk, parts_dir, idx, fmt):
+    path = os.path.join(parts_dir, f"part-{idx:05d}.{fmt}")
+    if fmt == "parquet":
+        chunk.to_parquet(path, index=False)
+    else:
+        chunk.to_csv(path, index=False)
+    return path
+
+def unify_part_schemas(schemas):
+    """
+    One Arrow schema covering every part: null fields take the other parts' type, mixed
+    int/float widen to float64, and any other conflict falls back to string.
+    """
+    import pyarrow as pa
+    fields = {}
+    for schema in schemas:
+        for field in schema:
+            current = fields.get(field.name)
+            if current is None or pa.types.is_null(current):
+                fields[field.name] = field.type
+            elif pa.types.is_null(field.type) or field.type == current:
+                continue
+            elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (current, field.type)):
+                fields[field.name] = pa.float64()
+            else:
+                fields[field.name] = pa.string()
+    return pa.schema([pa.field(name, pa.string() if pa.types.is_null(t) else t) for name, t in fields.items()])
+
+def _combine_parts(parts, output_path, fmt):
+    """Concatenate part files into one output without loading them all at once."""
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if not parts:
+            return
+        # Parts carry their own inferred types (e.g. a column that is all-null in one part);
+        # write with one schema unified across all of them instead of the first part's
+        schema = unify_part_schemas([pq.read_schema(part) for part in parts])
+        with pq.ParquetWriter(output_path, schema) as writer:
+            for part in parts:
+                table = pq.read_table(part)
+                columns = [table.column(f.name).cast(f.type) if f.name in table.column_names
+                           else pa.nulls(table.num_rows, f.type) for f in schema]
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+    else:
+        with open(output_path, "w", encoding="utf-8", newline="") as out:
+            for i, part in enumerate(parts):
+                with open(part, encoding="utf-8") as f:
+                    header = f.readline()
+                    if i == 0:
+                        out.write(header)
+                    for line in f:
+                        out.write(line)
+
+def _read_part(path, fmt, columns):
+    return pd.read_parquet(path, columns=columns) if fmt == "parquet" else pd.read_csv(path, usecols=columns)
+
+def _graph_inputs(parts, fmt, top_n):
+    """
+    Index, top entities and risk categories for the graph, built one part file at a time.
+
+    Only the merged posting lists and one byte per row of risk category are kept, never
+    the concatenated text of every part.
+    """
+    from graph_engine import entity_counts
+    indexes, codes, counts = [], [], Counter()
+    for part in parts:
+        chunk = _read_part(part, fmt, ["clean_text", "risk_category"])
+        indexes.append(InvertedIndex.from_series(chunk["clean_text"]))
+        counts.update(entity_counts(chunk["clean_text"].dropna().astype(str).tolist()))
+        codes.append(pd.Categorical(chunk["risk_category"], categories=RISK_CATEGORIES).codes)
+    codes = np.concatenate(codes) if codes else np.empty(0, dtype=np.int8)
+    scored = pd.DataFrame({"risk_category": pd.Categorical.from_codes(codes, RISK_CATEGORIES)})
+    return InvertedIndex.concat(indexes), [w for w, _ in counts.most_common(top_n)], scored
+
+def run_name(path):
+    """Output/checkpoint name for an input: file stem plus a hash of its absolute path (same stems never collide)."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}-{hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]}"
+
+def run_input(path, args, timer):
+    """Score one CSV; returns its report entry."""
+    stem = run_name(path)
+    parts_dir = os.path.join(args.output_dir, f"{stem}.parts")
+    os.makedirs(parts_dir, exist_ok=True)
+    ckpt_path = _checkpoint_path(args.output_dir, stem)
+    stat = os.stat(path)
+    signature = {"input": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime,
+                 "chunksize": args.chunksize, "encoding": args.encoding, "text_column": args.text_column,
+                 "format": args.format, "backend": args.backend, "batch_size": args.batch_size,
+                 "use_cache": not args.no_cache, "dedupe": args.dedupe, "prefilter": args.prefilter,
+                 "prefilter_band": [args.prefilter_low, args.prefilter_high]}
+
+    state = _load_checkpoint(ckpt_path, signature) if args.resume else None
+    if state is None:
+        for stale in glob.glob(os.path.join(parts_dir, "part-*")):
+            os.remove(stale)
+        state = {"signature": signature, "done": [], "rows": 0, "category_counts": {}}
+    done = set(state["done"])
+    resumed = len(done)
+
+    text_column = None
+    chunks = iter_csv_chunks(path, chunksize=args.chunksize, encoding=args.encoding)
+    idx = 0
+    while True:
+        with timer.time("read"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        if idx in done:
+            idx += 1
+            continue
+        if text_column is None:
+            text_column = resolve_text_column(chunk.columns, args.text_column)
+            if text_column is None:
+                raise ValueError(f"{path}: column '{args.text_column}' not found.")
+        with timer.time("clean"):
+            if "clean_text" not in chunk.columns:
+                add_clean_text(chunk, text_column)
+        with timer.time("score"):
+            chunk = nlp_engine.process_dataframe(
+                chunk, text_column="clean_text", copy=False, batch_size=args.batch_size,
+                num_processes=args.workers, use_cache=not args.no_cache, dedupe_threshold=args.dedupe,
+                prefilter=args.prefilter, prefilter_band=(args.prefilter_low, args.prefilter_high),
+            )
+        with timer.time("write"):
+            _write_part(chunk, parts_dir, idx, args.format)
+        state["done"].append(idx)
+        state["rows"] += len(chunk)
+        counts = Counter(state["category_counts"])
+        counts.update(chunk["risk_category"].value_counts().to_dict())
+        state["category_counts"] = {k: int(v) for k, v in counts.items()}
+        if "risk_stage" in chunk.columns:
+            stages = Counter(state.get("stage_counts", {}))
+            stages.update(chunk["risk_stage"].value_counts().to_dict())
+            state["stage_counts"] = {k: int(v) for k, v in stages.items()}
+        _save_checkpoint(ckpt_path, state)
+        print(f"{path}: chunk {idx} done ({state['rows']:,} rows)", file=sys.stderr)
+        idx += 1
+
+    parts = sorted(glob.glob(os.path.join(parts_dir, f"part-*.{args.format}")))
+    output_path = os.path.join(args.output_dir, f"{stem}.scored.{args.format}")
+    with timer.time("combine"):
+        _combine_parts(parts, output_path, args.format)
+
+    entry = {"input": path, "output": output_path, "rows": state["rows"], "chunks": len(parts),
+             "resumed_chunks": resumed, "category_counts": state["category_counts"]}
+    if state.get("stage_counts"):
+        entry["stage_counts"] = state["stage_counts"]
+    if args.graph:
+        from graph_engine import build_graph, build_scalable_graph
+        with timer.time("graph"):
+            index, entities, scored = _graph_inputs(parts, args.format, args.top_n)
+            graph_path = os.path.join(args.output_dir, f"{stem}.graph.{'json' if args.graph_json else 'html'}")
+            if args.graph_static or args.graph_json:
+                dataset_key = hashlib.sha256(json.dumps(signature, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+                graph = build_scalable_graph(scored, text_column="clean_text", top_n=args.top_n,
+                                             min_cooccur=args.min_cooccur, top_k=args.graph_top_k,
+                                             backbone_alpha=args.graph_backbone,
+                                             fmt="json" if args.graph_json else "html",
+                                             dataset_key=dataset_key, index=index, entities=entities)
+            else:
+                graph = build_graph(entities=entities, df=scored, text_column="clean_text", top_n=args.top_n,
+                                    min_cooccur=args.min_cooccur, index=index)
+            with open(graph_path, "w", encoding="utf-8") as f:
+                f.write(graph)
+        entry["graph"] = graph_path
+    return entry
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Score CSV datasets with the Sentinel-X pipeline (no UI).")
+    parser.add_argument("inputs", nargs="+", help="Input CSV path(s)")
+    parser.add_argument("--text-column", default="text", help="Text column (falls back to clean_text/tweet/...)")
+    parser.add_argument("--backend", default=nlp_engine.BACKEND, choices=list(BACKENDS))
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads for the backend")
+    parser.add_argument("--batch-size", type=int, default=nlp_engine.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="Scoring processes")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_STREAM_CHUNKSIZE, help="Rows per chunk/checkpoint")
+    parser.add_argument("--encoding", default=None, help="Input encoding (default: detected per file)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output-dir", default="sentinel_x_output")
+    parser.add_argument("--graph", action="store_true", help="Also export the entity graph as HTML")
+    parser.add_argument("--top-n", type=int, default=15, help="Graph entities")
+    parser.add_argument("--min-cooccur", type=int, default=2, help="Graph edge threshold")
+    parser.add_argument("--graph-static", action="store_true",
+                        help="Large-graph mode: pruned edges, precomputed layout, physics off, cached")
+    parser.add_argument("--graph-json", action="store_true", help="Export the static graph as JSON instead of HTML")
+    parser.add_argument("--graph-top-k", type=int, default=5, help="Static graph: strongest edges kept per node")
+    parser.add_argument("--graph-backbone", type=float, default=None,
+                        help="Static graph: disparity-filter alpha for backbone extraction (e.g. 0.05)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the risk-score cache")
+    parser.add_argument("--prefilter", choices=sorted(PREFILTERS), default=None,
+                        help="Cheap first stage; only rows inside the band reach the model")
+    parser.add_argument("--prefilter-low", type=float, default=nlp_engine.DEFAULT_PREFILTER_BAND[0],
+                        help="Prefilter scores below this are decided by the prefilter")
+    parser.add_argument("--prefilter-high", type=float, default=nlp_engine.DEFAULT_PREFILTER_BAND[1],
+                        help="Prefilter scores at or above this are also decided by the prefilter")
+    parser.add_argument("--dedupe", type=float, default=None, metavar="THRESHOLD",
+                        help="Score one representative per near-duplicate cluster (Jaccard threshold, e.g. 0.8; "
+                             "clusters are formed within each chunk)")
+    parser.add_argument("--resume", action="store_true", help="Continue from existing checkpoints")
+    parser.add_argument("--report", help="Run report path (default: <output-dir>/run_report.json)")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.prefilter:
+        try:
+            nlp_engine.get_prefilter(args.prefilter)  # e.g. the hashed model was never trained
+        except (FileNotFoundError, ImportError) as e:
+            parser.error(f"--prefilter {args.prefilter}: {e}")
+    os.makedirs(args.output_dir, exist_ok=True)
+    nlp_engine.set_backend(args.backend, intra_op_threads=args.threads)
+
+    started = time.time()
+    report = {"started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+              "config": {k: v for k, v in vars(args).items() if k != "inputs"}, "inputs": []}
+    timer = StageTimer()
+    with timer.time("model_load"):
+        nlp_engine.get_backend().load()
+    for path in args.inputs:
+        input_timer = StageTimer()
+        entry = run_input(path, args, input_timer)
+        entry["stages_s"] = {k: round(v, 3) for k, v in input_timer.seconds.items()}
+        scored_s = input_timer.seconds["score"]
+        entry["rows_per_s"] = round(entry["rows"] / scored_s, 1) if scored_s else None
+        report["inputs"].append(entry)
+        timer.seconds.update(input_timer.seconds)
+    nlp_engine.shutdown_pool()
+
+    report["stages_s"] = {k: round(v, 3) for k, v in timer.seconds.items()}
+    report["total_s"] = round(time.time() - started, 3)
+    perf = recorder.snapshot()
+    report["instrumentation"] = {"stages": perf["stages"], "values": perf["values"],
+                                 "peak_rss_mb": perf["peak_rss_mb"]}
+    report_path = args.report or os.path.join(args.output_dir, "run_report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# cooccurrence.py
+"""
+Sparse entity co-occurrence.
+
+Posts x entities incidence is a SciPy CSR matrix X (X[p, e] = 1 if post p mentions
+entity e, built from InvertedIndex posting lists), so co-occurrence counts are the
+single sparse product C = X^T X: C[i, j] = posts mentioning both i and j, and the
+diagonal holds each entity's document frequency. Edges can be thresholded by raw
+count (`min_cooccur`) and by pointwise mutual information (`min_pmi`):
+
+    PMI(i, j) = log(C[i, j] * N / (C[i, i] * C[j, j]))
+"""
+import math
+
+import numpy as np
+
+try:
+    import scipy.sparse as sp
+    SCIPY_AVAILABLE = True
+except Exception:
+    SCIPY_AVAILABLE = False
+
+def incidence_matrix(index, entities):
+    """CSR matrix (n_posts x len(entities)) of entity mentions per post."""
+    rows, cols = [], []
+    for j, ent in enumerate(entities):
+        posting = index.entity_rows(ent)
+        rows.append(posting)
+        cols.append(np.full(len(posting), j, dtype=np.int64))
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+    data = np.ones(len(rows), dtype=np.int32)
+    return sp.csr_matrix((data, (rows, cols)), shape=(index.n_rows, len(entities)))
+
+def cooccurrence_matrix(incidence):
+    """Entity x entity co-occurrence counts (CSR); diagonal = document frequency."""
+    return (incidence.T @ incidence).tocsr()
+
+def pmi(count, df_i, df_j, n_posts):
+    """Pointwise mutual information of a pair from raw counts."""
+    return math.log(count * n_posts / (df_i * df_j))
+
+def cooccurrence_edges(index, entities, min_cooccur=1, min_pmi=None):
+    """
+    Undirected weighted edges between `entities`.
+
+    Args:
+        index (InvertedIndex): Index over the posts.
+        entities (list): Entity terms (node order).
+        min_cooccur (int): Minimum shared posts for an edge.
+        min_pmi (float, optional): Minimum PMI for an edge.
+
+    Returns:
+        list: [(src, dst, weight)] with each pair once (src before dst in `entities` order).
+    """
+    n_posts = index.n_rows
+    if not SCIPY_AVAILABLE:
+        # Pairwise posting-list intersections: same result, O(E^2) pairs
+        df = {ent: len(index.entity_rows(ent)) for ent in entities}
+        edges = []
+        for (src, dst), count in index.cooccurrence(entities, min_cooccur=min_cooccur).items():
+            if min_pmi is None or pmi(count, df[src], df[dst], n_posts) >= min_pmi:
+                edges.append((src, dst, count))
+        return edges
+
+    counts = cooccurrence_matrix(incidence_matrix(index, entities))
+    doc_freq = counts.diagonal()
+    upper = sp.triu(counts, k=1).tocoo()
+    keep = upper.data >= min_cooccur
+    if min_pmi is not None:
+        with np.errstate(divide="ignore"):
+            # float64 before multiplying: int32 counts * n_posts overflows on large corpora
+            freq = doc_freq.astype(np.float64)
+            scores = np.log(upper.data.astype(np.float64) * n_posts / (freq[upper.row] * freq[upper.col]))
+        keep &= scores >= min_pmi
+    return [
+        (entities[i], entities[j], int(w))
+        for i, j, w in zip(upper.row[keep], upper.col[keep], upper.data[keep])
+    ]
+
+def edge_weights(relationships):
+    """{(a, b): weight} with a <= b for (src, dst[, weight]) tuples (weight defaults to 1)."""
+    weights = {}
+    for rel in relationships:
+        weights[tuple(sorted(rel[:2]))] = rel[2] if len(rel) == 3 else 1
+    return weights
@@ -0,0 +1,180 @@
+# csv_ingest.py
+"""
+Single-pass CSV ingestion shared by the dashboard, data_loader and benchmarks.
+
+    df = read_csv_fast(uploaded_file, text_column="tweet")
+
+The encoding is detected from a small byte sample (BOM, strict UTF-8, then
+charset-normalizer if installed, else cp1252), the header is read from the same
+sample, and the file is parsed once: with the pyarrow engine when available and
+the data decodes cleanly, otherwise the C engine with malformed lines skipped. If
+bytes past the sample do not decode, the parse is retried with FALLBACK_ENCODING,
+and only then with just the undecodable bytes read as FALLBACK_ENCODING (the
+FALLBACK_ERRORS handler, which the streaming readers use as well). Only the text column, its alternates and a few
+metadata columns are read (`usecols`), text columns are stored as Arrow strings
+and numeric columns are downcast.
+"""
+import codecs
+import io
+
+import pandas as pd
+
+from instrumentation import span
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except Exception:
+    PYARROW_AVAILABLE = False
+
+try:
+    from charset_normalizer import from_bytes as _detect_charset
+    CHARSET_NORMALIZER_AVAILABLE = True
+except Exception:
+    CHARSET_NORMALIZER_AVAILABLE = False
+
+# Fallback text columns tried (in order) when the requested one is missing
+ALT_TEXT_COLUMNS = ["clean_text", "text", "tweet", "summary", "body"]
+# Non-text columns kept by default when present (ids, timestamps, authors, labels)
+META_COLUMNS = ["id", "date", "created_at", "timestamp", "user", "username", "author", "url", "class"]
+SAMPLE_BYTES = 64 * 1024
+FALLBACK_ENCODING = "cp1252"
+# encoding_errors handler: bytes the chosen encoding can't decode are decoded as FALLBACK_ENCODING
+FALLBACK_ERRORS = "sentinel_x_fallback"
+
+def _decode_fallback(error):
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    return error.object[error.start:error.end].decode(FALLBACK_ENCODING, errors="replace"), error.end
+
+codecs.register_error(FALLBACK_ERRORS, _decode_fallback)
+
+def resolve_text_column(columns, text_column):
+    """Return `text_column` if present, else the first ALT_TEXT_COLUMNS match, else None."""
+    if text_column in columns:
+        return text_column
+    return next((c for c in ALT_TEXT_COLUMNS if c in columns), None)
+
+def detect_encoding(sample):
+    """Best-guess encoding of a byte sample."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # Incremental decode so a multi-byte character cut at the sample end is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    if CHARSET_NORMALIZER_AVAILABLE:
+        match = _detect_charset(sample).best()
+        if match is not None:
+            return match.encoding
+    return FALLBACK_ENCODING
+
+def detect_source_encoding(source):
+    """detect_encoding over the first SAMPLE_BYTES of a path, bytes or file-like object."""
+    return detect_encoding(_sample(source))
+
+def _sample(source, n=SAMPLE_BYTES):
+    """First `n` bytes of a path, bytes or file-like object (rewound afterwards)."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source[:n])
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read(n)
+    source.seek(0)
+    sample = source.read(n)
+    source.seek(0)
+    return sample.encode("utf-8") if isinstance(sample, str) else sample
+
+def read_header(source, encoding=None):
+    """Column names of a CSV, read from its first bytes."""
+    sample = _sample(source)
+    return pd.read_csv(io.BytesIO(sample), nrows=0, encoding=encoding or detect_encoding(sample),
+                       encoding_errors="replace").columns
+
+def project_columns(columns, text_column, usecols=None):
+    """Columns to read: explicit `usecols`, or the text column, present alternates and META_COLUMNS."""
+    if usecols is not None:
+        return [c for c in columns if c in set(usecols)]
+    wanted = {text_column, *ALT_TEXT_COLUMNS, *META_COLUMNS}
+    return [c for c in columns if c in wanted]
+
+def compact_dtypes(df, text_columns=()):
+    """Arrow-backed strings for text columns, downcast numerics (in place)."""
+    for col in df.columns:
+        series = df[col]
+        if col in text_columns:
+            if PYARROW_AVAILABLE and series.dtype == object:
+                df[col] = series.astype("string[pyarrow]")
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series.dtype):
+            df[col] = pd.to_numeric(series, downcast="float")
+    return df
+
+def _rewind(data):
+    if hasattr(data, "seek"):
+        data.seek(0)
+
+def _parse_c(data, columns, encoding, errors):
+    """C-engine parse, or the python engine if the C tokenizer rejects the file."""
+    _rewind(data)
+    try:
+        return pd.read_csv(data, engine="c", usecols=columns, encoding=encoding, encoding_errors=errors,
+                           on_bad_lines="skip", low_memory=False)
+    except pd.errors.ParserError:
+        _rewind(data)
+        return pd.read_csv(data, engine="python", usecols=columns, encoding=encoding, encoding_errors=errors,
+                           on_bad_lines="skip")
+
+def read_csv_fast(source, text_column="text", usecols=None, encoding=None, all_columns=False, compact=True):
+    """
+    Read a CSV in one parse.
+
+    Args:
+        source: Path, bytes or file-like object (e.g. a Streamlit UploadedFile).
+        text_column (str): Preferred text column; alternates in ALT_TEXT_COLUMNS are kept too.
+        usecols (list, optional): Exact columns to read instead of the automatic projection.
+        encoding (str, optional): Skip detection and use this encoding.
+        all_columns (bool): Read every column (no projection).
+        compact (bool): Apply compact_dtypes.
+
+    Returns:
+        pd.DataFrame: Parsed rows (malformed lines skipped).
+    """
+    sample = _sample(source)
+    encoding = encoding or detect_encoding(sample)
+    data = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+    def projection(enc):
+        header = pd.read_csv(io.BytesIO(sample), nrows=0, encoding=enc, encoding_errors="replace").columns
+        return None if all_columns else project_columns(header, text_column, usecols) or None
+
+    with span("read_csv"):
+        df = None
+        if PYARROW_AVAILABLE and encoding in ("utf-8", "utf-8-sig"):
+            try:
+                df = pd.read_csv(data, engine="pyarrow", usecols=projection(encoding), encoding=encoding,
+                                 on_bad_lines="skip")
+            except Exception:
+                df = None  # e.g. invalid bytes past the sample, or quoting pyarrow rejects
+        if df is None:
+            # The sample can look like UTF-8 while later bytes are not: try the fallback codepage
+            # strictly, then decode only the bad bytes with it
+            attempts = [(encoding, "strict")]
+            if encoding != FALLBACK_ENCODING:
+                attempts.append((FALLBACK_ENCODING, "strict"))
+            attempts.append((encoding, FALLBACK_ERRORS))
+            for enc, errors in attempts:
+                try:
+                    df = _parse_c(data, projection(enc), enc, errors)
+                    break
+                except UnicodeDecodeError:
+                    continue
+    if compact:
+        text_columns = {text_column, *ALT_TEXT_COLUMNS} & set(df.columns)
+        compact_dtypes(df, text_columns)
+    return df
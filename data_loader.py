@@ -1,29 +1,24 @@
 # data_loader.py
 import pandas as pd
-import re
-
-def clean_text(text):
-    """Clean text by removing URLs, non-alphanumeric characters, and converting to lowercase."""
-    text = re.sub(r"http\S+|www\S+|https\S+", '', text)
-    text = re.sub(r'\W', ' ', text)
-    return text.lower().strip()
+from text_cleaning import clean_text, clean_series  # clean_text re-exported for existing callers
+from csv_ingest import ALT_TEXT_COLUMNS, read_csv_fast, resolve_text_column  # re-exported for existing callers
 
 def load_hate_speech():
     """Load and clean hate speech dataset."""
-    df = pd.read_csv("data/hate_speech.csv")
-    df['clean_text'] = df['tweet'].astype(str).apply(clean_text)
+    df = read_csv_fast("data/hate_speech.csv", text_column="tweet", all_columns=True)
+    df['clean_text'] = clean_series(df['tweet'])
     return df
 
 def load_terrorism():
     """Load and clean terrorism dataset (reduced version)."""
-    df = pd.read_csv("data/terrorism_small.csv")
-    df['clean_text'] = df['summary'].astype(str).apply(clean_text)
+    df = read_csv_fast("data/terrorism_small.csv", text_column="summary", all_columns=True)
+    df['clean_text'] = clean_series(df['summary'])
     return df
 
 def load_uploaded_dataset(uploaded_file, text_column):
-    """Load a user-uploaded CSV and clean the specified text column."""
-    df = pd.read_csv(uploaded_file)
+    """Load a user-uploaded CSV (text, alternate and metadata columns only) and clean the specified text column."""
+    df = read_csv_fast(uploaded_file, text_column=text_column)
     if text_column not in df.columns:
         raise ValueError(f"Column '{text_column}' not found in uploaded dataset.")
-    df['clean_text'] = df[text_column].astype(str).apply(clean_text)
+    df['clean_text'] = clean_series(df[text_column])
     return df
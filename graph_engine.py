@@ -1,21 +1,95 @@
 # graph_engine.py
-from pyvis.network import Network
-import streamlit.components.v1 as components  # For app integration
+import json
+import threading
 import pandas as pd
-import nltk
-from nltk import pos_tag, word_tokenize
-from collections import defaultdict, Counter
+from collections import Counter
 import re
+from search_index import InvertedIndex
+from cooccurrence import cooccurrence_edges, edge_weights
+from instrumentation import span
 
-# REVISION: Download NLTK data if needed (run once in your environment)
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('taggers/averaged_perceptron_tagger')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('averaged_perceptron_tagger')
+# REVISION: pyvis, NLTK and streamlit.components are imported lazily inside the functions that
+# need them, and NLTK data is fetched on first use instead of at import time.
+_NLTK_RESOURCES = [
+    ('tokenizers/punkt', 'punkt'),
+    ('tokenizers/punkt_tab', 'punkt_tab'),  # nltk >= 3.9
+    ('taggers/averaged_perceptron_tagger', 'averaged_perceptron_tagger'),
+    ('taggers/averaged_perceptron_tagger_eng', 'averaged_perceptron_tagger_eng'),  # nltk >= 3.9
+]
+_nltk_ready = False
+_nltk_lock = threading.Lock()
 
-def extract_entities(df, text_column='clean_text', top_n=15):
+def ensure_nltk_data():
+    """Download the NLTK tokenizer/tagger data if missing (once per process)."""
+    global _nltk_ready
+    if _nltk_ready:
+        return
+    with _nltk_lock:
+        if _nltk_ready:
+            return
+        import nltk
+        for path, package in _NLTK_RESOURCES:
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                nltk.download(package, quiet=True)
+        _nltk_ready = True
+
+# Filter noise (stop words, short/non-alpha)
+STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are'}
+_ALPHA = re.compile(r'^[a-zA-Z]+$')
+ENTITY_MODES = ('pos', 'vocab', 'frequency')
+DEFAULT_TAG_BATCH_SIZE = 1000
+
+_tagger = None
+_noun_lexicon = {}  # word -> bool, filled by 'vocab' mode and reused across calls
+
+def _get_tagger():
+    """One PerceptronTagger per process (nltk.pos_tag reloads the model on every call)."""
+    global _tagger
+    if _tagger is None:
+        ensure_nltk_data()
+        from nltk.tag import PerceptronTagger
+        _tagger = PerceptronTagger()
+    return _tagger
+
+def is_entity_candidate(word):
+    """Whether a (lowercase) token can be an entity: not a stop word, alphabetic, > 2 chars."""
+    return word not in STOP_WORDS and len(word) > 2 and _ALPHA.match(word) is not None
+
+def _count_chunk(texts, mode='pos', batch_size=DEFAULT_TAG_BATCH_SIZE, lexicon=None):
+    """Count candidate entities in `texts` (streamed into a Counter, no intermediate noun list)."""
+    counts = Counter()
+    if mode == 'pos':
+        from nltk import word_tokenize
+        tagger = _get_tagger()
+        for start in range(0, len(texts), batch_size):
+            sents = [word_tokenize(t) for t in texts[start:start + batch_size]]
+            for tagged in tagger.tag_sents(sents):
+                # Focus on nouns (NN/NNP) as entity proxies
+                counts.update(w for w in (word.lower() for word, pos in tagged if pos.startswith('NN'))
+                              if is_entity_candidate(w))
+    else:
+        # 'frequency' and 'vocab': whitespace tokens of cleaned text, no per-post tagging
+        for text in texts:
+            counts.update(w for w in text.lower().split() if is_entity_candidate(w))
+    if lexicon is not None:
+        counts = Counter({w: c for w, c in counts.items() if w in lexicon})
+    return counts
+
+def _noun_filter(words, batch_size=DEFAULT_TAG_BATCH_SIZE):
+    """Tag each distinct word once, out of context, and cache whether it is a noun."""
+    missing = [w for w in words if w not in _noun_lexicon]
+    if missing:
+        tagger = _get_tagger()
+        for start in range(0, len(missing), batch_size):
+            chunk = missing[start:start + batch_size]
+            for word, tagged in zip(chunk, tagger.tag_sents([[w] for w in chunk])):
+                _noun_lexicon[word] = tagged[0][1].startswith('NN')
+    return {w for w in words if _noun_lexicon[w]}
+
+def extract_entities(df, text_column='clean_text', top_n=15, mode='pos', n_jobs=1,
+                     batch_size=DEFAULT_TAG_BATCH_SIZE, lexicon=None):
     """
     Extract top entities (nouns/keywords) from the DataFrame using NLTK POS tagging.
     For OSINT threat profiling: Nouns proxy for actors/locations (e.g., "jihad", "ISIS").
@@ -24,6 +98,12 @@ def extract_entities(df, text_column='clean_text', top_n=15):
         df (pd.DataFrame): Input DataFrame.
         text_column (str): Text column (default: 'clean_text' from data_loader).
         top_n (int): Number of top entities.
+        mode (str): 'pos' tags every post in context (batched, the original behaviour);
+            'vocab' counts tokens first and POS-tags each distinct word once;
+            'frequency' skips tagging and ranks all non-stop-word tokens.
+        n_jobs (int): Processes to count with (texts are split into contiguous chunks).
+        batch_size (int): Posts per tagger call.
+        lexicon (Iterable[str], optional): Only count words in this precompiled lexicon.
     
     Returns:
         list: Top entities.
@@ -31,24 +111,57 @@ def extract_entities(df, text_column='clean_text', top_n=15):
     if df.empty or text_column not in df.columns:
         return []
     
-    all_nouns = []
-    for text in df[text_column].dropna().astype(str):
-        tokens = word_tokenize(text)
-        tagged = pos_tag(tokens)
-        # Focus on nouns (NN/NNP) as entity proxies
-        nouns = [word.lower() for word, pos in tagged if pos.startswith('NN')]
-        all_nouns.extend(nouns)
+    texts = df[text_column].dropna().astype(str).tolist()
+    counts = entity_counts(texts, mode=mode, n_jobs=n_jobs, batch_size=batch_size, lexicon=lexicon)
+    return [word for word, _ in counts.most_common(top_n)]
+
+def entity_counts(texts, mode='pos', n_jobs=1, batch_size=DEFAULT_TAG_BATCH_SIZE, lexicon=None):
+    """
+    Entity candidate counts behind extract_entities.
+    
+    Counts from consecutive chunks of a dataset can be summed (Counter.update, in chunk
+    order) to get the same ranking as one pass over all of it.
     
-    # Filter noise (stop words, short/non-alpha)
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are'}
-    filtered_nouns = [
-        n for n in all_nouns 
-        if n not in stop_words and len(n) > 2 and re.match(r'^[a-zA-Z]+$', n)
-    ]
+    Args:
+        texts (list): Post texts.
+        mode (str): 'pos', 'vocab' or 'frequency' (see extract_entities).
+        n_jobs (int): Processes to count with.
+        batch_size (int): Posts per tagger call.
+        lexicon (Iterable[str], optional): Only count words in this precompiled lexicon.
+    
+    Returns:
+        Counter: {word: number of occurrences}.
+    """
+    if mode not in ENTITY_MODES:
+        raise ValueError(f"Unknown entity mode '{mode}'. Choose one of: {', '.join(ENTITY_MODES)}")
+    
+    lexicon = set(lexicon) if lexicon is not None else None
+    with span(f"entities.{mode}", rows=len(texts)):
+        counts = _count_entities(texts, mode, n_jobs, batch_size, lexicon)
     
-    return [word for word, _ in Counter(filtered_nouns).most_common(top_n)]
+    if mode == 'vocab':
+        nouns = _noun_filter(list(counts), batch_size=batch_size)
+        counts = Counter({w: c for w, c in counts.items() if w in nouns})
+    return counts
 
-def build_relationships(df, entities, text_column='clean_text', min_cooccur=2):
+def _count_entities(texts, mode, n_jobs, batch_size, lexicon):
+    """Serial or multi-process candidate counting for extract_entities."""
+    if n_jobs > 1 and len(texts) > batch_size:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        step = -(-len(texts) // n_jobs)
+        chunks = [texts[i:i + step] for i in range(0, len(texts), step)]
+        counts = Counter()
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+            # Merging in chunk order keeps first-seen order, so ties rank as in a serial run
+            for chunk_counts in pool.map(_count_chunk, chunks, [mode] * len(chunks),
+                                         [batch_size] * len(chunks), [lexicon] * len(chunks)):
+                counts.update(chunk_counts)
+    else:
+        counts = _count_chunk(texts, mode=mode, batch_size=batch_size, lexicon=lexicon)
+    return counts
+
+def build_relationships(df, entities, text_column='clean_text', min_cooccur=2, index=None, min_pmi=None):
     """
     Build co-occurrence edges: Connect entities in the same post >= min_cooccur times.
     For radicalization: E.g., "isis" and "recruitment" linked if co-mentioned.
@@ -58,30 +171,28 @@ def build_relationships(df, entities, text_column='clean_text', min_cooccur=2):
         entities (list): Entities to connect.
         text_column (str): Text column.
         min_cooccur (int): Min co-occurrences for an edge.
+        index (InvertedIndex, optional): Prebuilt index over `text_column` (built here if omitted).
+        min_pmi (float, optional): Also require pointwise mutual information >= min_pmi.
     
     Returns:
         list: [(src, dst, weight)] tuples.
     """
-    cooccur = defaultdict(lambda: defaultdict(int))
-    
-    for text in df[text_column].dropna().astype(str):
-        present_entities = [ent for ent in entities if ent in text.lower()]
-        for i in range(len(present_entities)):
-            for j in range(i + 1, len(present_entities)):
-                src, dst = present_entities[i], present_entities[j]
-                cooccur[src][dst] += 1
-                cooccur[dst][src] += 1  # Undirected graph
+    # REVISION: Counts come from the sparse post x entity incidence matrix (C = X^T X) built on
+    # the token inverted index, instead of substring-scanning every post for every entity pair.
+    if index is None:  # an empty index is falsy (__len__), so test for None explicitly
+        index = InvertedIndex.from_dataframe(df, text_column)
     
     relationships = []
-    for src in cooccur:
-        for dst in cooccur[src]:
-            weight = cooccur[src][dst]
-            if weight >= min_cooccur:
-                relationships.append((src, dst, weight))
+    with span("graph.cooccurrence", rows=index.n_rows):
+        edges = cooccurrence_edges(index, entities, min_cooccur=min_cooccur, min_pmi=min_pmi)
+    for src, dst, weight in edges:
+        relationships.append((src, dst, weight))
+        relationships.append((dst, src, weight))  # Undirected graph
     
     return relationships
 
-def build_graph(entities=None, relationships=None, df=None, text_column='clean_text', top_n=15, min_cooccur=2, use_dummy=False):
+def build_graph(entities=None, relationships=None, df=None, text_column='clean_text', top_n=15, min_cooccur=2, use_dummy=False,
+                index=None, min_pmi=None):
     """
     Build PyVis network. Supports your original (entities/relationships lists) or DF-based (extracts automatically).
     
@@ -93,6 +204,8 @@ def build_graph(entities=None, relationships=None, df=None, text_column='clean_t
         top_n (int): Top entities if extracting.
         min_cooccur (int): Min co-occurrences if extracting.
         use_dummy (bool): If True, use your original dummy relationships (for testing).
+        index (InvertedIndex, optional): Prebuilt index over `text_column` (built here if omitted).
+        min_pmi (float, optional): PMI threshold for edges if extracting.
     
     Returns:
         str: HTML string for the graph (use with components.html).
@@ -101,8 +214,11 @@ def build_graph(entities=None, relationships=None, df=None, text_column='clean_t
     if df is not None:
         if df.empty:
             raise ValueError("DataFrame is empty. No graph to build.")
+        if index is None:
+            index = InvertedIndex.from_dataframe(df, text_column)
         entities = entities or extract_entities(df, text_column, top_n)
-        relationships = relationships or build_relationships(df, entities, text_column, min_cooccur)
+        relationships = relationships or build_relationships(df, entities, text_column, min_cooccur, index=index,
+                                                             min_pmi=min_pmi)
         if use_dummy and len(entities) > 1:
             # Fallback to your original dummy logic
             relationships = [(entities[i], entities[j]) for i in range(len(entities)) for j in range(i+1, len(entities)) if i % 2 == 0]
@@ -120,37 +236,26 @@ def build_graph(entities=None, relationships=None, df=None, text_column='clean_t
     node_titles = {ent: f"Entity: {ent}" for ent in entities}
     
     if df is not None and 'risk_category' in df.columns:
-        entity_risk = defaultdict(list)
-        for _, row in df.iterrows():
-            text_lower = row[text_column].lower()
-            for ent in entities:
-                if ent in text_lower:
-                    entity_risk[ent].append(row['risk_category'])
-        
-        for ent in entities:
-            if entity_risk[ent]:
-                majority = Counter(entity_risk[ent]).most_common(1)[0][0]
-                node_colors[ent] = colors.get(majority, 'gray')
-                node_titles[ent] += f"\nRisk: {majority} (appears in {len(entity_risk[ent])} posts)"
+        for ent, (majority, n_posts) in entity_risk(df, entities, index).items():
+            node_colors[ent] = colors.get(majority, 'gray')
+            node_titles[ent] += f"\nRisk: {majority} (appears in {n_posts} posts)"
     
     # Build network (your original style, enhanced)
+    from pyvis.network import Network
     net = Network(height="600px", width="100%", bgcolor="#111", font_color="white", directed=False)
     
     for ent in entities:
         net.add_node(ent, label=ent, title=node_titles[ent], color=node_colors[ent], size=25)
     
-    for src, dst in relationships:
-        weight = 1  # Default
-        # If relationships have weights (from cooccur), use them
-        if isinstance(relationships[0], tuple) and len(relationships[0]) == 3:
-            for r_src, r_dst, w in relationships:
-                if (r_src == src and r_dst == dst) or (r_dst == src and r_src == dst):
-                    weight = w
-                    break
+    # REVISION: One dict pass over (src, dst[, weight]) tuples; each undirected edge added once
+    for (src, dst), weight in edge_weights(relationships).items():
+        if src == dst:
+            continue
         net.add_edge(src, dst, value=weight, title=f"Connection strength: {weight}")
     
     # REVISION: Generate HTML string directly (no file save/read)
-    net_html = net.generate_html(notebook=False)
+    with span("graph.html"):
+        net_html = net.generate_html(notebook=False)
     
     # Optional: Tweak HTML for better Streamlit fit
     net_html = net_html.replace(
@@ -160,14 +265,116 @@ def build_graph(entities=None, relationships=None, df=None, text_column='clean_t
     
     return net_html
 
+def entity_risk(df, entities, index):
+    """
+    Majority risk category per entity.
+    
+    Args:
+        df (pd.DataFrame): Scored DataFrame with 'risk_category'.
+        entities (list): Entities to look up.
+        index (InvertedIndex): Index over the text column of `df`.
+    
+    Returns:
+        dict: {entity: (majority category, number of posts)} for entities that occur.
+    """
+    # REVISION: Per-entity risk from posting lists (row positions) instead of iterrows
+    categories = df['risk_category'].to_numpy()
+    risk = {}
+    for ent in entities:
+        rows = index.entity_rows(ent)
+        if len(rows):
+            risk[ent] = (Counter(categories[rows]).most_common(1)[0][0], len(rows))
+    return risk
+
+def dataset_fingerprint(df, text_column):
+    """Content hash of a text column (and risk categories, if scored) for keying cached renders."""
+    import hashlib
+    columns = [c for c in (text_column, 'risk_category') if c in df.columns]
+    hashed = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()[:32]
+
+def build_scalable_graph(df, text_column='clean_text', top_n=200, min_cooccur=2, min_pmi=None, top_k=5,
+                         min_weight=None, backbone_alpha=None, aggregate=None, max_nodes=150, fmt='html',
+                         dataset_key=None, index=None, use_cache=True, entities=None):
+    """
+    Large-graph rendering: pruned edges, optional community aggregation, precomputed layout, physics off.
+    
+    The result is cached on disk per (dataset, parameters), so repeat views skip entity
+    extraction, layout and HTML generation entirely.
+    
+    Args:
+        df (pd.DataFrame): Input (scored for risk colouring) DataFrame.
+        text_column (str): Text column.
+        top_n (int): Entities to extract.
+        min_cooccur (int): Min co-occurrences for an edge.
+        min_pmi (float, optional): PMI threshold for edges.
+        top_k (int, optional): Keep each node's k strongest edges.
+        min_weight (float, optional): Drop edges lighter than this.
+        backbone_alpha (float, optional): Disparity-filter significance level for backbone extraction.
+        aggregate (bool, optional): Collapse communities into super-nodes; None = only above `max_nodes` entities.
+        max_nodes (int): Node count above which aggregation kicks in when `aggregate` is None.
+        fmt (str): "html" (static pyvis page) or "json" (nodes/edges with x/y).
+        dataset_key (optional): Identifies the data for the cache (content hash of `text_column` if omitted).
+        index (InvertedIndex, optional): Prebuilt index over `text_column`.
+        use_cache (bool): Read/write the render cache.
+        entities (list, optional): Precomputed entities (extracted from `df` if omitted). With
+            both `entities` and `index` given, `df` only needs 'risk_category'; pass `dataset_key` then.
+    
+    Returns:
+        str: HTML or JSON text.
+    """
+    import graph_render
+    
+    if df.empty:
+        raise ValueError("DataFrame is empty. No graph to build.")
+    params = {"text_column": text_column, "top_n": top_n, "min_cooccur": min_cooccur, "min_pmi": min_pmi,
+              "top_k": top_k, "min_weight": min_weight, "backbone_alpha": backbone_alpha,
+              "aggregate": aggregate, "max_nodes": max_nodes}
+    
+    def build():
+        idx = index if index is not None else InvertedIndex.from_dataframe(df, text_column)
+        ents = entities if entities is not None else extract_entities(df, text_column, top_n)
+        if len(ents) < 2:
+            raise ValueError("Need at least 2 entities for a graph.")
+        weights = edge_weights(build_relationships(df, ents, text_column, min_cooccur, index=idx,
+                                                   min_pmi=min_pmi))
+        with span("graph.prune"):
+            weights = graph_render.prune_edges(weights, top_k=top_k, min_weight=min_weight,
+                                               backbone_alpha=backbone_alpha)
+        risk = entity_risk(df, ents, idx) if 'risk_category' in df.columns else {}
+        attrs = {ent: {"risk": risk.get(ent, ('Unknown', 0))[0], "size": risk.get(ent, (None, 1))[1],
+                       "title": f"Entity: {ent}"} for ent in ents}
+        nodes = ents
+        if aggregate or (aggregate is None and len(ents) > max_nodes):
+            with span("graph.communities"):
+                communities = graph_render.detect_communities(ents, weights)
+                nodes, weights, attrs = graph_render.aggregate_communities(ents, weights, communities, attrs)
+        with span("graph.layout", rows=len(nodes)):
+            positions = graph_render.compute_layout(nodes, weights)
+        return graph_render.graph_payload(nodes, weights, positions, attrs)
+    
+    if not use_cache:
+        payload = build()
+        return graph_render.payload_to_html(payload) if fmt == 'html' else json.dumps(payload)
+    key = dataset_key if dataset_key is not None else dataset_fingerprint(df, text_column)
+    with span("graph.render"):
+        return graph_render.cached_render(key, params, build, fmt=fmt)
+
 # REVISION: Updated display_graph to use the new build_graph (for backward compat)
-def display_graph(df, text_column="text"):
+def display_graph(df, text_column="text", index=None, scalable=False, **render_kwargs):
     """
     Display graph in Streamlit. Uses 'clean_text' by default for better results.
+    Pass the dashboard's cached InvertedIndex as `index` to skip rebuilding it.
+    With `scalable=True` the static, pruned, cached renderer (build_scalable_graph) is used.
     """
+    import streamlit.components.v1 as components  # For app integration
     try:
         # REVISION: Call the enhanced build_graph with DF
-        graph_html = build_graph(df=df, text_column=text_column or 'clean_text')
+        if scalable:
+            graph_html = build_scalable_graph(df, text_column=text_column or 'clean_text', index=index,
+                                              **render_kwargs)
+        else:
+            graph_html = build_graph(df=df, text_column=text_column or 'clean_text', index=index)
         components.html(graph_html, height=600, scrolling=True)
     except Exception as e:
         # Fallback warning (import streamlit as st if using outside app)
@@ -0,0 +1,267 @@
+# graph_render.py
+"""
+Scalable rendering for large entity graphs.
+
+The interactive pyvis view runs a force-directed physics simulation in the browser,
+which stops being usable past a few hundred nodes. For large graphs this module:
+
+* prunes edges (top-k strongest per node, a weight threshold, and/or the
+  disparity-filter backbone of Serrano et al. 2009),
+* optionally collapses communities into super-nodes (level of detail),
+* computes the layout once on the server (networkx spring layout, seeded) and
+  emits HTML with physics disabled, or plain JSON nodes/edges with coordinates,
+* caches the output on disk keyed by dataset and rendering parameters, so a
+  repeat view is a file read (least recently used renders are evicted past
+  MAX_GRAPH_CACHE_BYTES).
+"""
+import hashlib
+import json
+import math
+import os
+import tempfile
+from collections import Counter, defaultdict
+
+from risk_cache import DEFAULT_CACHE_DIR
+
+try:
+    import networkx as nx
+    NETWORKX_AVAILABLE = True
+except Exception:
+    NETWORKX_AVAILABLE = False
+
+GRAPH_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, "graphs")
+MAX_GRAPH_CACHE_BYTES = 256 * 2 ** 20  # least recently used renders are evicted past this
+RENDER_FORMATS = ("html", "json")
+LAYOUT_SCALE = 1000  # pyvis/vis-network coordinates are in pixels
+RISK_COLORS = {'High': 'red', 'Moderate': 'orange', 'Low': 'green', 'Unknown': 'gray'}
+
+def prune_edges(weights, top_k=None, min_weight=None, backbone_alpha=None):
+    """
+    Drop weak edges.
+
+    Args:
+        weights (dict): {(a, b): weight} undirected edges (see cooccurrence.edge_weights).
+        top_k (int, optional): Keep an edge if it is among the k strongest of either endpoint.
+        min_weight (float, optional): Keep edges with weight >= min_weight.
+        backbone_alpha (float, optional): Disparity filter; keep an edge if it is significant
+            at this level for either endpoint (smaller alpha = sparser backbone).
+
+    Returns:
+        dict: The surviving {(a, b): weight} edges.
+    """
+    edges = {pair: w for pair, w in weights.items() if pair[0] != pair[1]}
+    if min_weight is not None:
+        edges = {pair: w for pair, w in edges.items() if w >= min_weight}
+
+    incident = defaultdict(list)
+    for pair, w in edges.items():
+        incident[pair[0]].append((w, pair))
+        incident[pair[1]].append((w, pair))
+
+    if backbone_alpha is not None:
+        strength = {node: sum(w for w, _ in items) for node, items in incident.items()}
+
+        def significant(node, w):
+            k = len(incident[node])
+            # alpha_ij = (1 - p_ij)^(k - 1); degree-1 nodes keep their only edge
+            return k <= 1 or (1 - w / strength[node]) ** (k - 1) < backbone_alpha
+
+        edges = {pair: w for pair, w in edges.items() if significant(pair[0], w) or significant(pair[1], w)}
+
+    if top_k is not None:
+        keep = set()
+        for node, items in incident.items():
+            items = [(w, pair) for w, pair in items if pair in edges]
+            for _, pair in sorted(items, key=lambda item: item[0], reverse=True)[:top_k]:
+                keep.add(pair)
+        edges = {pair: w for pair, w in edges.items() if pair in keep}
+    return edges
+
+def detect_communities(nodes, weights, seed=0):
+    """
+    Partition nodes into communities (Louvain on edge weights; label propagation as a fallback).
+
+    Returns:
+        dict: {node: community id}, ids numbered by descending community size.
+    """
+    if not NETWORKX_AVAILABLE:
+        return {node: i for i, node in enumerate(nodes)}
+    graph = _to_networkx(nodes, weights)
+    try:
+        groups = nx.community.louvain_communities(graph, weight="weight", seed=seed)
+    except AttributeError:  # networkx < 2.8
+        groups = nx.community.label_propagation_communities(graph)
+    groups = sorted(groups, key=lambda g: (-len(g), min(g)))
+    return {node: cid for cid, group in enumerate(groups) for node in group}
+
+def aggregate_communities(nodes, weights, communities, node_attrs=None):
+    """
+    Collapse each community into one super-node.
+
+    Args:
+        nodes (list): Entities.
+        weights (dict): {(a, b): weight} edges between entities.
+        communities (dict): {node: community id}.
+        node_attrs (dict, optional): {node: {"risk": category, ...}} used for the super-node's majority risk.
+
+    Returns:
+        tuple: (super-node names, {(a, b): summed weight}, {super-node: attrs with members/size/risk}).
+    """
+    members = defaultdict(list)
+    for node in nodes:
+        members[communities[node]].append(node)
+    names = {}
+    attrs = {}
+    for cid, group in members.items():
+        label = ", ".join(group[:3]) + (f" +{len(group) - 3}" if len(group) > 3 else "")
+        name = f"#{cid}: {label}"
+        names[cid] = name
+        risks = Counter((node_attrs or {}).get(n, {}).get("risk", "Unknown") for n in group)
+        attrs[name] = {"members": group, "size": len(group), "risk": risks.most_common(1)[0][0]}
+
+    super_weights = Counter()
+    for (a, b), w in weights.items():
+        ca, cb = communities[a], communities[b]
+        if ca != cb:
+            super_weights[tuple(sorted((names[ca], names[cb])))] += w
+    return [names[cid] for cid in sorted(members)], dict(super_weights), attrs
+
+def compute_layout(nodes, weights, seed=0, iterations=50):
+    """
+    Server-side node positions: {node: (x, y)} in [-LAYOUT_SCALE, LAYOUT_SCALE].
+
+    Uses a seeded networkx spring layout (sparse solver for large graphs); without
+    networkx, nodes are placed on a circle.
+    """
+    if not nodes:
+        return {}
+    if NETWORKX_AVAILABLE and len(nodes) > 1:
+        graph = _to_networkx(nodes, weights)
+        k = 2.0 / math.sqrt(len(nodes))  # spread nodes a bit more than the default 1/sqrt(n)
+        pos = nx.spring_layout(graph, weight="weight", seed=seed, iterations=iterations, k=k)
+    else:
+        step = 2 * math.pi / len(nodes)
+        pos = {node: (math.cos(i * step), math.sin(i * step)) for i, node in enumerate(nodes)}
+    return {node: (float(x) * LAYOUT_SCALE, float(y) * LAYOUT_SCALE) for node, (x, y) in pos.items()}
+
+def graph_payload(nodes, weights, positions, node_attrs=None):
+    """JSON-serializable {"nodes": [...], "edges": [...]} with coordinates (vis-network field names)."""
+    node_attrs = node_attrs or {}
+    out_nodes = []
+    for node in nodes:
+        attrs = node_attrs.get(node, {})
+        x, y = positions.get(node, (0.0, 0.0))
+        size = attrs.get("size", 1)
+        title = attrs.get("title") or f"Entity: {node}"
+        if "members" in attrs:
+            title = f"Community of {size} entities\nRisk: {attrs['risk']}\n" + ", ".join(attrs["members"][:30])
+        out_nodes.append({
+            "id": node, "label": node, "title": title, "x": round(x, 1), "y": round(y, 1),
+            "color": RISK_COLORS.get(attrs.get("risk", "Unknown"), "gray"),
+            "size": 15 + 10 * math.log1p(size),
+        })
+    out_edges = [{"from": a, "to": b, "value": w, "title": f"Connection strength: {w}"}
+                 for (a, b), w in weights.items()]
+    return {"nodes": out_nodes, "edges": out_edges}
+
+def payload_to_html(payload, height="600px"):
+    """Static-layout pyvis HTML (physics off) from a graph_payload()."""
+    from pyvis.network import Network
+    net = Network(height=height, width="100%", bgcolor="#111", font_color="white", directed=False)
+    for node in payload["nodes"]:
+        net.add_node(node["id"], label=node["label"], title=node["title"], x=node["x"], y=node["y"],
+                     color=node["color"], size=node["size"], physics=False)
+    for edge in payload["edges"]:
+        net.add_edge(edge["from"], edge["to"], value=edge["value"], title=edge["title"])
+    net.toggle_physics(False)
+    html = net.generate_html(notebook=False)
+    return html.replace(
+        '<div id="mynetwork"></div>',
+        f'<div id="mynetwork" style="width: 100%; height: {height}; border: 1px solid #333;"></div>'
+    )
+
+def render_key(dataset_key, params):
+    """Cache key for one dataset + rendering parameter set."""
+    raw = json.dumps({"dataset": dataset_key, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def cached_render(dataset_key, params, build, fmt="html", cache_dir=GRAPH_CACHE_DIR,
+                  max_bytes=MAX_GRAPH_CACHE_BYTES):
+    """
+    Return the rendered graph for (dataset_key, params), building and storing it on a miss.
+
+    Args:
+        dataset_key: Anything JSON-serializable identifying the data (e.g. file hash + text column).
+        params (dict): Rendering parameters; part of the key.
+        build (callable): () -> graph_payload() dict, only called on a miss.
+        fmt (str): "html" or "json".
+        max_bytes (int, optional): Cache size budget; None disables eviction.
+
+    Returns:
+        str: HTML or JSON text.
+    """
+    if fmt not in RENDER_FORMATS:
+        raise ValueError(f"Unknown graph format '{fmt}'. Choose one of: {', '.join(RENDER_FORMATS)}")
+    key = render_key(dataset_key, params)
+    payload_path = os.path.join(cache_dir, f"{key}.json")
+    out_path = os.path.join(cache_dir, f"{key}.{fmt}")
+    if os.path.exists(out_path):
+        _touch(out_path)
+        with open(out_path, encoding="utf-8") as f:
+            return f.read()
+
+    if os.path.exists(payload_path):
+        _touch(payload_path)
+        with open(payload_path, encoding="utf-8") as f:
+            payload = json.load(f)
+    else:
+        payload = build()
+        _write_atomic(payload_path, json.dumps(payload))
+        _evict(cache_dir, max_bytes)
+    if fmt == "json":
+        return json.dumps(payload)
+    html = payload_to_html(payload)
+    _write_atomic(out_path, html)
+    _evict(cache_dir, max_bytes)
+    return html
+
+def _touch(path):
+    """Mark a cache entry as used (eviction goes by mtime)."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def _evict(cache_dir, max_bytes):
+    """Delete least recently used cache files until the directory fits in `max_bytes`."""
+    if max_bytes is None:
+        return
+    entries = []
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # A unique temp file per call: threads of one process may render the same key at once
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False) as f:
+        f.write(text)
+    os.replace(f.name, path)
+
+def _to_networkx(nodes, weights):
+    graph = nx.Graph()
+    graph.add_nodes_from(nodes)
+    graph.add_weighted_edges_from((a, b, w) for (a, b), w in weights.items())
+    return graph
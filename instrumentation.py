@@ -0,0 +1,138 @@
+# instrumentation.py
+"""
+Lightweight per-stage instrumentation for the Sentinel-X pipeline.
+
+    with span("score", rows=len(df)):
+        ...
+
+Spans are aggregated per stage name in a process-wide recorder (count, total/max
+time, rows and rows/sec) alongside the most recent individual spans, peak RSS,
+and one-off values such as model load time. The recorder is thread-safe, cheap
+enough to leave on, viewable in the dashboard's "Performance" expander, and
+exportable as JSON. `profile_run` wraps a block in cProfile (or pyinstrument,
+if installed) and saves the profile to disk.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+MAX_RECENT_SPANS = 500
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unavailable)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except Exception:
+        return None
+
+class Recorder:
+    """Thread-safe aggregate of stage timings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.values = {}
+            self.recent = deque(maxlen=MAX_RECENT_SPANS)
+            self.started_at = time.time()
+
+    def add(self, name, seconds, rows=None):
+        with self._lock:
+            stage = self.stages.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0, "rows": 0})
+            stage["count"] += 1
+            stage["total_s"] += seconds
+            stage["max_s"] = max(stage["max_s"], seconds)
+            if rows:
+                stage["rows"] += rows
+            self.recent.append({"stage": name, "start": time.time() - seconds, "seconds": seconds,
+                                "rows": rows, "thread": threading.current_thread().name})
+
+    def set_value(self, name, value):
+        """Record a one-off metric (e.g. model load time)."""
+        with self._lock:
+            self.values[name] = value
+
+    def snapshot(self):
+        """JSON-serializable view: per-stage aggregates with rows/sec, values, peak RSS, recent spans."""
+        with self._lock:
+            stages = {}
+            for name, s in self.stages.items():
+                stages[name] = dict(s, mean_ms=1000 * s["total_s"] / s["count"],
+                                    rows_per_s=(s["rows"] / s["total_s"]) if s["rows"] and s["total_s"] else None)
+            return {"since": self.started_at, "stages": stages, "values": dict(self.values),
+                    "peak_rss_mb": peak_rss_mb(), "recent_spans": list(self.recent)}
+
+    def to_json(self, path=None):
+        data = json.dumps(self.snapshot(), indent=2, default=str)
+        if path:
+            with open(path, "w") as f:
+                f.write(data)
+        return data
+
+recorder = Recorder()
+
+@contextmanager
+def span(name, rows=None):
+    """Time a block as stage `name`; `rows` (if known) feeds the rows/sec counter."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add(name, time.perf_counter() - t0, rows)
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def profile_run(path, profiler="cprofile"):
+    """
+    Profile a block and save the result.
+
+    Args:
+        path (str): Output file (.prof for cProfile, .html for pyinstrument).
+        profiler (str): "cprofile" (stdlib, deterministic) or "pyinstrument" (sampling).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if profiler == "pyinstrument":
+        from pyinstrument import Profiler
+        prof = Profiler()
+        prof.start()
+        try:
+            yield path
+        finally:
+            prof.stop()
+            with open(path, "w") as f:
+                f.write(prof.output_html())
+    else:
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield path
+        finally:
+            prof.disable()
+            prof.dump_stats(path)
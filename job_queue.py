@@ -0,0 +1,268 @@
+# job_queue.py
+"""
+Background job queue for batch uploads.
+
+Several files can be submitted at once; each becomes a Job dispatched by type to
+a worker pool: CSVs go to the scoring pool, images and videos to the OCR pool
+(OCR, then scoring). Uploaded bytes are spooled to disk, so the queue does not
+hold them in memory. CSVs are streamed through stream_engine chunk by chunk
+(progress is reported per chunk) into Parquet; media results are saved as Arrow,
+both under the job directory. Job state lives in the queue object, not in the
+Streamlit script, so progress survives reruns; only the newest MAX_FINISHED_JOBS
+finished jobs (and their files) are kept. `combined()` merges finished results
+into one frame with `source` / `source_type` columns.
+"""
+import glob
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from csv_ingest import detect_source_encoding, project_columns, read_header, resolve_text_column
+from nlp_engine import process_dataframe
+from results_store import RESULTS_DIR, open_results, save_results
+from stream_engine import DEFAULT_STREAM_CHUNKSIZE, iter_csv_chunks, process_stream
+
+JOBS_DIR = os.path.join(RESULTS_DIR, "jobs")
+DEFAULT_CSV_WORKERS = 1  # scoring already batches (and can shard across processes) inside one job
+DEFAULT_MEDIA_WORKERS = 2
+MAX_FINISHED_JOBS = 50  # older finished jobs are forgotten and their result files deleted
+STALE_JOB_FILE_S = 24 * 3600  # job files left by an earlier server process are removed after this
+IMAGE_TYPES = ("png", "jpg", "jpeg")
+VIDEO_TYPES = ("mp4", "mov")
+COMBINED_COLUMNS = ["source", "source_type", "text", "clean_text", "risk_score", "risk_category"]
+
+def job_kind(name):
+    """"csv", "image" or "video" from a file name (None if unsupported)."""
+    ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    if ext == "csv":
+        return "csv"
+    if ext in IMAGE_TYPES:
+        return "image"
+    if ext in VIDEO_TYPES:
+        return "video"
+    return None
+
+class Job:
+    """One submitted file and its progress."""
+
+    def __init__(self, job_id, name, kind, path, options):
+        self.id = job_id
+        self.name = name
+        self.kind = kind
+        self.path = path
+        self.options = options
+        self.status = "queued"  # queued -> running -> done | failed
+        self.progress = 0.0
+        self.message = "Waiting for a worker"
+        self.rows = 0
+        self.result_path = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    def as_dict(self):
+        return {"id": self.id, "name": self.name, "kind": self.kind, "status": self.status,
+                "progress": self.progress, "message": self.message, "rows": self.rows, "error": self.error,
+                "elapsed_s": (self.finished_at or time.time()) - self.submitted_at}
+
+class JobQueue:
+    """Type-routed background worker pools over a shared job table."""
+
+    def __init__(self, csv_workers=DEFAULT_CSV_WORKERS, media_workers=DEFAULT_MEDIA_WORKERS, jobs_dir=JOBS_DIR,
+                 max_finished=MAX_FINISHED_JOBS):
+        self.jobs_dir = jobs_dir
+        self.max_finished = max_finished
+        os.makedirs(jobs_dir, exist_ok=True)
+        # The job table is in memory, so files from an earlier process can no longer be reached
+        cutoff = time.time() - STALE_JOB_FILE_S
+        for path in glob.glob(os.path.join(jobs_dir, "*")):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+        self._pools = {
+            "csv": ThreadPoolExecutor(max_workers=csv_workers, thread_name_prefix="sentinel-csv"),
+            "media": ThreadPoolExecutor(max_workers=media_workers, thread_name_prefix="sentinel-ocr"),
+        }
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def submit(self, name, data, **options):
+        """
+        Queue one file.
+
+        Args:
+            name (str): File name (its extension selects the job type).
+            data (bytes): File contents.
+            **options: text_column for CSVs, video OCR settings for videos, and score_kwargs
+                forwarded to process_dataframe.
+
+        Returns:
+            str: Job id.
+        """
+        kind = job_kind(name)
+        if kind is None:
+            raise ValueError(f"Unsupported file type: {name}")
+        job_id = f"{int(time.time())}-{next(self._ids)}"
+        path = os.path.join(self.jobs_dir, f"{job_id}__{os.path.basename(name)}")
+        with open(path, "wb") as f:
+            f.write(data)
+        job = Job(job_id, name, kind, path, options)
+        with self._lock:
+            self._jobs[job_id] = job
+        self._pools["csv" if kind == "csv" else "media"].submit(self._run, job)
+        return job_id
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self, job_ids=None):
+        """Job status dicts (all jobs, or the given ids in order)."""
+        with self._lock:
+            jobs = list(self._jobs.values()) if job_ids is None else [self._jobs[i] for i in job_ids if i in self._jobs]
+            return [job.as_dict() for job in jobs]
+
+    def pending(self, job_ids=None):
+        return any(j["status"] in ("queued", "running") for j in self.jobs(job_ids))
+
+    def result(self, job_id):
+        """Scored frame of a finished job (read back from its Arrow/Parquet file), or None."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status != "done":
+            return None
+        return open_results(job.result_path)
+
+    def combined(self, job_ids=None):
+        """Finished jobs' rows merged into one frame (COMBINED_COLUMNS plus shared extra columns)."""
+        frames = []
+        for info in self.jobs(job_ids):
+            if info["status"] != "done":
+                continue
+            df = self.result(info["id"])
+            if df is None:  # pruned since jobs() was read
+                continue
+            df.insert(0, "source_type", info["kind"])
+            df.insert(0, "source", info["name"])
+            frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=COMBINED_COLUMNS)
+        shared = [c for c in frames[0].columns if all(c in f.columns for f in frames)]
+        columns = COMBINED_COLUMNS + [c for c in shared if c not in COMBINED_COLUMNS]
+        return pd.concat([f.reindex(columns=columns) for f in frames], ignore_index=True)
+
+    def shutdown(self, wait=False):
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    # ---- workers ----
+
+    def _update(self, job, **fields):
+        with self._lock:
+            for key, value in fields.items():
+                setattr(job, key, value)
+
+    def _run(self, job):
+        self._update(job, status="running", message="Starting")
+        try:
+            handler = {"csv": self._process_csv, "image": self._process_image, "video": self._process_video}[job.kind]
+            result_path, rows = handler(job)
+            self._update(job, status="done", progress=1.0, message=f"{rows:,} rows scored", rows=rows,
+                         result_path=result_path, finished_at=time.time())
+        except Exception as e:
+            self._update(job, status="failed", message="Failed", error=str(e), finished_at=time.time())
+            for partial in glob.glob(os.path.join(self.jobs_dir, f"{job.id}.*")):
+                try:
+                    os.remove(partial)
+                except OSError:
+                    pass
+        finally:
+            try:
+                os.remove(job.path)
+            except OSError:
+                pass
+            self._prune()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond `max_finished` and delete their result files."""
+        with self._lock:
+            finished = sorted((j for j in self._jobs.values() if j.status in ("done", "failed")),
+                              key=lambda j: j.finished_at)
+            expired = finished[:max(0, len(finished) - self.max_finished)]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            if job.result_path:
+                try:
+                    os.remove(job.result_path)
+                except OSError:
+                    pass
+
+    def _save(self, job, df):
+        path = save_results(df, os.path.join(self.jobs_dir, f"{job.id}.arrow"),
+                            metadata={"name": job.name, "kind": job.kind, "rows": len(df)})
+        return path, len(df)
+
+    def _score_kwargs(self, job):
+        skip = {"text_column", "frame_interval", "max_frames", "workers", "hash_threshold"}
+        return {k: v for k, v in job.options.items() if k not in skip}
+
+    def _process_csv(self, job):
+        self._update(job, message="Reading CSV", progress=0.02)
+        requested = job.options.get("text_column", "text")
+        encoding = detect_source_encoding(job.path)
+        header = read_header(job.path, encoding=encoding)
+        text_column = resolve_text_column(header, requested)
+        if text_column is None:
+            raise ValueError(f"Column '{requested}' not found.")
+        size = max(os.path.getsize(job.path), 1)
+
+        with open(job.path, "rb") as f:
+            def chunks():
+                # The combined view expects the source text under "text"
+                for chunk in iter_csv_chunks(f, chunksize=DEFAULT_STREAM_CHUNKSIZE, encoding=encoding,
+                                             usecols=project_columns(header, text_column) or None):
+                    if text_column == "clean_text":
+                        if "text" not in chunk.columns:
+                            chunk["text"] = chunk["clean_text"]  # no raw text column: show the cleaned text
+                    elif text_column != "text":
+                        chunk = chunk.drop(columns=["text"], errors="ignore").rename(columns={text_column: "text"})
+                    yield chunk
+
+            def progress(summary):
+                # Bytes consumed by the reader stand in for the (unknown) total row count
+                self._update(job, progress=0.05 + 0.9 * min(f.tell() / size, 1.0), rows=summary.rows,
+                             message=f"Scored {summary.rows:,} rows")
+
+            summary = process_stream(chunks(), os.path.join(self.jobs_dir, f"{job.id}.parquet"),
+                                     text_column="text", progress_callback=progress, **self._score_kwargs(job))
+        if not summary.rows:
+            # No chunks means no Parquet file was written
+            return self._save(job, pd.DataFrame(columns=["text", "clean_text", "risk_score", "risk_category"]))
+        return summary.output_path, summary.rows
+
+    def _process_image(self, job):
+        from ocr_engine import extract_text
+        self._update(job, message="Running OCR", progress=0.1)
+        with open(job.path, "rb") as f:
+            text = extract_text(f.read())
+        self._update(job, message="Scoring extracted text", progress=0.7)
+        return self._save(job, process_dataframe(pd.DataFrame({"text": [text or ""]}), text_column="text",
+                                                 **self._score_kwargs(job)))
+
+    def _process_video(self, job):
+        from video_engine import extract_video_text
+        self._update(job, message="Decoding and OCR-ing frames", progress=0.1)
+        video_options = {k: job.options[k] for k in ("frame_interval", "max_frames", "workers", "hash_threshold")
+                         if k in job.options}
+        result = extract_video_text(job.path, **video_options)
+        self._update(job, message="Scoring extracted text", progress=0.7)
+        segments = pd.DataFrame(result["segments"])
+        if segments.empty:
+            segments = pd.DataFrame({"text": [result["text"] or ""]})
+        return self._save(job, process_dataframe(segments, text_column="text", **self._score_kwargs(job)))
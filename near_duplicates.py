@@ -0,0 +1,141 @@
+# near_duplicates.py
+"""
+Near-duplicate clustering with MinHash + LSH.
+
+Retweets and copy-pasted posts differ only by a handle, an "RT @user:" prefix or
+punctuation, so their cleaned texts are near-identical but not equal. Each cleaned
+text is reduced to word k-gram shingles (a leading "rt <handle>" is dropped), then
+to a MinHash signature; LSH banding proposes candidate pairs, which are kept when
+their estimated Jaccard similarity is >= the threshold. Connected components of the
+kept pairs are the clusters.
+
+Exact duplicates are collapsed first, so signatures are only computed per distinct
+text. All hashing is vectorized with numpy in chunks.
+"""
+import zlib
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    SCIPY_AVAILABLE = True
+except Exception:
+    SCIPY_AVAILABLE = False
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE_SIZE = 3
+_PRIME = np.uint64(4294967311)  # > 2**32, so (a * h + b) % p stays a universal hash of 32-bit h
+_SHINGLES_PER_CHUNK = 100_000
+
+def shingles(text, k=DEFAULT_SHINGLE_SIZE):
+    """32-bit hashes of the word k-grams of a cleaned text (retweet prefix removed)."""
+    tokens = text.split()
+    if tokens[:1] == ["rt"]:
+        tokens = tokens[2:]
+    tokens = [t for t in tokens if t != "rt"]
+    if len(tokens) < k:
+        return [zlib.crc32(" ".join(tokens).encode("utf-8"))]
+    return list({zlib.crc32(" ".join(tokens[i:i + k]).encode("utf-8")) for i in range(len(tokens) - k + 1)})
+
+def lsh_params(threshold, num_perm):
+    """(bands, rows) whose S-curve midpoint (1/b)^(1/r) is closest to `threshold`."""
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        err = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or err < best[0]:
+            best = (err, bands, rows)
+    return best[1], best[2]
+
+def minhash_signatures(texts, num_perm=DEFAULT_NUM_PERM, k=DEFAULT_SHINGLE_SIZE, seed=1):
+    """(len(texts), num_perm) uint64 MinHash signatures."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 31, size=num_perm, dtype=np.uint64)[:, None]
+    b = rng.integers(0, 2 ** 31, size=num_perm, dtype=np.uint64)[:, None]
+    sigs = np.empty((len(texts), num_perm), dtype=np.uint64)
+
+    start = 0
+    while start < len(texts):
+        hashes, offsets, n = [], [], 0
+        end = start
+        while end < len(texts) and n < _SHINGLES_PER_CHUNK:
+            doc = shingles(texts[end], k)
+            offsets.append(n)
+            hashes.extend(doc)
+            n += len(doc)
+            end += 1
+        h = np.asarray(hashes, dtype=np.uint64)[None, :]
+        permuted = (a * h + b) % _PRIME
+        sigs[start:end] = np.minimum.reduceat(permuted, np.asarray(offsets), axis=1).T
+        start = end
+    return sigs
+
+def _components(n, src, dst):
+    """Connected-component label per node for undirected edges src-dst."""
+    if SCIPY_AVAILABLE:
+        graph = coo_matrix((np.ones(len(src), dtype=np.int8), (src, dst)), shape=(n, n))
+        return connected_components(graph, directed=False)[1]
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for s, d in zip(src.tolist(), dst.tolist()):
+        rs, rd = find(s), find(d)
+        if rs != rd:
+            parent[max(rs, rd)] = min(rs, rd)
+    return np.array([find(x) for x in range(n)])
+
+def near_duplicate_clusters(texts, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                            shingle_size=DEFAULT_SHINGLE_SIZE):
+    """
+    Group near-duplicate texts.
+
+    Args:
+        texts (Sequence[str] or pd.Series): Cleaned texts.
+        threshold (float): Minimum estimated Jaccard similarity of shingle sets to link two texts.
+        num_perm (int): MinHash permutations (signature length).
+        shingle_size (int): Words per shingle.
+
+    Returns:
+        tuple: (cluster_ids, cluster_sizes, representatives) where cluster_ids[i] is a dense id
+        in order of first appearance, cluster_sizes[i] the size of row i's cluster, and
+        representatives[c] the position of cluster c's first row.
+    """
+    texts = pd.Series(texts).fillna("").astype(str).to_numpy()
+    if len(texts) == 0:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty
+
+    # Exact duplicates share a code; only distinct texts are MinHashed
+    codes, distinct = pd.factorize(texts, sort=False)
+    labels = np.arange(len(distinct))
+    if len(distinct) > 1:
+        sigs = minhash_signatures(list(distinct), num_perm=num_perm, k=shingle_size)
+        bands, rows = lsh_params(threshold, num_perm)
+        mult = np.random.default_rng(7).integers(1, 2 ** 63, size=rows, dtype=np.uint64) | np.uint64(1)
+        src, dst = [], []
+        with np.errstate(over="ignore"):
+            for band in range(bands):
+                keys = (sigs[:, band * rows:(band + 1) * rows] * mult).sum(axis=1)
+                bucket, _ = pd.factorize(keys)
+                _, first = np.unique(bucket, return_index=True)
+                leader = first[bucket]
+                cand = np.flatnonzero(leader != np.arange(len(leader)))
+                if len(cand):
+                    similar = (sigs[leader[cand]] == sigs[cand]).mean(axis=1) >= threshold
+                    src.append(leader[cand][similar])
+                    dst.append(cand[similar])
+        if src:
+            labels = _components(len(distinct), np.concatenate(src), np.concatenate(dst))
+
+    cluster_ids, _ = pd.factorize(labels[codes], sort=False)
+    _, representatives = np.unique(cluster_ids, return_index=True)
+    cluster_sizes = np.bincount(cluster_ids)[cluster_ids]
+    return cluster_ids, cluster_sizes, representatives
@@ -1,36 +1,304 @@
 # nlp_engine.py
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 from data_loader import load_hate_speech, load_terrorism, load_uploaded_dataset
+from risk_cache import RiskCache
+from text_cleaning import add_clean_text
+from instrumentation import span
+from near_duplicates import near_duplicate_clusters
+from prefilter import make_prefilter
+from risk_backends import MAX_TOKENS, MODEL_NAME, make_backend, to_risk as _to_risk
 
-# Optional: you can import transformers or other NLP libraries if needed
-from transformers import pipeline
+# transformers/torch/onnxruntime are imported lazily by the backends so that importing this
+# module (e.g. just for categorize_risk) stays cheap.
 
-# Initialize a sentiment/risk pipeline
-# You can replace this with a proper terrorism detection model
-risk_pipeline = pipeline("text-classification", model="distilbert-base-uncased-finetuned-sst-2-english")
+# Backend selection: "transformers" (fp32), "torch-int8", "onnx" or "onnx-int8"
+BACKEND = os.environ.get("SENTINEL_X_BACKEND", "transformers")
+INTRA_OP_THREADS = int(os.environ.get("SENTINEL_X_INTRA_OP_THREADS", "0")) or None
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_NUM_WORKERS = 0
+DEFAULT_NUM_PROCESSES = 1
+DEFAULT_CHUNK_SIZE = 1024
+# Cascade: rows the first-stage prefilter scores below `low` (or at/above `high`, if set) are decided there
+DEFAULT_PREFILTER_BAND = (0.25, None)
 
-def calculate_risk(df, text_column='clean_text'):
-    """Calculate risk scores for each post using a simple NLP model."""
-    df = df.copy()
-    risk_scores = []
+_backends = {}
+_backends_lock = threading.Lock()
+_risk_caches = {}
+_prefilters = {}
+_pool = None
+_pool_config = None
+_pool_lock = threading.Lock()
 
-    for text in df[text_column]:
-        # For demo purposes, using a sentiment model to simulate risk
+def get_backend(name=None):
+    """Process-wide scoring backend (default: the configured BACKEND); the model loads on first use."""
+    name = name or BACKEND
+    if name not in _backends:
+        with _backends_lock:
+            if name not in _backends:
+                _backends[name] = make_backend(name, MODEL_NAME, intra_op_threads=INTRA_OP_THREADS)
+    return _backends[name]
+
+def set_backend(name, intra_op_threads=None):
+    """Switch the default scoring backend (and optionally its intra-op thread count)."""
+    global BACKEND, INTRA_OP_THREADS
+    make_backend(name)  # validate the name before touching state
+    with _backends_lock:
+        if intra_op_threads is not None and intra_op_threads != INTRA_OP_THREADS:
+            INTRA_OP_THREADS = intra_op_threads
+            _backends.clear()
+        BACKEND = name
+
+def get_risk_pipeline():
+    """Process-wide fp32 transformers pipeline (the reference backend), built on first use."""
+    return get_backend("transformers").pipeline
+
+def warm_up(background=True, backend=None):
+    """
+    Load the model and run one tiny inference ahead of the first real request.
+
+    Args:
+        background (bool): Run in a daemon thread and return it; otherwise block.
+        backend (str, optional): Backend to warm (default: the configured one).
+
+    Returns:
+        threading.Thread or None
+    """
+    def _load():
         try:
-            result = risk_pipeline(text[:512])[0]  # limit text length
-            score = result['score']
-            if result['label'] == 'NEGATIVE':
-                score = score
-            else:
-                score = 1 - score
+            get_backend(backend).predict(["warm up"])
+        except Exception as e:
+            print(f"Risk model warm-up failed: {e}")
+
+    if not background:
+        _load()
+        return None
+    thread = threading.Thread(target=_load, name="sentinel-x-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def __getattr__(name):
+    # Backward compat: `nlp_engine.risk_pipeline` used to be a module-level global
+    if name == "risk_pipeline":
+        return get_risk_pipeline()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _length_sorted_order(texts, backend):
+    """Return indices of `texts` ordered by truncated token length (shortest first)."""
+    encoded = backend.tokenizer(texts, truncation=True, max_length=MAX_TOKENS)
+    lengths = [len(ids) for ids in encoded['input_ids']]
+    return sorted(range(len(texts)), key=lengths.__getitem__)
+
+def _model_scores(texts, batch_size, num_workers, backend):
+    """Run the backend over plain strings in length-sorted batches; scores in input order (None if a row failed)."""
+    scores = [None] * len(texts)
+    order = _length_sorted_order(texts, backend)
+    for start in range(0, len(order), batch_size):
+        batch_idx = order[start:start + batch_size]
+        batch = [texts[i] for i in batch_idx]
+        try:
+            for i, score in zip(batch_idx, backend.predict(batch, batch_size=batch_size, num_workers=num_workers)):
+                scores[i] = score
         except Exception:
-            score = 0.0
-        risk_scores.append(score)
+            # Fall back to one-by-one so a single bad row doesn't zero the whole batch
+            for i in batch_idx:
+                try:
+                    scores[i] = backend.predict([texts[i]])[0]
+                except Exception:
+                    pass  # left as None: scored 0.0 in the output but never cached
+    return scores
+
+def _init_worker(backend_name, intra_op_threads):
+    """Process-pool initializer: pin the backend and load the model once per worker."""
+    set_backend(backend_name, intra_op_threads)
+    get_backend().load()
+
+def _score_chunk(texts, batch_size):
+    """Worker task: score one shard with the worker's already-loaded backend."""
+    return _model_scores(texts, batch_size, 0, get_backend())
+
+def _get_pool(num_processes, backend_name):
+    """Long-lived process pool, rebuilt only when its size or backend changes."""
+    global _pool, _pool_config
+    # Split the cores between workers so N torch thread pools don't oversubscribe the box
+    threads = INTRA_OP_THREADS or max(1, (os.cpu_count() or 1) // num_processes)
+    config = (num_processes, backend_name, threads)
+    with _pool_lock:
+        if _pool is None or _pool_config != config:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn, not fork: forking a process that already holds torch threads can deadlock
+            _pool = ProcessPoolExecutor(
+                max_workers=num_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(backend_name, threads),
+            )
+            _pool_config = config
+        return _pool
+
+def shutdown_pool():
+    """Stop the scoring process pool (it is otherwise kept warm between calls)."""
+    global _pool, _pool_config
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool, _pool_config = None, None
+
+atexit.register(shutdown_pool)
+
+def _parallel_model_scores(texts, batch_size, num_processes, chunk_size, backend_name):
+    """Shard `texts` into chunks, score them in the process pool, and concatenate in order."""
+    pool = _get_pool(num_processes, backend_name)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    scores = []
+    for chunk_scores in pool.map(_score_chunk, chunks, [batch_size] * len(chunks)):
+        scores.extend(chunk_scores)
+    return scores
+
+def get_risk_cache(backend=None):
+    """Process-wide score cache for a backend's model (created on first use)."""
+    model_id = get_backend(backend).model_id
+    if model_id not in _risk_caches:
+        _risk_caches[model_id] = RiskCache(model_id)
+    return _risk_caches[model_id]
 
-    df['risk_score'] = risk_scores
+def risk_cache_stats(backend=None):
+    """Hit/miss counters of the process-wide score cache."""
+    return get_risk_cache(backend).stats()
+
+def score_texts(texts, batch_size=DEFAULT_BATCH_SIZE, num_workers=DEFAULT_NUM_WORKERS, use_cache=True,
+                backend=None, num_processes=DEFAULT_NUM_PROCESSES, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Score a sequence of texts with the risk backend in length-bucketed batches.
+
+    Texts are sorted by token length so each batch pads to a similar length,
+    truncated by the tokenizer (not by characters), and the scores are written
+    back in the original order. Duplicate texts are scored once, and with
+    `use_cache` previously seen texts are served from the score cache.
+    With `num_processes > 1` the remaining texts are sharded into `chunk_size`
+    chunks and scored in a process pool (one model per worker).
+    Non-string entries, and rows the model fails on, score 0.0; failures are not cached.
+
+    Args:
+        texts (Iterable): Texts to score.
+        batch_size (int): Texts per forward pass.
+        num_workers (int): DataLoader workers used by the pipeline for preprocessing.
+        use_cache (bool): Read/write the content-addressed score cache.
+        backend (str, optional): Scoring backend name (default: the configured BACKEND).
+        num_processes (int): Worker processes for sharded scoring (1 = in-process).
+        chunk_size (int): Texts per shard when num_processes > 1.
+
+    Returns:
+        list: Risk scores aligned with `texts`.
+    """
+    texts = list(texts)
+    scores = [0.0] * len(texts)
+    valid = [i for i, t in enumerate(texts) if isinstance(t, str)]
+    if not valid:
+        return scores
+
+    cache = get_risk_cache(backend) if use_cache else None
+    if cache is not None:
+        with span("score.cache_lookup", rows=len(valid)):
+            keys = {i: cache.key(texts[i]) for i in valid}
+            cached = cache.get_many(keys.values())
+    else:
+        keys = {i: texts[i] for i in valid}
+        cached = {}
+
+    # One model call per distinct uncached key
+    pending = {}
+    for i in valid:
+        if keys[i] not in cached:
+            pending.setdefault(keys[i], texts[i])
+    if pending:
+        pending_texts = list(pending.values())
+        with span("score.model", rows=len(pending_texts)):
+            if num_processes > 1 and len(pending_texts) > chunk_size:
+                fresh_scores = _parallel_model_scores(pending_texts, batch_size, num_processes, chunk_size,
+                                                      backend or BACKEND)
+            else:
+                fresh_scores = _model_scores(pending_texts, batch_size, num_workers, get_backend(backend))
+        fresh = dict(zip(pending, fresh_scores))
+        if cache is not None:
+            # Failed rows (None) stay out of the cache so a transient error isn't remembered as "Low"
+            cache.put_many({k: v for k, v in fresh.items() if v is not None})
+        cached.update(fresh)
+
+    for i in valid:
+        score = cached[keys[i]]
+        scores[i] = 0.0 if score is None else score
+    return scores
+
+def get_prefilter(prefilter):
+    """A first-stage scorer: a prefilter name ("lexicon", "hashed"), cached per process, or an object with .score()."""
+    if not isinstance(prefilter, str):
+        return prefilter
+    if prefilter not in _prefilters:
+        _prefilters[prefilter] = make_prefilter(prefilter)
+    return _prefilters[prefilter]
+
+def cascade_scores(texts, prefilter, band=DEFAULT_PREFILTER_BAND, **score_kwargs):
+    """
+    Two-stage scoring: a cheap prefilter over all texts, the risk model only inside the band.
+
+    Args:
+        texts (Iterable): Texts to score.
+        prefilter (str or object): First-stage scorer (see get_prefilter).
+        band (tuple): (low, high) prefilter scores; texts with low <= score < high go to the model,
+            the rest keep the prefilter score. Either bound may be None (unbounded).
+        **score_kwargs: Forwarded to score_texts for the escalated texts.
+
+    Returns:
+        tuple: (scores, stages) arrays; stages are "prefilter" or "model".
+    """
+    texts = list(texts)
+    low, high = band
+    with span("score.prefilter", rows=len(texts)):
+        cheap = np.asarray(get_prefilter(prefilter).score([t if isinstance(t, str) else "" for t in texts]),
+                           dtype=float)
+    escalate = np.ones(len(texts), dtype=bool)
+    if low is not None:
+        escalate &= cheap >= low
+    if high is not None:
+        escalate &= cheap < high
+    scores = cheap.copy()
+    idx = np.flatnonzero(escalate)
+    if len(idx):
+        scores[idx] = score_texts([texts[i] for i in idx], **score_kwargs)
+    return scores, np.where(escalate, "model", "prefilter")
+
+def _add_risk_columns(df, text_column, prefilter=None, prefilter_band=DEFAULT_PREFILTER_BAND, **score_kwargs):
+    """Add risk_score/risk_category (and risk_stage, with a prefilter) to `df` in place."""
+    # For demo purposes, using a sentiment model to simulate risk
+    with span("score", rows=len(df)):
+        if prefilter is None:
+            df['risk_score'] = score_texts(df[text_column], **score_kwargs)
+        else:
+            df['risk_score'], df['risk_stage'] = cascade_scores(df[text_column], prefilter, prefilter_band,
+                                                                **score_kwargs)
     df['risk_category'] = df['risk_score'].apply(categorize_risk)
     return df
 
+def calculate_risk(df, text_column='clean_text', batch_size=DEFAULT_BATCH_SIZE, num_workers=DEFAULT_NUM_WORKERS,
+                   use_cache=True, backend=None, num_processes=DEFAULT_NUM_PROCESSES, chunk_size=DEFAULT_CHUNK_SIZE,
+                   prefilter=None, prefilter_band=DEFAULT_PREFILTER_BAND):
+    """
+    Calculate risk scores for each post using a simple NLP model (batched, cached).
+
+    With `prefilter` ("lexicon" or "hashed"), a cheap first stage scores every row and only
+    rows inside `prefilter_band` reach the model; `risk_stage` records which stage decided.
+    """
+    return _add_risk_columns(df.copy(), text_column, batch_size=batch_size, num_workers=num_workers,
+                             use_cache=use_cache, backend=backend, num_processes=num_processes,
+                             chunk_size=chunk_size, prefilter=prefilter, prefilter_band=prefilter_band)
+
 def categorize_risk(score):
     """Categorize risk score into High, Moderate, Low."""
     if score >= 0.7:
@@ -40,11 +308,36 @@ def categorize_risk(score):
     else:
         return "Low"
 
-def process_dataframe(df, text_column='text'):
-    """Clean text column and calculate risk scores."""
-    df = df.copy()
+def process_dataframe(df, text_column='text', batch_size=DEFAULT_BATCH_SIZE, num_workers=DEFAULT_NUM_WORKERS,
+                      use_cache=True, backend=None, num_processes=DEFAULT_NUM_PROCESSES,
+                      chunk_size=DEFAULT_CHUNK_SIZE, copy=True, dedupe_threshold=None, prefilter=None,
+                      prefilter_band=DEFAULT_PREFILTER_BAND):
+    """
+    Clean text column and calculate risk scores (num_processes > 1 shards scoring across processes).
+
+    Pass copy=False to add the columns to `df` itself (used by the streaming path on chunks it owns).
+    With `dedupe_threshold` (e.g. 0.8), near-duplicate posts are clustered with MinHash/LSH, only
+    one representative per cluster is scored, and cluster_id/cluster_size columns are added.
+    `prefilter`/`prefilter_band` enable the two-stage cascade (see calculate_risk).
+    """
+    if copy:
+        df = df.copy()
     if 'clean_text' not in df.columns:
-        df['clean_text'] = df[text_column].astype(str).apply(lambda x: re.sub(r"http\S+|www\S+|https\S+", '', x))
-        df['clean_text'] = df['clean_text'].str.replace(r'\W', ' ', regex=True).str.lower().str.strip()
-    df = calculate_risk(df, text_column='clean_text')
+        add_clean_text(df, text_column)
+    score_kwargs = dict(batch_size=batch_size, num_workers=num_workers, use_cache=use_cache, backend=backend,
+                        num_processes=num_processes, chunk_size=chunk_size, prefilter=prefilter,
+                        prefilter_band=prefilter_band)
+    if dedupe_threshold is None:
+        return _add_risk_columns(df, 'clean_text', **score_kwargs)
+
+    with span("dedupe", rows=len(df)):
+        cluster_ids, cluster_sizes, representatives = near_duplicate_clusters(df['clean_text'],
+                                                                              threshold=dedupe_threshold)
+    scored = calculate_risk(df.iloc[representatives], 'clean_text', **score_kwargs)
+    df['cluster_id'] = cluster_ids
+    df['cluster_size'] = cluster_sizes
+    df['risk_score'] = scored['risk_score'].to_numpy()[cluster_ids]
+    df['risk_category'] = scored['risk_category'].to_numpy()[cluster_ids]
+    if 'risk_stage' in scored.columns:
+        df['risk_stage'] = scored['risk_stage'].to_numpy()[cluster_ids]
     return df
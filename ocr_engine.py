@@ -0,0 +1,198 @@
+# ocr_engine.py
+"""
+Shared OCR engine behind app.py, utils/ocr_utils.py and ocr_test.py.
+
+EasyOCR readers are expensive to build (detection + recognition models are loaded
+from disk), so they are kept in a small bounded pool for the life of the process
+and handed out one caller at a time. Images go in as NumPy arrays, raw encoded
+bytes, PIL images or paths; nothing is written to temp files.
+"""
+import importlib.util
+import io
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image as PILImage
+
+from instrumentation import span
+
+# EasyOCR pulls in torch, so only check it is installed here; it is imported on first use.
+EASYOCR_AVAILABLE = importlib.util.find_spec("easyocr") is not None
+CV2_AVAILABLE = False
+PYTESSERACT_AVAILABLE = False
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except Exception:
+    pass
+
+try:
+    import pytesseract
+    PYTESSERACT_AVAILABLE = True
+except Exception:
+    pass
+
+DEFAULT_LANGUAGES = ("en",)
+DEFAULT_POOL_SIZE = int(os.environ.get("SENTINEL_X_OCR_POOL_SIZE", "1"))
+MAX_POOL_SIZE = int(os.environ.get("SENTINEL_X_OCR_MAX_READERS", "4"))  # each reader is a full model in RAM
+
+class ReaderPool:
+    """
+    Bounded pool of long-lived easyocr.Reader instances (created lazily, up to `size`).
+
+    `size` starts at the base size; reserve()/release() raise it for the length of a batch
+    (capped at `max_size`), and readers above the base size are freed when the batch ends.
+    """
+
+    def __init__(self, languages=DEFAULT_LANGUAGES, gpu=False, size=DEFAULT_POOL_SIZE, max_size=MAX_POOL_SIZE):
+        self.languages = list(languages)
+        self.gpu = gpu
+        self.base_size = max(1, size)
+        self.max_size = max(self.base_size, max_size)
+        self.size = self.base_size
+        self._reservations = []
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_reader(self):
+        import easyocr
+        with span("ocr.reader_load"):
+            return easyocr.Reader(self.languages, gpu=self.gpu)
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """Borrow a reader; blocks while all `size` readers are busy."""
+        reader = None
+        try:
+            reader = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    reader = self._new_reader()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                reader = self._idle.get(timeout=timeout)
+        try:
+            yield reader
+        finally:
+            with self._lock:
+                drop = self._created > self.size
+                if drop:
+                    self._created -= 1  # the pool shrank while this reader was out
+            if not drop:
+                self._idle.put(reader)
+
+    def _resize(self):
+        # Caller holds self._lock
+        self.size = min(self.max_size, max([self.base_size, *self._reservations]))
+
+    def reserve(self, size):
+        """Allow up to `size` concurrent readers (capped at max_size) until release(size)."""
+        with self._lock:
+            self._reservations.append(size)
+            self._resize()
+        return self
+
+    def release(self, size):
+        """End a reserve(size); idle readers above the remaining size are freed."""
+        with self._lock:
+            self._reservations.remove(size)
+            self._resize()
+            while self._created > self.size:
+                try:
+                    self._idle.get_nowait()
+                except queue.Empty:
+                    break  # busy readers are dropped when they come back
+                self._created -= 1
+
+    def warm(self):
+        """Build one reader now (e.g. at app start) so the first OCR call isn't slow."""
+        with self.acquire():
+            pass
+        return self
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_reader_pool(languages=DEFAULT_LANGUAGES, gpu=False, size=DEFAULT_POOL_SIZE):
+    """Process-wide reader pool per (languages, gpu)."""
+    key = (tuple(languages), gpu)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ReaderPool(languages, gpu=gpu, size=size)
+        return _pools[key]
+
+def to_array(image):
+    """Decode bytes / PIL image / path into an RGB (or already-gray) uint8 NumPy array."""
+    if isinstance(image, np.ndarray):
+        return image
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = PILImage.open(io.BytesIO(bytes(image)))
+    elif isinstance(image, (str, os.PathLike)):
+        image = PILImage.open(image)
+    if isinstance(image, PILImage.Image):
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        return np.asarray(image)
+    raise TypeError(f"Unsupported image input: {type(image).__name__}")
+
+def ocr_easyocr(image, pool=None):
+    """Run EasyOCR on one image and return the joined text ('' on failure)."""
+    if not EASYOCR_AVAILABLE:
+        return ""
+    pool = pool or get_reader_pool()
+    try:
+        with pool.acquire() as reader, span("ocr.easyocr", rows=1):
+            return " ".join(reader.readtext(to_array(image), detail=0))
+    except Exception:
+        return ""
+
+def ocr_easyocr_batch(images, pool=None, batch_size=8):
+    """
+    EasyOCR over several images with one reader checkout.
+
+    Same-sized images (e.g. video frames) go through `readtext_batched` so the
+    recognizer sees them together; otherwise images are read one by one.
+    """
+    if not EASYOCR_AVAILABLE or not images:
+        return [""] * len(images)
+    pool = pool or get_reader_pool()
+    arrays = [to_array(im) for im in images]
+    try:
+        with pool.acquire() as reader, span("ocr.easyocr", rows=len(arrays)):
+            if len({a.shape for a in arrays}) == 1 and hasattr(reader, "readtext_batched"):
+                results = reader.readtext_batched(arrays, detail=0, batch_size=batch_size)
+            else:
+                results = [reader.readtext(a, detail=0) for a in arrays]
+        return [" ".join(r) for r in results]
+    except Exception:
+        return [ocr_easyocr(a, pool=pool) for a in arrays]
+
+def ocr_tesseract(image):
+    """OCR fallback using pytesseract if available ('' on failure)."""
+    if not PYTESSERACT_AVAILABLE:
+        return ""
+    try:
+        with span("ocr.tesseract", rows=1):
+            return pytesseract.image_to_string(to_array(image))
+    except Exception:
+        return ""
+
+def extract_text(image, pool=None):
+    """Extract text from one image (EasyOCR first, then pytesseract)."""
+    text = ocr_easyocr(image, pool=pool)
+    if not text.strip():
+        text = ocr_tesseract(image)
+    return text
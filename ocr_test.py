@@ -1,9 +1,7 @@
 import streamlit as st
-import easyocr
 from PIL import Image
 import numpy as np
-import pytesseract
-import cv2
+from ocr_engine import EASYOCR_AVAILABLE, get_reader_pool, ocr_easyocr, ocr_tesseract
 
 st.set_page_config(page_title="🧠 Sentinel-X OCR Module", layout="centered")
 st.title("🧠 Sentinel-X OCR Test Module")
@@ -13,35 +11,30 @@ st.title("🧠 Sentinel-X OCR Test Module")
 # -------------------------------
 @st.cache_resource(show_spinner=True)
 def load_reader_safe():
+    if not EASYOCR_AVAILABLE:
+        return None
     try:
-        return easyocr.Reader(['en'], gpu=False)
+        return get_reader_pool().warm()
     except Exception as e:
         st.error(f"Failed to load EasyOCR Reader: {e}")
         return None
 
-reader = load_reader_safe()
+reader_pool = load_reader_safe()
 
 # -------------------------------
 # OCR extraction function with fallback
 # -------------------------------
 def extract_text_with_fallback(image_np):
     # Try EasyOCR first
-    if reader:
-        try:
-            results = reader.readtext(image_np)
-            if results:
-                # Combine all detected text
-                return " ".join([text for (_, text, _) in results])
-        except Exception:
-            st.warning("EasyOCR failed, falling back to pytesseract.")
+    if reader_pool:
+        text = ocr_easyocr(image_np, pool=reader_pool)
+        if text.strip():
+            return text
+        st.warning("EasyOCR found no text, falling back to pytesseract.")
 
     # Fallback to pytesseract
-    try:
-        img_bgr = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
-        text = pytesseract.image_to_string(img_bgr)
-        return text if text.strip() else "⚠️ No text extracted by pytesseract."
-    except Exception as e:
-        return f"❌ OCR failed completely: {e}"
+    text = ocr_tesseract(image_np)
+    return text if text.strip() else "⚠️ No text extracted by pytesseract."
 
 # -------------------------------
 # File uploader
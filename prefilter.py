@@ -0,0 +1,179 @@
+# prefilter.py
+"""
+Cheap first-stage risk scorers for the scoring cascade in nlp_engine.
+
+Both scorers map cleaned texts to a score in [0, 1] over a whole batch at once:
+
+* LexiconPrefilter: whole-word hits against a keyword lexicon (Aho-Corasick via
+  pyahocorasick when installed, otherwise one vectorized regex count), score = 1 - 0.5**hits.
+* HashedLinearPrefilter: logistic regression on hashed unigram/bigram features
+  (SciPy sparse), usually fitted to the transformer's own scores on a sample
+  (see benchmarks/bench_cascade.py) and saved to PREFILTER_MODEL_PATH.
+
+Rows the first stage scores below the cascade band are decided there; the rest
+go on to the transformer.
+"""
+import os
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from risk_cache import DEFAULT_CACHE_DIR
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except Exception:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import scipy.sparse as sp
+    SCIPY_AVAILABLE = True
+except Exception:
+    SCIPY_AVAILABLE = False
+
+PREFILTER_MODEL_PATH = os.environ.get(
+    "SENTINEL_X_PREFILTER_MODEL", os.path.join(DEFAULT_CACHE_DIR, "prefilter_hashed.npz")
+)
+LEXICON_PATH = os.environ.get("SENTINEL_X_LEXICON")  # optional: one term per line
+_NON_WORD = re.compile(r"\W+")
+
+# Hostile / threatening / strongly negative vocabulary; replace via LEXICON_PATH or `terms=`
+DEFAULT_LEXICON = [
+    "kill", "killed", "killing", "murder", "shoot", "shooting", "gun", "guns", "bomb", "bombing", "attack",
+    "attacks", "explosive", "weapon", "weapons", "terror", "terrorist", "terrorism", "jihad", "isis",
+    "behead", "massacre", "execute", "destroy", "burn", "die", "dead", "death", "war", "violence", "violent",
+    "threat", "threaten", "hate", "hateful", "enemy", "enemies", "revenge", "fight", "blood", "hurt",
+    "stupid", "idiot", "ugly", "disgusting", "worst", "awful", "terrible", "horrible", "bad", "trash",
+    "sick", "angry", "evil", "shit", "fuck", "fucking", "damn", "hell", "bitch", "hoe", "hoes",
+    "recruit", "recruitment", "radical", "extremist", "martyr", "infidel", "kafir",
+]
+
+def load_lexicon(path=LEXICON_PATH):
+    """Lexicon terms from a file (one per line), or DEFAULT_LEXICON."""
+    if not path:
+        return list(DEFAULT_LEXICON)
+    with open(path, encoding="utf-8") as f:
+        return [line.strip().lower() for line in f if line.strip() and not line.startswith("#")]
+
+def normalize_text(text):
+    """Lowercase, with each run of non-word characters (punctuation, whitespace) turned into one space."""
+    return _NON_WORD.sub(" ", text.lower()).strip() if isinstance(text, str) else ""
+
+class LexiconPrefilter:
+    """
+    Whole-word keyword hits; score = 1 - 0.5**hits.
+
+    Texts and terms are both passed through normalize_text, so punctuation separates
+    words the same way on the Aho-Corasick and regex paths and both give equal counts
+    (for single-word terms; a multi-word term overlapping another term counts once per
+    term on the Aho-Corasick path).
+    """
+
+    name = "lexicon"
+
+    def __init__(self, terms=None):
+        self.terms = sorted({normalize_text(t) for t in (terms if terms is not None else load_lexicon())} - {""})
+        self._automaton = None
+        if AHOCORASICK_AVAILABLE:
+            automaton = ahocorasick.Automaton()
+            for term in self.terms:
+                # Space-padded so only whole words of the (space-separated) normalized text match
+                automaton.add_word(f" {term} ", term)
+            automaton.make_automaton()
+            self._automaton = automaton
+        self._pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, self.terms)) + r")\b") if self.terms else None
+
+    def hits(self, texts):
+        """Lexicon hits per text (int array)."""
+        if self._pattern is None:
+            return np.zeros(len(texts), dtype=np.int64)
+        texts = [normalize_text(t) for t in texts]
+        if self._automaton is not None:
+            return np.fromiter((sum(1 for _ in self._automaton.iter(f" {t} ")) for t in texts),
+                               dtype=np.int64, count=len(texts))
+        return pd.Series(texts, dtype=object).str.count(self._pattern).to_numpy()
+
+    def score(self, texts):
+        return 1.0 - np.power(0.5, self.hits(texts))
+
+class HashedLinearPrefilter:
+    """Logistic regression over hashed unigram + bigram counts."""
+
+    name = "hashed"
+
+    def __init__(self, n_features=2 ** 18, weights=None, bias=0.0):
+        if not SCIPY_AVAILABLE:
+            raise ImportError("HashedLinearPrefilter needs scipy.")
+        self.n_features = n_features
+        self.weights = np.zeros(n_features) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+
+    def features(self, texts):
+        """CSR matrix (len(texts) x n_features), rows L2-normalized."""
+        indptr, indices = [0], []
+        for text in texts:
+            tokens = text.split() if isinstance(text, str) else []
+            grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            indices.extend(zlib.crc32(g.encode("utf-8")) % self.n_features for g in grams)
+            indptr.append(len(indices))
+        data = np.ones(len(indices))
+        X = sp.csr_matrix((data, np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+                          shape=(len(texts), self.n_features))
+        X.sum_duplicates()
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.diags(1.0 / norms) @ X
+
+    def score(self, texts):
+        logits = self.features(texts) @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def fit(self, texts, targets, epochs=10, learning_rate=2.0, l2=1e-6, batch_size=4096, seed=0):
+        """
+        Fit to (soft) targets in [0, 1] with mini-batch gradient descent on log loss.
+
+        Args:
+            texts (Sequence[str]): Cleaned texts.
+            targets (Sequence[float]): Labels or the full model's risk scores (distillation).
+        """
+        X = self.features(texts)
+        y = np.asarray(targets, dtype=np.float64)
+        rng = np.random.default_rng(seed)
+        for _ in range(epochs):
+            order = rng.permutation(X.shape[0])
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                Xb = X[batch]
+                p = 1.0 / (1.0 + np.exp(-(Xb @ self.weights + self.bias)))
+                err = p - y[batch]
+                self.weights -= learning_rate * ((Xb.T @ err) / len(batch) + l2 * self.weights)
+                self.bias -= learning_rate * err.mean()
+        return self
+
+    def save(self, path=PREFILTER_MODEL_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, n_features=self.n_features)
+        return path
+
+    @classmethod
+    def load(cls, path=PREFILTER_MODEL_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"No hashed prefilter model at {path}. Train one with: python -m benchmarks.bench_cascade --save-model"
+            )
+        data = np.load(path)
+        return cls(n_features=int(data["n_features"]), weights=data["weights"], bias=float(data["bias"]))
+
+PREFILTERS = {
+    "lexicon": LexiconPrefilter,
+    "hashed": HashedLinearPrefilter.load,
+}
+
+def make_prefilter(name):
+    """Instantiate a first-stage scorer by name."""
+    if name not in PREFILTERS:
+        raise ValueError(f"Unknown prefilter '{name}'. Choose one of: {', '.join(PREFILTERS)}")
+    return PREFILTERS[name]()
@@ -0,0 +1,149 @@
+# results_store.py
+"""
+Columnar storage for processed results.
+
+Scored DataFrames are saved as Arrow IPC (uncompressed, so they can be memory-mapped)
+or Parquet, with `risk_category` stored as a dictionary-encoded categorical. The
+dashboard keeps one result per (dataset hash, text column) under RESULTS_DIR and
+reopens it directly instead of re-reading and re-scoring the raw CSV.
+Exports are written to disk in row chunks, never built as one big in-memory string.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+
+import pandas as pd
+
+from risk_cache import DEFAULT_CACHE_DIR
+
+RESULTS_DIR = os.path.join(DEFAULT_CACHE_DIR, "results")
+STREAMS_DIR = os.path.join(RESULTS_DIR, "streams")
+MAX_STREAM_OUTPUTS = 8
+RISK_CATEGORIES = ["Low", "Moderate", "High"]
+DEFAULT_EXPORT_CHUNK_ROWS = 50_000
+
+def _to_columnar(df):
+    """Compact dtypes for storage: risk_category as an ordered categorical (Arrow dictionary)."""
+    df = df.copy(deep=False)
+    if "risk_category" in df.columns:
+        df["risk_category"] = pd.Categorical(df["risk_category"], categories=RISK_CATEGORIES, ordered=True)
+    return df
+
+def save_results(df, path, fmt=None, metadata=None):
+    """
+    Write a processed DataFrame to Arrow IPC (.arrow) or Parquet (.parquet).
+
+    Args:
+        df (pd.DataFrame): Processed results.
+        path (str): Destination; format inferred from the extension if `fmt` is None.
+        fmt (str, optional): "arrow" or "parquet".
+        metadata (dict, optional): JSON-serializable info stored in the schema metadata.
+
+    Returns:
+        str: `path`.
+    """
+    import pyarrow as pa
+
+    fmt = fmt or ("parquet" if path.endswith(".parquet") else "arrow")
+    table = pa.Table.from_pandas(_to_columnar(df), preserve_index=False)
+    if metadata:
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), b"sentinel_x": json.dumps(metadata).encode("utf-8")}
+        )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, tmp)
+    else:
+        # Uncompressed IPC file: buffers can be mapped straight from disk
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+    return path
+
+def open_results(path, columns=None):
+    """
+    Reopen saved results as a DataFrame.
+
+    The file is read through a memory map (no read() into a buffer first), but
+    `to_pandas` still copies the columns into pandas memory.
+    """
+    import pyarrow as pa
+
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    else:
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+    return table.to_pandas()
+
+def read_metadata(path):
+    """The `metadata` dict given to save_results (or {})."""
+    import pyarrow as pa
+
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        schema = pq.read_schema(path)
+    else:
+        with pa.memory_map(path, "r") as source:
+            schema = pa.ipc.open_file(source).schema
+    raw = (schema.metadata or {}).get(b"sentinel_x")
+    return json.loads(raw) if raw else {}
+
+def result_path(dataset_hash, text_column, fmt="arrow"):
+    """Store location for one (dataset, text column) result."""
+    return os.path.join(RESULTS_DIR, f"{dataset_hash}__{safe_name(text_column)}.{fmt}")
+
+def safe_name(value):
+    """Filesystem-safe token for a user-supplied name (slug plus a short hash, so distinct values never collide)."""
+    value = str(value)
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", value).strip("_")[:40] or "col"
+    return f"{slug}-{hashlib.sha1(value.encode('utf-8')).hexdigest()[:8]}"
+
+def stream_output_path(dataset_hash, text_column):
+    """Scored CSV written by the dashboard's streaming mode for one (dataset, text column)."""
+    return os.path.join(STREAMS_DIR, f"{dataset_hash}__{safe_name(text_column)}.csv")
+
+def prune_files(pattern, keep):
+    """Delete all but the `keep` most recently modified files matching a glob pattern."""
+    paths = sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)
+    for path in paths[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def list_results():
+    """Saved results, newest first: [{"path", "name", "rows", "saved_at"}]."""
+    entries = []
+    for path in glob.glob(os.path.join(RESULTS_DIR, "*.arrow")) + glob.glob(os.path.join(RESULTS_DIR, "*.parquet")):
+        try:
+            meta = read_metadata(path)
+        except Exception:
+            continue
+        entries.append({"path": path, "name": meta.get("name", os.path.basename(path)),
+                        "rows": meta.get("rows"), "saved_at": meta.get("saved_at", os.path.getmtime(path))})
+    return sorted(entries, key=lambda e: e["saved_at"], reverse=True)
+
+def store_results(df, dataset_hash, text_column, name):
+    """Save results into RESULTS_DIR with descriptive metadata; returns the path."""
+    meta = {"name": name, "rows": len(df), "text_column": text_column, "saved_at": time.time()}
+    return save_results(df, result_path(dataset_hash, text_column), metadata=meta)
+
+def export_csv(df, path, chunk_rows=DEFAULT_EXPORT_CHUNK_ROWS):
+    """Write CSV in row chunks so the whole file never exists as one string in memory."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        for start in range(0, len(df), chunk_rows):
+            df.iloc[start:start + chunk_rows].to_csv(f, header=(start == 0), index=False)
+        if len(df) == 0:
+            df.head(0).to_csv(f, index=False)
+    os.replace(tmp, path)  # an interrupted export never leaves a truncated file that looks current
+    return path
@@ -0,0 +1,263 @@
+# risk_backends.py
+"""
+Pluggable scoring backends for the risk model.
+
+Every backend exposes the same small surface used by nlp_engine:
+  - `tokenizer`        a Hugging Face tokenizer (used for length bucketing)
+  - `predict(texts)`   risk scores (P(NEGATIVE)) for a list of strings
+  - `model_id`         identifier mixed into score-cache keys
+
+Backends:
+  - "transformers"  fp32 PyTorch pipeline (reference)
+  - "torch-int8"    same model with dynamic int8 quantization of the Linear layers
+  - "onnx"          exported ONNX graph on ONNX Runtime (CPU)
+  - "onnx-int8"     exported ONNX graph, dynamically quantized to int8
+"""
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from instrumentation import recorder, span
+
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+MAX_TOKENS = 512  # DistilBERT position-embedding limit
+ONNX_CACHE_DIR = os.path.join(
+    os.environ.get("SENTINEL_X_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "sentinel_x")), "onnx"
+)
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive inter-process lock on `path` (a lock file), so concurrent workers export once."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a+b") as f:
+        try:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+        except ImportError:  # Windows
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.1)  # LK_LOCK gives up after ~10 s; keep waiting for the exporter
+        try:
+            yield
+        finally:
+            try:
+                import fcntl
+                fcntl.flock(f, fcntl.LOCK_UN)
+            except ImportError:
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _temp_path(path):
+    """A fresh temp file next to `path` (same filesystem, so os.replace is atomic)."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".onnx.tmp")
+    os.close(fd)
+    return tmp
+
+def to_risk(result):
+    """Map a sentiment prediction to a risk score (NEGATIVE => risky)."""
+    score = result['score']
+    if result['label'] == 'NEGATIVE':
+        return score
+    return 1 - score
+
+class TransformersBackend:
+    """fp32 transformers pipeline (the original scoring path)."""
+
+    name = "transformers"
+
+    def __init__(self, model_name=MODEL_NAME, intra_op_threads=None):
+        self.model_name = model_name
+        self.intra_op_threads = intra_op_threads
+        self._pipeline = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self):
+        return f"{self.model_name}@{self.name}"
+
+    @property
+    def pipeline(self):
+        if self._pipeline is None:
+            with self._lock:
+                if self._pipeline is None:
+                    t0 = time.perf_counter()
+                    with span("model_load"):
+                        self._pipeline = self._build()
+                    recorder.set_value(f"model_load_s[{self.name}]", time.perf_counter() - t0)
+        return self._pipeline
+
+    @property
+    def tokenizer(self):
+        return self.pipeline.tokenizer
+
+    def load(self):
+        """Build the model now rather than on first predict."""
+        self.pipeline
+        return self
+
+    def _set_threads(self):
+        if self.intra_op_threads:
+            import torch
+            # Note: torch's intra-op pool is process-wide
+            torch.set_num_threads(self.intra_op_threads)
+
+    def _build(self):
+        from transformers import pipeline
+        self._set_threads()
+        return pipeline("text-classification", model=self.model_name)
+
+    def predict(self, texts, batch_size=32, num_workers=0):
+        results = self.pipeline(list(texts), batch_size=batch_size, num_workers=num_workers,
+                                truncation=True, max_length=MAX_TOKENS)
+        return [to_risk(r) for r in results]
+
+class TorchInt8Backend(TransformersBackend):
+    """Same pipeline with `torch.quantization.quantize_dynamic` applied to Linear layers."""
+
+    name = "torch-int8"
+
+    def _build(self):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+        self._set_threads()
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name).eval()
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        return pipeline("text-classification", model=model, tokenizer=tokenizer)
+
+class OnnxBackend:
+    """Model exported to ONNX (once, cached on disk) and run on ONNX Runtime's CPU provider."""
+
+    name = "onnx"
+    quantize = False
+
+    def __init__(self, model_name=MODEL_NAME, intra_op_threads=None):
+        self.model_name = model_name
+        self.intra_op_threads = intra_op_threads
+        self._session = None
+        self._tokenizer = None
+        self._negative_idx = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self):
+        return f"{self.model_name}@{self.name}"
+
+    @property
+    def tokenizer(self):
+        self.load()
+        return self._tokenizer
+
+    def load(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    t0 = time.perf_counter()
+                    with span("model_load"):
+                        self._build()
+                    recorder.set_value(f"model_load_s[{self.name}]", time.perf_counter() - t0)
+        return self
+
+    def _onnx_path(self):
+        safe = self.model_name.replace("/", "__")
+        return os.path.join(ONNX_CACHE_DIR, f"{safe}{'.int8' if self.quantize else ''}.onnx")
+
+    def _export(self, path):
+        """
+        Export (and quantize) the model to `path`.
+
+        Each file is written under a temp name and renamed into place, so a crash never
+        leaves a truncated model that later loads would trust; the caller holds the export lock.
+        """
+        import torch
+        from transformers import AutoModelForSequenceClassification
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fp32_path = path.replace(".int8.onnx", ".onnx")
+        if not os.path.exists(fp32_path):
+            model = AutoModelForSequenceClassification.from_pretrained(self.model_name).eval()
+            dummy = self._tokenizer(["warm up"], return_tensors="pt")
+            tmp = _temp_path(fp32_path)
+            torch.onnx.export(
+                model,
+                (dummy["input_ids"], dummy["attention_mask"]),
+                tmp,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "logits": {0: "batch"},
+                },
+                opset_version=14,
+            )
+            os.replace(tmp, fp32_path)
+        if self.quantize and not os.path.exists(path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            tmp = _temp_path(path)
+            quantize_dynamic(fp32_path, tmp, weight_type=QuantType.QInt8)
+            os.replace(tmp, path)
+
+    def _build(self):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("The onnx backends need `pip install onnxruntime`.") from e
+        from transformers import AutoConfig, AutoTokenizer
+
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        labels = AutoConfig.from_pretrained(self.model_name).id2label
+        self._negative_idx = next(i for i, label in labels.items() if label == "NEGATIVE")
+
+        path = self._onnx_path()
+        if not os.path.exists(path):
+            # Pool workers load concurrently; one exports, the others wait and then find the file
+            with _file_lock(path + ".lock"):
+                if not os.path.exists(path):
+                    self._export(path)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.intra_op_threads:
+            options.intra_op_num_threads = self.intra_op_threads
+        self._session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    def predict(self, texts, batch_size=32, num_workers=0):
+        import numpy as np
+        self.load()
+        scores = []
+        texts = list(texts)
+        for start in range(0, len(texts), batch_size):
+            enc = self._tokenizer(texts[start:start + batch_size], truncation=True, max_length=MAX_TOKENS,
+                                  padding=True, return_tensors="np")
+            logits = self._session.run(["logits"], {
+                "input_ids": enc["input_ids"].astype(np.int64),
+                "attention_mask": enc["attention_mask"].astype(np.int64),
+            })[0]
+            logits = logits - logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+            # Binary head: NEGATIVE prob equals the pipeline's score/1-score mapping
+            scores.extend(probs[:, self._negative_idx].astype(float).tolist())
+        return scores
+
+class OnnxInt8Backend(OnnxBackend):
+    """ONNX export with `onnxruntime.quantization.quantize_dynamic` (int8 weights)."""
+
+    name = "onnx-int8"
+    quantize = True
+
+BACKENDS = {
+    cls.name: cls for cls in (TransformersBackend, TorchInt8Backend, OnnxBackend, OnnxInt8Backend)
+}
+
+def make_backend(name, model_name=MODEL_NAME, intra_op_threads=None):
+    """Instantiate a backend by name (lazy: nothing is loaded until first use)."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown risk backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name](model_name=model_name, intra_op_threads=intra_op_threads)
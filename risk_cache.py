@@ -0,0 +1,161 @@
+# risk_cache.py
+"""
+Content-addressed cache for risk scores.
+
+Keys are a SHA-256 of the normalized text plus the model identifier, so retweets and
+duplicate posts are scored once per model. Two tiers:
+  - an in-memory LRU (lives for the process, i.e. across Streamlit reruns)
+  - a local SQLite store (survives restarts), evicted least-recently-used by entry count
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "SENTINEL_X_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "sentinel_x")
+)
+
+def normalize_text(text):
+    """Collapse whitespace and case so trivially different copies share a key (the model is uncased)."""
+    return " ".join(str(text).lower().split())
+
+# The disk tier is trimmed at most once per this many inserted rows (COUNT(*) is a full scan)
+EVICT_CHECK_INTERVAL = 10_000
+
+class RiskCache:
+    """Two-tier (memory LRU + SQLite) score cache with hit/miss counters."""
+
+    def __init__(self, model_id, path=None, max_memory_entries=100_000, max_disk_entries=2_000_000):
+        """
+        Args:
+            model_id (str): Model identifier mixed into every key.
+            path (str, optional): SQLite file; defaults to DEFAULT_CACHE_DIR/risk_scores.sqlite.
+                Pass "" to disable the disk tier.
+            max_memory_entries (int): LRU capacity.
+            max_disk_entries (int): Rows kept on disk before least-recently-used eviction.
+        """
+        self.model_id = model_id
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._conn = None
+        self._inserts_since_evict = EVICT_CHECK_INTERVAL  # check once on the first put
+
+        if path is None:
+            path = os.path.join(DEFAULT_CACHE_DIR, "risk_scores.sqlite")
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, score REAL NOT NULL, last_used REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scores_last_used ON scores(last_used)")
+                self._conn.commit()
+            except Exception as e:
+                # Read-only or missing filesystem: keep working memory-only
+                print(f"Risk cache disk tier disabled: {e}")
+                self._conn = None
+
+    def key(self, text):
+        """Content address for `text` under this cache's model."""
+        payload = f"{self.model_id}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get_many(self, keys):
+        """Look up keys in memory, then on disk. Returns {key: score} for hits."""
+        found = {}
+        with self._lock:
+            missing = []
+            for k in dict.fromkeys(keys):
+                if k in self._memory:
+                    self._memory.move_to_end(k)
+                    found[k] = self._memory[k]
+                    self._stats["memory_hits"] += 1
+                else:
+                    missing.append(k)
+
+            if missing and self._conn is not None:
+                now = time.time()
+                for start in range(0, len(missing), 500):  # stay under SQLite's variable limit
+                    chunk = missing[start:start + 500]
+                    marks = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT key, score FROM scores WHERE key IN ({marks})", chunk
+                    ).fetchall()
+                    for k, score in rows:
+                        found[k] = score
+                        self._remember(k, score)
+                    self._stats["disk_hits"] += len(rows)
+                    if rows:
+                        self._conn.executemany(
+                            "UPDATE scores SET last_used = ? WHERE key = ?", [(now, k) for k, _ in rows]
+                        )
+                self._conn.commit()
+
+            self._stats["misses"] += sum(1 for k in missing if k not in found)
+        return found
+
+    def put_many(self, items):
+        """Store {key: score} in both tiers."""
+        if not items:
+            return
+        with self._lock:
+            for k, score in items.items():
+                self._remember(k, score)
+            if self._conn is not None:
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO scores (key, score, last_used) VALUES (?, ?, ?)",
+                    [(k, float(score), now) for k, score in items.items()],
+                )
+                self._inserts_since_evict += len(items)
+                if self._inserts_since_evict >= EVICT_CHECK_INTERVAL:
+                    self._evict_disk()
+                    self._inserts_since_evict = 0
+                self._conn.commit()
+
+    def _remember(self, k, score):
+        self._memory[k] = score
+        self._memory.move_to_end(k)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _evict_disk(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)",
+                (overflow,),
+            )
+            self._stats["evictions"] += overflow
+
+    def stats(self):
+        """Hit/miss counters plus current tier sizes."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = (
+                self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0] if self._conn is not None else 0
+            )
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drop every cached score (both tiers) and reset counters."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM scores")
+                self._conn.commit()
+            for k in self._stats:
+                self._stats[k] = 0
@@ -0,0 +1,202 @@
+# scoring_service.py
+"""
+Async HTTP scoring service around nlp_engine (Starlette + uvicorn).
+
+Every text from every concurrent request goes onto one bounded asyncio queue. A
+batcher task drains it into micro-batches (at most `max_batch_size` texts, waiting
+at most `max_wait_ms` after the first one arrives) and scores each batch on a
+single dedicated inference thread, so the model never runs concurrently with
+itself and the event loop never blocks on it.
+
+  - Backpressure: when the queue is full, new requests get 503 + Retry-After.
+  - Timeouts: a request not answered within `request_timeout_s` gets 504.
+
+    python scoring_service.py --port 8600 --max-batch-size 64 --max-wait-ms 10
+
+    POST /score   {"texts": ["...", ...]}  or  {"text": "..."}
+                  -> {"results": [{"risk_score": 0.93, "risk_category": "High"}, ...]}
+    GET  /health
+    GET  /stats
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+import nlp_engine
+from nlp_engine import categorize_risk
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_MS = 10
+DEFAULT_MAX_QUEUE = 2048
+DEFAULT_REQUEST_TIMEOUT_S = 30.0
+MAX_TEXTS_PER_REQUEST = 512
+
+class MicroBatcher:
+    """Gathers queued texts into batches and scores them on one inference thread."""
+
+    def __init__(self, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 max_queue=DEFAULT_MAX_QUEUE, **score_kwargs):
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.score_kwargs = score_kwargs
+        self.queue = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sentinel-x-inference")
+        self._task = None
+        self.stats = {"batches": 0, "texts": 0, "rejected": 0, "timeouts": 0, "inference_s": 0.0}
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        loop = asyncio.get_running_loop()
+        # Load the model on the inference thread before taking traffic
+        await loop.run_in_executor(self._executor, nlp_engine.warm_up, False)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+    def submit(self, texts):
+        """Enqueue texts; returns their futures. Raises asyncio.QueueFull if there's no room for all of them."""
+        if self.queue.qsize() + len(texts) > self.max_queue:
+            self.stats["rejected"] += 1
+            raise asyncio.QueueFull
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self.queue.put_nowait((text, future))
+            futures.append(future)
+        return futures
+
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        # Requests that already timed out don't need scoring
+        return [(t, f) for t, f in batch if not f.done()]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            if not batch:
+                continue
+            texts = [t for t, _ in batch]
+            t0 = time.perf_counter()
+            try:
+                scores = await loop.run_in_executor(
+                    self._executor, lambda: nlp_engine.score_texts(texts, batch_size=len(texts), **self.score_kwargs)
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats["inference_s"] += time.perf_counter() - t0
+            self.stats["batches"] += 1
+            self.stats["texts"] += len(texts)
+            for (_, future), score in zip(batch, scores):
+                if not future.done():
+                    future.set_result(score)
+
+def create_app(max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+               max_queue=DEFAULT_MAX_QUEUE, request_timeout_s=DEFAULT_REQUEST_TIMEOUT_S, **score_kwargs):
+    """Build the Starlette app (score_kwargs are forwarded to nlp_engine.score_texts)."""
+    batcher = MicroBatcher(max_batch_size, max_wait_ms, max_queue, **score_kwargs)
+
+    async def score(request):
+        try:
+            payload = await request.json()
+        except Exception:
+            return JSONResponse({"error": "Body must be JSON."}, status_code=400)
+        if not isinstance(payload, dict):
+            return JSONResponse({"error": "Body must be a JSON object."}, status_code=400)
+        texts = payload.get("texts")
+        if texts is None and "text" in payload:
+            texts = [payload["text"]]
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            return JSONResponse({"error": "Provide 'text' (string) or 'texts' (list of strings)."}, status_code=400)
+        if len(texts) > MAX_TEXTS_PER_REQUEST:
+            return JSONResponse({"error": f"At most {MAX_TEXTS_PER_REQUEST} texts per request."}, status_code=413)
+        if not texts:
+            return JSONResponse({"results": []})
+
+        try:
+            futures = batcher.submit(texts)
+        except asyncio.QueueFull:
+            return JSONResponse({"error": "Scoring queue full, retry later."}, status_code=503,
+                                headers={"Retry-After": "1"})
+        try:
+            scores = await asyncio.wait_for(asyncio.gather(*futures), request_timeout_s)
+        except asyncio.TimeoutError:
+            batcher.stats["timeouts"] += 1
+            for future in futures:
+                future.cancel()
+            return JSONResponse({"error": "Scoring timed out."}, status_code=504)
+        except Exception as e:
+            return JSONResponse({"error": f"Scoring failed: {e}"}, status_code=500)
+        return JSONResponse({"results": [{"risk_score": s, "risk_category": categorize_risk(s)} for s in scores]})
+
+    async def health(request):
+        return JSONResponse({"status": "ok", "backend": nlp_engine.BACKEND})
+
+    async def stats(request):
+        s = dict(batcher.stats)
+        s["queue_depth"] = batcher.queue.qsize() if batcher.queue is not None else 0
+        s["avg_batch_size"] = s["texts"] / s["batches"] if s["batches"] else 0.0
+        return JSONResponse(s)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await batcher.start()
+        yield
+        await batcher.stop()
+
+    app = Starlette(routes=[
+        Route("/score", score, methods=["POST"]),
+        Route("/health", health),
+        Route("/stats", stats),
+    ], lifespan=lifespan)
+    app.state.batcher = batcher
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentinel-X risk scoring HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE)
+    parser.add_argument("--request-timeout", type=float, default=DEFAULT_REQUEST_TIMEOUT_S)
+    parser.add_argument("--backend", default=nlp_engine.BACKEND)
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads for the backend")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the risk-score cache")
+    args = parser.parse_args()
+
+    import uvicorn
+    nlp_engine.set_backend(args.backend, intra_op_threads=args.threads)
+    app = create_app(args.max_batch_size, args.max_wait_ms, args.max_queue, args.request_timeout,
+                     use_cache=not args.no_cache)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# search_index.py
+"""
+Token-level inverted index over a text column.
+
+Maps each term to a sorted array of row positions (0..n-1, i.e. iloc positions) of
+the rows that contain it as a whole token. Built once per processed dataset and
+reused by the dashboard keyword filter and by graph_engine for entity
+co-occurrence and per-entity risk aggregation. Matching is on whole tokens, so
+"isis" does not match inside "crisis".
+"""
+import re
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+TOKEN_PATTERN = re.compile(r"\w+")
+_EMPTY = np.empty(0, dtype=np.int64)
+
+def tokenize(text):
+    """Lowercase word tokens, matching how clean_text splits (non-word chars are separators)."""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+class InvertedIndex:
+    """term -> sorted row-position postings."""
+
+    def __init__(self, postings, n_rows):
+        self.postings = postings
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_series(cls, series):
+        """Build from a Series of (preferably already cleaned) text; NaN rows have no terms."""
+        n_rows = len(series)
+        tokens = (
+            series.reset_index(drop=True).fillna("").astype(str).str.lower()
+            .str.findall(TOKEN_PATTERN.pattern).explode().dropna()
+        )
+        if tokens.empty:
+            return cls({}, n_rows)
+
+        # One (term, row) pair per distinct term in a row; explode keeps rows ascending
+        pairs = pd.DataFrame({"term": tokens.to_numpy(), "row": tokens.index.to_numpy(dtype=np.int64)})
+        pairs = pairs.drop_duplicates()
+        codes, vocab = pd.factorize(pairs["term"])
+        # Stable sort by term keeps each posting list in ascending row order
+        order = np.argsort(codes, kind="stable")
+        rows = pairs["row"].to_numpy()[order]
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(vocab)))])
+        postings = {term: rows[bounds[i]:bounds[i + 1]] for i, term in enumerate(vocab)}
+        return cls(postings, n_rows)
+
+    @classmethod
+    def from_dataframe(cls, df, text_column="clean_text"):
+        return cls.from_series(df[text_column])
+
+    @classmethod
+    def concat(cls, indexes):
+        """Merge indexes over consecutive row blocks (e.g. CSV chunks) into one over all rows."""
+        pieces, offset = {}, 0
+        for index in indexes:
+            for term, rows in index.postings.items():
+                pieces.setdefault(term, []).append(rows + offset)
+            offset += index.n_rows
+        postings = {term: p[0] if len(p) == 1 else np.concatenate(p) for term, p in pieces.items()}
+        return cls(postings, offset)
+
+    def __len__(self):
+        return len(self.postings)
+
+    def lookup(self, term):
+        """Row positions containing `term` (a single token)."""
+        return self.postings.get(term.lower(), _EMPTY)
+
+    def search(self, query):
+        """Row positions containing every token of `query` (AND); none if the query has no tokens."""
+        terms = tokenize(query)
+        if not terms:
+            return _EMPTY  # e.g. only punctuation: nothing to match, not "no filter"
+        postings = sorted((self.lookup(t) for t in set(terms)), key=len)
+        rows = postings[0]
+        for p in postings[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, p, assume_unique=True)
+        return rows
+
+    def mask(self, query):
+        """Boolean mask (length n_rows) for `search(query)`."""
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.search(query)] = True
+        return mask
+
+    def entity_rows(self, entity):
+        """Row positions mentioning `entity` (multi-word entities need every token)."""
+        return self.search(entity) if " " in entity.strip() else self.lookup(entity.strip())
+
+    def cooccurrence(self, entities, min_cooccur=1):
+        """
+        Count posts mentioning both entities of each pair.
+
+        Returns:
+            dict: {(src, dst): count} for src < dst in `entities` order, count >= min_cooccur.
+        """
+        rows = {ent: self.entity_rows(ent) for ent in entities}
+        counts = {}
+        for src, dst in combinations(entities, 2):
+            if not len(rows[src]) or not len(rows[dst]):
+                continue
+            count = len(np.intersect1d(rows[src], rows[dst], assume_unique=True))
+            if count >= min_cooccur:
+                counts[(src, dst)] = count
+        return counts
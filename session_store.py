@@ -0,0 +1,241 @@
+# session_store.py
+"""
+Incremental analysis sessions.
+
+A session persists every processed row (cleaned text, risk score, category) in a
+local SQLite file, keyed by a stable row identity: the `id_column` value when the
+feed has one, otherwise a content hash of the raw text plus its occurrence number
+(so an append-only export keeps the same keys on every upload). Re-uploading a
+grown feed then cleans and scores only the new or changed rows, and the session
+aggregates are adjusted by the delta instead of being recomputed:
+  - per-category row counts
+  - per-term document frequencies (for top entities)
+  - co-occurrence counts between the session's tracked entities
+Top-High lists come straight from an index on (risk_category, risk_score).
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from cooccurrence import cooccurrence_edges
+from graph_engine import is_entity_candidate
+from nlp_engine import process_dataframe
+from risk_cache import DEFAULT_CACHE_DIR
+from search_index import InvertedIndex
+
+SESSION_DIR = os.path.join(DEFAULT_CACHE_DIR, "sessions")
+_SQL_CHUNK = 500  # stay under SQLite's bound-variable limit
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    row_key TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    clean_text TEXT,
+    risk_score REAL NOT NULL,
+    risk_category TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rows_risk ON rows(risk_category, risk_score);
+CREATE TABLE IF NOT EXISTS category_counts (category TEXT PRIMARY KEY, count INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS term_df (term TEXT PRIMARY KEY, count INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS tracked_entities (entity TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS cooccur (src TEXT, dst TEXT, count INTEGER NOT NULL, PRIMARY KEY (src, dst));
+"""
+
+def content_hash(text):
+    return hashlib.sha1(str(text).encode("utf-8")).hexdigest()
+
+def row_keys(df, text_column, id_column=None):
+    """Stable row identities plus content hashes for an upload."""
+    hashes = df[text_column].astype(str).map(content_hash)
+    if id_column:
+        keys = "id:" + df[id_column].astype(str)
+    else:
+        # nth copy of the same text keeps key "<hash>:<n>" across uploads
+        keys = hashes + ":" + hashes.groupby(hashes).cumcount().astype(str)
+    return keys.to_numpy(), hashes.to_numpy()
+
+class AnalysisSession:
+    """Persistent, incrementally updated analysis of one growing feed."""
+
+    def __init__(self, name, directory=SESSION_DIR):
+        safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", name) or "default"
+        os.makedirs(directory, exist_ok=True)
+        self.name = name
+        self.path = os.path.join(directory, f"{safe}.sqlite")
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    # ---------- updates ----------
+    def _existing(self, keys):
+        found = {}
+        for start in range(0, len(keys), _SQL_CHUNK):
+            chunk = list(keys[start:start + _SQL_CHUNK])
+            marks = ",".join("?" * len(chunk))
+            for row in self._conn.execute(
+                f"SELECT row_key, content_hash, clean_text, risk_score, risk_category FROM rows "
+                f"WHERE row_key IN ({marks})", chunk
+            ):
+                found[row[0]] = row[1:]
+        return found
+
+    def _bump(self, table, key_column, deltas):
+        self._conn.executemany(
+            f"INSERT INTO {table} ({key_column}, count) VALUES (?, ?) "
+            f"ON CONFLICT({key_column}) DO UPDATE SET count = count + excluded.count",
+            [(k, int(v)) for k, v in deltas.items() if v],
+        )
+
+    def _apply_text_delta(self, texts, sign):
+        """Add (sign=1) or remove (sign=-1) texts' contribution to term and co-occurrence counts."""
+        if not texts:
+            return
+        index = InvertedIndex.from_series(pd.Series(texts))
+        self._bump("term_df", "term", {t: sign * len(p) for t, p in index.postings.items()
+                                       if is_entity_candidate(t)})
+        entities = self._tracked_entities()  # caller holds the lock
+        if len(entities) > 1:
+            self._conn.executemany(
+                "INSERT INTO cooccur (src, dst, count) VALUES (?, ?, ?) "
+                "ON CONFLICT(src, dst) DO UPDATE SET count = count + excluded.count",
+                [(s, d, sign * w) for s, d, w in cooccurrence_edges(index, entities, min_cooccur=1)],
+            )
+
+    def update(self, df, text_column="text", id_column=None, **score_kwargs):
+        """
+        Merge an upload into the session, scoring only new or changed rows.
+
+        Args:
+            df (pd.DataFrame): The full upload (old + new rows).
+            text_column (str): Raw text column.
+            id_column (str, optional): Stable id column, if the feed has one.
+            **score_kwargs: Forwarded to process_dataframe for the delta rows.
+
+        Returns:
+            tuple: (processed DataFrame in upload order with clean_text/risk_score/risk_category,
+                    {"new": n, "changed": n, "unchanged": n})
+        """
+        keys, hashes = row_keys(df, text_column, id_column)
+        with self._lock:
+            existing = self._existing(pd.unique(keys))
+            stale = [i for i, (k, h) in enumerate(zip(keys, hashes))
+                     if k not in existing or existing[k][0] != h]
+            changed = sum(1 for i in stale if keys[i] in existing)
+
+            out = df.copy()
+            out["clean_text"] = [existing[k][1] if k in existing else None for k in keys]
+            out["risk_score"] = [existing[k][2] if k in existing else 0.0 for k in keys]
+            out["risk_category"] = [existing[k][3] if k in existing else None for k in keys]
+
+            if stale:
+                delta = process_dataframe(df.iloc[stale], text_column=text_column, **score_kwargs)
+                cols = ["clean_text", "risk_score", "risk_category"]
+                for col in cols:
+                    out.iloc[stale, out.columns.get_loc(col)] = delta[col].to_numpy()
+
+                # Within one upload a key may repeat (duplicate ids); last occurrence wins
+                fresh = {}
+                for i, (text, score, category) in zip(stale, delta[cols].itertuples(index=False)):
+                    fresh[keys[i]] = (hashes[i], text, float(score), category)
+
+                category_delta, old_texts = {}, []
+                for k, (_, text, _, category) in fresh.items():
+                    if k in existing:
+                        old = existing[k]
+                        category_delta[old[3]] = category_delta.get(old[3], 0) - 1
+                        old_texts.append(old[1] or "")
+                    category_delta[category] = category_delta.get(category, 0) + 1
+
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO rows (row_key, content_hash, clean_text, risk_score, risk_category, "
+                    "updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(k, h, t, s, c, now) for k, (h, t, s, c) in fresh.items()],
+                )
+                self._bump("category_counts", "category", category_delta)
+                self._apply_text_delta(old_texts, -1)
+                self._apply_text_delta([t or "" for _, t, _, _ in fresh.values()], 1)
+                self._conn.commit()
+
+        return out, {"new": len(stale) - changed, "changed": changed, "unchanged": len(df) - len(stale)}
+
+    # ---------- aggregates ----------
+    # The connection is shared across Streamlit threads, so reads take the lock too
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def category_counts(self):
+        counts = {"High": 0, "Moderate": 0, "Low": 0}
+        with self._lock:
+            counts.update(dict(self._conn.execute("SELECT category, count FROM category_counts WHERE count > 0")))
+        return counts
+
+    def top_high(self, k=50):
+        """Highest-scoring High-risk rows (served from the category/score index)."""
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT row_key, clean_text, risk_score, risk_category FROM rows WHERE risk_category = 'High' "
+                "ORDER BY risk_score DESC LIMIT ?", self._conn, params=(k,)
+            )
+
+    def top_terms(self, n=15):
+        """Most frequent entity-candidate terms (document frequency); 'frequency'-mode entities."""
+        with self._lock:
+            return [t for t, _ in self._conn.execute(
+                "SELECT term, count FROM term_df WHERE count > 0 ORDER BY count DESC LIMIT ?", (n,)
+            )]
+
+    def _tracked_entities(self):
+        return [e for (e,) in self._conn.execute("SELECT entity FROM tracked_entities ORDER BY rowid")]
+
+    def tracked_entities(self):
+        with self._lock:
+            return self._tracked_entities()
+
+    def track_entities(self, entities):
+        """
+        Set the entities whose co-occurrence is maintained incrementally.
+
+        Changing the set recounts co-occurrence once over the stored rows; later
+        updates only apply their delta.
+        """
+        entities = list(dict.fromkeys(entities))
+        with self._lock:
+            if entities == self._tracked_entities():
+                return
+            self._conn.execute("DELETE FROM tracked_entities")
+            self._conn.executemany("INSERT INTO tracked_entities (entity) VALUES (?)", [(e,) for e in entities])
+            self._conn.execute("DELETE FROM cooccur")
+            texts = [t or "" for (t,) in self._conn.execute("SELECT clean_text FROM rows")]
+            if len(entities) > 1 and texts:
+                index = InvertedIndex.from_series(pd.Series(texts))
+                self._conn.executemany(
+                    "INSERT INTO cooccur (src, dst, count) VALUES (?, ?, ?)",
+                    cooccurrence_edges(index, entities, min_cooccur=1),
+                )
+            self._conn.commit()
+
+    def relationships(self, min_cooccur=2):
+        """[(src, dst, weight)] for tracked entities, both directions (build_relationships shape)."""
+        relationships = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT src, dst, count FROM cooccur WHERE count >= ?", (min_cooccur,)
+            ).fetchall()
+        for src, dst, weight in rows:
+            relationships.append((src, dst, weight))
+            relationships.append((dst, src, weight))
+        return relationships
+
+    def clear(self):
+        with self._lock:
+            for table in ("rows", "category_counts", "term_df", "cooccur"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.commit()
@@ -0,0 +1,167 @@
+# stream_engine.py
+"""
+Streaming (chunked) CSV scoring for files larger than RAM.
+
+The input is read `chunksize` rows at a time, each chunk is cleaned and scored with
+nlp_engine.process_dataframe, appended to an output file (CSV or Parquet), and then
+dropped. Only running aggregates are kept for the dashboard:
+  - row and per-category counts
+  - a top-K heap of the highest-risk posts
+Peak memory is therefore bounded by the chunk size, not the file size.
+"""
+import heapq
+import itertools
+import os
+
+import pandas as pd
+
+from csv_ingest import FALLBACK_ERRORS, detect_source_encoding
+from nlp_engine import process_dataframe
+
+DEFAULT_STREAM_CHUNKSIZE = 20_000
+DEFAULT_TOP_K = 50
+
+class StreamSummary:
+    """Running aggregates collected while streaming."""
+
+    def __init__(self, top_k=DEFAULT_TOP_K):
+        self.top_k = top_k
+        self.rows = 0
+        self.chunks = 0
+        self.category_counts = {"High": 0, "Moderate": 0, "Low": 0}
+        self._heap = []  # min-heap of (risk_score, seq, row_dict)
+        self._seq = itertools.count()
+        self.output_path = None
+
+    def update(self, chunk):
+        """Fold one scored chunk into the aggregates."""
+        self.rows += len(chunk)
+        self.chunks += 1
+        for category, count in chunk["risk_category"].value_counts().items():
+            self.category_counts[category] = self.category_counts.get(category, 0) + int(count)
+
+        # Only rows that could enter the heap are converted to dicts
+        candidates = chunk.nlargest(self.top_k, "risk_score")
+        for row in candidates.to_dict("records"):
+            item = (row["risk_score"], next(self._seq), row)
+            if len(self._heap) < self.top_k:
+                heapq.heappush(self._heap, item)
+            elif item[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def top_rows(self):
+        """Top-K rows by risk_score as a DataFrame (highest first)."""
+        rows = [row for _, _, row in sorted(self._heap, key=lambda x: (-x[0], x[1]))]
+        return pd.DataFrame(rows)
+
+    def category_frame(self):
+        """Category counts in the same shape as value_counts().reset_index() in app.py."""
+        return pd.DataFrame(
+            {"risk_category": list(self.category_counts), "count": list(self.category_counts.values())}
+        )
+
+class _ChunkWriter:
+    """Appends scored chunks to a CSV or Parquet file."""
+
+    def __init__(self, path, output_format):
+        self.path = path
+        self.output_format = output_format
+        self._parquet = None
+        self._wrote_csv_header = False
+
+    def write(self, chunk):
+        if self.output_format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._parquet is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                # An all-null column in the first chunk is typed null; widen it so later values fit
+                schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f
+                                    for f in table.schema], metadata=table.schema.metadata)
+                table = table.cast(schema)
+                self._parquet = pq.ParquetWriter(self.path, schema)
+            else:
+                # Later chunks are cast to the first chunk's schema
+                table = pa.Table.from_pandas(chunk, schema=self._parquet.schema, preserve_index=False)
+            self._parquet.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode="a" if self._wrote_csv_header else "w",
+                         header=not self._wrote_csv_header, index=False)
+            self._wrote_csv_header = True
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+def iter_csv_chunks(source, chunksize=DEFAULT_STREAM_CHUNKSIZE, encoding=None, usecols=None):
+    """
+    Yield DataFrame chunks from a path or file-like object, skipping malformed lines.
+
+    The encoding is detected like csv_ingest.read_csv_fast does when not given; bytes it
+    cannot decode further on are read as csv_ingest.FALLBACK_ENCODING rather than replaced.
+
+    Input columns are read as strings: per-chunk type inference would type a column that
+    is blank in the first chunk as float64 and a later chunk's text in it would no longer
+    fit the output schema fixed by the first chunk.
+    """
+    encoding = encoding or detect_source_encoding(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    reader = pd.read_csv(source, chunksize=chunksize, encoding=encoding, encoding_errors=FALLBACK_ERRORS,
+                         on_bad_lines="skip", usecols=usecols, dtype=str)
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+def process_stream(chunks, output_path, text_column="text", output_format=None, top_k=DEFAULT_TOP_K,
+                   progress_callback=None, **score_kwargs):
+    """
+    Clean, score and write an iterable of DataFrame chunks incrementally.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Input chunks (e.g. from iter_csv_chunks).
+        output_path (str): Destination file; format inferred from the extension if not given.
+        text_column (str): Raw text column to clean when a chunk has no 'clean_text'.
+        output_format (str, optional): "csv" or "parquet".
+        top_k (int): Size of the high-risk heap kept for the dashboard.
+        progress_callback (callable, optional): Called as fn(summary) after each chunk.
+        **score_kwargs: Forwarded to process_dataframe (batch_size, backend, num_processes, ...).
+
+    Returns:
+        StreamSummary: Running aggregates; `.output_path` points at the written file.
+    """
+    output_format = output_format or ("parquet" if output_path.endswith(".parquet") else "csv")
+    if output_format not in ("csv", "parquet"):
+        raise ValueError(f"Unsupported output format '{output_format}'. Use 'csv' or 'parquet'.")
+
+    summary = StreamSummary(top_k=top_k)
+    writer = _ChunkWriter(output_path, output_format)
+    try:
+        for chunk in chunks:
+            if text_column not in chunk.columns and "clean_text" not in chunk.columns:
+                raise ValueError(f"Column '{text_column}' not found in streamed dataset.")
+            # The chunk is ours, so score it in place instead of copying it
+            chunk = process_dataframe(chunk, text_column=text_column, copy=False, **score_kwargs)
+            writer.write(chunk)
+            summary.update(chunk)
+            if progress_callback is not None:
+                progress_callback(summary)
+            del chunk
+    finally:
+        writer.close()
+    summary.output_path = os.path.abspath(output_path)
+    return summary
+
+def summarize_output(path, top_k=DEFAULT_TOP_K, chunksize=DEFAULT_STREAM_CHUNKSIZE):
+    """Rebuild the StreamSummary of an already scored CSV output without re-scoring it."""
+    summary = StreamSummary(top_k=top_k)
+    for chunk in iter_csv_chunks(path, chunksize=chunksize):
+        summary.update(chunk)
+    summary.output_path = os.path.abspath(path)
+    return summary
+
+def process_csv_stream(source, output_path, text_column="text", chunksize=DEFAULT_STREAM_CHUNKSIZE,
+                       encoding=None, **kwargs):
+    """Stream a CSV (path or file-like) through process_stream; see process_stream for kwargs."""
+    return process_stream(iter_csv_chunks(source, chunksize=chunksize, encoding=encoding),
+                          output_path, text_column=text_column, **kwargs)
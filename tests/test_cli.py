@@ -0,0 +1,22 @@
+# tests/test_cli.py
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+from cli import _combine_parts
+
+
+def test_combine_parts_unifies_drifting_part_schemas(tmp_path):
+    # Part 0 infers "user" as all-null and "id" as int; part 1 has text and floats there
+    parts = [str(tmp_path / "part-00000.parquet"), str(tmp_path / "part-00001.parquet")]
+    pq.write_table(pa.table({"text": ["a", "b"], "user": pa.nulls(2), "id": [1, 2],
+                             "risk_score": [0.1, 0.2]}), parts[0])
+    pq.write_table(pa.table({"text": ["c"], "user": ["alice"], "id": [3.5],
+                             "risk_score": [0.9]}), parts[1])
+    out = str(tmp_path / "combined.parquet")
+    _combine_parts(parts, out, "parquet")
+    table = pq.read_table(out)
+    assert table.num_rows == 3
+    assert table.column("user").to_pylist() == [None, None, "alice"]
+    assert table.column("id").to_pylist() == [1.0, 2.0, 3.5]
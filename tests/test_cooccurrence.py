@@ -0,0 +1,30 @@
+# tests/test_cooccurrence.py
+import numpy as np
+import pytest
+
+import cooccurrence
+from search_index import InvertedIndex
+
+pytest.importorskip("scipy")
+
+
+def _large_index():
+    # Counts * n_posts and df_i * df_j both exceed the int32 range
+    postings = {
+        "alpha": np.arange(0, 50_000, dtype=np.int64),
+        "beta": np.arange(0, 60_000, dtype=np.int64),
+        "gamma": np.arange(40_000, 100_000, dtype=np.int64),
+    }
+    return InvertedIndex(postings, n_rows=3_000_000)
+
+
+@pytest.mark.parametrize("min_pmi", [None, 2.5])
+def test_sparse_edges_match_posting_list_fallback(monkeypatch, min_pmi):
+    index = _large_index()
+    entities = ["alpha", "beta", "gamma"]
+    sparse = cooccurrence.cooccurrence_edges(index, entities, min_pmi=min_pmi)
+    monkeypatch.setattr(cooccurrence, "SCIPY_AVAILABLE", False)
+    fallback = cooccurrence.cooccurrence_edges(index, entities, min_pmi=min_pmi)
+    assert sorted(sparse) == sorted(fallback)
+    if min_pmi is not None:
+        assert sorted(sparse) == [("alpha", "beta", 50_000), ("beta", "gamma", 20_000)]
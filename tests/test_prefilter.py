@@ -0,0 +1,27 @@
+# tests/test_prefilter.py
+import pytest
+
+import prefilter
+
+pytest.importorskip("ahocorasick")
+
+TEXTS = [
+    "Kill!! them all",
+    "kill,kill,KILL",
+    "gun-control debate",
+    "killing_time at the mall",
+    "don't shoot... please",
+    "(bomb)",
+    "",
+    None,
+]
+
+
+def test_automaton_and_regex_hits_agree():
+    lexicon = prefilter.LexiconPrefilter()
+    assert lexicon._automaton is not None
+    automaton_hits = lexicon.hits(TEXTS)
+    lexicon._automaton = None  # force the regex path
+    regex_hits = lexicon.hits(TEXTS)
+    assert automaton_hits.tolist() == regex_hits.tolist()
+    assert regex_hits.tolist() == [1, 3, 1, 0, 1, 1, 0, 0]
@@ -0,0 +1,32 @@
+# tests/test_risk_backends.py
+import pytest
+
+from risk_backends import make_backend
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("transformers")
+pytest.importorskip("torch")
+
+TOLERANCE = 0.05  # same default as benchmarks/bench_backends.py
+TEXTS = [
+    "I love this community, thanks for the support",
+    "they should all be destroyed, I hate them",
+    "meeting at the library tomorrow at noon",
+    "this is the worst, most disgusting thing I have ever seen",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def reference():
+    try:
+        return make_backend("transformers").load().predict(TEXTS)
+    except OSError as e:  # model not cached and no network
+        pytest.skip(f"risk model unavailable: {e}")
+
+
+@pytest.mark.parametrize("name", ["onnx", "onnx-int8"])
+def test_onnx_backends_agree_with_fp32(reference, name):
+    scores = make_backend(name).load().predict(TEXTS)
+    assert len(scores) == len(reference)
+    assert max(abs(a - b) for a, b in zip(reference, scores)) <= TOLERANCE
@@ -0,0 +1,19 @@
+# tests/test_search_index.py
+import pandas as pd
+
+from search_index import InvertedIndex
+
+
+def _index():
+    return InvertedIndex.from_series(pd.Series(["attack planned downtown", "nice weather", None]))
+
+
+def test_search_matches_all_tokens():
+    assert _index().search("Attack downtown").tolist() == [0]
+
+
+def test_query_without_tokens_matches_nothing():
+    index = _index()
+    for query in ("", "   ", "!!! ...", "?"):
+        assert index.search(query).tolist() == []
+        assert not index.mask(query).any()
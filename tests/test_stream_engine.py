@@ -0,0 +1,39 @@
+# tests/test_stream_engine.py
+import pytest
+
+pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+from stream_engine import _ChunkWriter, iter_csv_chunks
+
+
+def test_parquet_output_survives_blank_first_chunk(tmp_path):
+    # "user" is empty in the first chunk and text later; "id" is numeric, then text
+    src = tmp_path / "feed.csv"
+    src.write_text("text,user,id\n"
+                   "first post,,1\n"
+                   "second post,,2\n"
+                   "third post,alice,x3\n"
+                   "fourth post,bob,4\n", encoding="utf-8")
+    out = tmp_path / "scored.parquet"
+    writer = _ChunkWriter(str(out), "parquet")
+    try:
+        for chunk in iter_csv_chunks(str(src), chunksize=2):
+            chunk["risk_score"] = 0.5
+            writer.write(chunk)
+    finally:
+        writer.close()
+    table = pq.read_table(out)
+    assert table.num_rows == 4
+    assert table.column("user").to_pylist() == [None, None, "alice", "bob"]
+    assert table.column("id").to_pylist() == ["1", "2", "x3", "4"]
+
+
+def test_chunks_decode_codepage_past_the_sample(tmp_path):
+    # ASCII for the whole detection sample, cp1252 bytes afterwards
+    from csv_ingest import SAMPLE_BYTES
+    src = tmp_path / "legacy.csv"
+    filler = "plain ascii row\n" * (SAMPLE_BYTES // 16 + 1)
+    src.write_bytes(("text\n" + filler + "café – naïve\n").encode("cp1252"))
+    rows = [t for chunk in iter_csv_chunks(str(src), chunksize=1000) for t in chunk["text"]]
+    assert rows[-1] == "café – naïve"
@@ -0,0 +1,66 @@
+# text_cleaning.py
+"""
+Shared text cleaning used by data_loader, nlp_engine and app.
+
+Cleaning = strip URLs, replace non-word characters with spaces, lowercase, trim.
+`clean_text` handles a single string; `clean_series` does the same over a whole
+pandas Series with vectorized string ops, optionally on a PyArrow-backed dtype.
+"""
+import re
+
+import pandas as pd
+
+from instrumentation import span
+
+URL_PATTERN = re.compile(r"http\S+|www\S+|https\S+")
+NON_WORD_PATTERN = re.compile(r"\W")
+
+# PyArrow's regex engine (RE2) treats \W as ASCII-only; spell out the Unicode classes
+# so the Arrow path keeps accented/non-Latin letters exactly like Python's re does.
+_ARROW_URL_PATTERN = URL_PATTERN.pattern
+_ARROW_NON_WORD_PATTERN = r"[^\p{L}\p{N}_]"
+
+# Below this size the Arrow conversion costs more than it saves
+ARROW_MIN_ROWS = 100_000
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except Exception:
+    PYARROW_AVAILABLE = False
+
+def clean_text(text):
+    """Clean text by removing URLs, non-alphanumeric characters, and converting to lowercase."""
+    text = URL_PATTERN.sub('', text)
+    text = NON_WORD_PATTERN.sub(' ', text)
+    return text.lower().strip()
+
+def clean_series(series, use_arrow=None):
+    """
+    Vectorized `clean_text` over a Series (values are cast with astype(str) first).
+
+    Args:
+        series (pd.Series): Raw text.
+        use_arrow (bool, optional): Run on the "string[pyarrow]" dtype. Default: only when
+            PyArrow is installed and the Series has at least ARROW_MIN_ROWS rows.
+
+    Returns:
+        pd.Series: Cleaned text (object dtype, or string[pyarrow] on the Arrow path).
+    """
+    if use_arrow is None:
+        use_arrow = PYARROW_AVAILABLE and len(series) >= ARROW_MIN_ROWS
+    with span("clean", rows=len(series)):
+        if use_arrow:
+            s = series.astype(str).astype("string[pyarrow]")
+            s = s.str.replace(_ARROW_URL_PATTERN, '', regex=True)
+            s = s.str.replace(_ARROW_NON_WORD_PATTERN, ' ', regex=True)
+        else:
+            s = series.astype(str)
+            s = s.str.replace(URL_PATTERN, '', regex=True)
+            s = s.str.replace(NON_WORD_PATTERN, ' ', regex=True)
+        return s.str.lower().str.strip()
+
+def add_clean_text(df, text_column, use_arrow=None):
+    """Set df['clean_text'] from `text_column` (in place) and return df."""
+    df['clean_text'] = clean_series(df[text_column], use_arrow=use_arrow)
+    return df
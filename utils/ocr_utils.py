@@ -1,20 +1,12 @@
-import easyocr
-import pytesseract
-from PIL import Image
+from ocr_engine import extract_text, get_reader_pool
 
-# Initialize EasyOCR reader once
-reader = easyocr.Reader(['en'], gpu=False)
+# Shared, long-lived EasyOCR reader (built on first use, reused across calls)
+reader_pool = get_reader_pool()
 
 def extract_text_from_image(image_path):
-    """Try EasyOCR first, fallback to pytesseract."""
+    """Try EasyOCR first, fallback to pytesseract. Accepts a path, bytes, PIL image or array."""
     try:
-        result = reader.readtext(image_path, detail=0)
-        text = " ".join(result)
-        if not text.strip():
-            # fallback
-            img = Image.open(image_path)
-            text = pytesseract.image_to_string(img)
-        return text
+        return extract_text(image_path, pool=reader_pool)
     except Exception as e:
         print(f"OCR failed: {e}")
         return ""
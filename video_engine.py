@@ -0,0 +1,193 @@
+# video_engine.py
+"""
+Producer/consumer OCR pipeline for video files.
+
+  decoder (calling thread)  ->  bounded frame queue  ->  N OCR worker threads (batched)
+
+The decoder walks the video with `grab()` (no pixel decode for skipped frames),
+retrieves every `frame_interval`-th frame, and drops it if its difference hash is
+within `hash_threshold` bits of the last frame it kept, so static subtitles or
+slides are OCR'd once. Workers pull up to `batch_size` frames at a time and run
+them through the shared OCR engine. Text is de-duplicated across frames and
+returned with per-frame timestamps.
+"""
+import queue
+import threading
+
+import numpy as np
+
+from instrumentation import span
+
+from ocr_engine import (CV2_AVAILABLE, EASYOCR_AVAILABLE, PYTESSERACT_AVAILABLE, get_reader_pool,
+                        ocr_easyocr_batch, ocr_tesseract)
+
+if CV2_AVAILABLE:
+    import cv2
+
+DEFAULT_FRAME_INTERVAL = 30
+DEFAULT_MAX_FRAMES = 60
+DEFAULT_OCR_WORKERS = 2
+DEFAULT_OCR_BATCH_SIZE = 4
+DEFAULT_HASH_THRESHOLD = 6  # Hamming distance (of 64 bits) below which frames count as duplicates
+
+_STOP = object()
+
+def frame_hash(gray):
+    """64-bit difference hash of a grayscale frame (as a Python int)."""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+def _normalize(text):
+    return " ".join(text.lower().split())
+
+def _put(frame_queue, item, stop_event, timeout=0.5):
+    """Blocking put that gives up (returns False) once `stop_event` is set, e.g. after a worker failed."""
+    while not stop_event.is_set():
+        try:
+            frame_queue.put(item, timeout=timeout)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _decode(path, frame_queue, frame_interval, max_frames, hash_threshold, stop_event, stats):
+    """Producer: sample, de-duplicate and enqueue (frame_index, timestamp_s, gray) items."""
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    last_hash = None
+    frame_index = 0
+    try:
+        while cap.isOpened() and not stop_event.is_set():
+            if not cap.grab():
+                break
+            if frame_index % frame_interval == 0:
+                ok, frame = cap.retrieve()
+                if ok:
+                    stats["sampled"] += 1
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    h = frame_hash(gray)
+                    if last_hash is not None and hamming(h, last_hash) <= hash_threshold:
+                        stats["skipped_similar"] += 1
+                    else:
+                        last_hash = h
+                        if not _put(frame_queue, (frame_index, frame_index / fps, gray), stop_event):
+                            break
+                        stats["ocr_frames"] += 1
+                        if stats["ocr_frames"] >= max_frames:
+                            break
+            frame_index += 1
+    finally:
+        cap.release()
+        stats["decoded"] = frame_index
+
+def _ocr_worker(frame_queue, results, results_lock, batch_size, pool, stop_event, errors):
+    """Consumer: OCR frames in batches until the stop marker arrives (or an OCR call fails)."""
+    try:
+        _ocr_loop(frame_queue, results, results_lock, batch_size, pool)
+    except Exception as e:
+        errors.append(e)
+        stop_event.set()  # stops the decoder instead of letting it block on a queue nobody drains
+
+def _ocr_loop(frame_queue, results, results_lock, batch_size, pool):
+    done = False
+    while not done:
+        batch = [frame_queue.get()]
+        while len(batch) < batch_size:
+            try:
+                batch.append(frame_queue.get_nowait())
+            except queue.Empty:
+                break
+        if _STOP in batch:
+            done = True
+            # Put back stop markers taken by this worker beyond its own one
+            for _ in range(batch.count(_STOP) - 1):
+                frame_queue.put(_STOP)
+            batch = [item for item in batch if item is not _STOP]
+        if not batch:
+            continue
+
+        frames = [gray for _, _, gray in batch]
+        if EASYOCR_AVAILABLE:
+            texts = ocr_easyocr_batch(frames, pool=pool, batch_size=batch_size)
+        else:
+            texts = [""] * len(frames)
+        if PYTESSERACT_AVAILABLE:
+            texts = [t if t.strip() else ocr_tesseract(f) for t, f in zip(texts, frames)]
+
+        with results_lock:
+            for (frame_index, timestamp, _), text in zip(batch, texts):
+                if text.strip():
+                    results.append({"frame_index": frame_index, "timestamp_s": round(timestamp, 2),
+                                    "text": text.strip()})
+
+def extract_video_text(path, frame_interval=DEFAULT_FRAME_INTERVAL, max_frames=DEFAULT_MAX_FRAMES,
+                       workers=DEFAULT_OCR_WORKERS, batch_size=DEFAULT_OCR_BATCH_SIZE,
+                       hash_threshold=DEFAULT_HASH_THRESHOLD):
+    """
+    OCR a video file: the calling thread decodes frames and feeds a pool of OCR worker threads.
+
+    Args:
+        path (str): Video file path (OpenCV needs a real file).
+        frame_interval (int): Sample every N-th frame.
+        max_frames (int): Cap on frames actually sent to OCR (after de-duplication).
+        workers (int): OCR worker threads (each borrows a pooled EasyOCR reader; the pool holds at
+            most ocr_engine.MAX_POOL_SIZE readers, so extra workers share them).
+        batch_size (int): Frames per OCR call.
+        hash_threshold (int): dHash Hamming distance at or below which a sampled
+            frame is treated as a duplicate of the last kept one (-1 disables).
+
+    Returns:
+        dict: {"text": de-duplicated text in time order,
+               "segments": [{"frame_index", "timestamp_s", "text"}, ...] (unique texts only),
+               "stats": frame counters}
+    """
+    if not CV2_AVAILABLE:
+        raise RuntimeError("OpenCV (cv2) is required for video OCR.")
+
+    workers = max(1, workers)
+    pool = get_reader_pool().reserve(workers) if EASYOCR_AVAILABLE else None
+    frame_queue = queue.Queue(maxsize=workers * batch_size * 2)  # backpressure on the decoder
+    results, results_lock = [], threading.Lock()
+    stats = {"decoded": 0, "sampled": 0, "skipped_similar": 0, "ocr_frames": 0}
+    stop_event = threading.Event()
+    errors = []
+
+    consumers = [
+        threading.Thread(target=_ocr_worker,
+                         args=(frame_queue, results, results_lock, batch_size, pool, stop_event, errors),
+                         name=f"sentinel-x-ocr-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    for t in consumers:
+        t.start()
+    try:
+        with span("video.decode"):
+            _decode(path, frame_queue, frame_interval, max_frames, hash_threshold, stop_event, stats)
+    finally:
+        stop_event.set()
+        for _ in consumers:
+            # Timed puts: if every worker has died with the queue full, nobody would take the marker
+            while any(t.is_alive() for t in consumers):
+                try:
+                    frame_queue.put(_STOP, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+        for t in consumers:
+            t.join()
+        if pool is not None:
+            pool.release(workers)
+    if errors:
+        raise RuntimeError(f"Video OCR failed: {errors[0]}") from errors[0]
+
+    segments, seen = [], set()
+    for item in sorted(results, key=lambda r: r["frame_index"]):
+        key = _normalize(item["text"])
+        if key not in seen:
+            seen.add(key)
+            segments.append(item)
+    return {"text": " ".join(s["text"] for s in segments), "segments": segments, "stats": stats}